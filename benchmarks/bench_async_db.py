@@ -0,0 +1,105 @@
+"""
+Compare the async request handlers against the previous sync handlers.
+
+The sync app reproduces the old ``def`` handlers over ``SessionLocal`` so both
+modes hit the same database with the same queries. Run against Postgres for
+meaningful numbers; SQLite only shows the dispatch overhead.
+
+    python -m benchmarks.bench_async_db --concurrency 200 --requests 5000
+    python -m benchmarks.bench_async_db --database-url postgresql://...
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import configure_env, print_table, run_load
+
+
+def build_sync_app():
+    """The pre-async handlers, mounted on a bare app"""
+    from fastapi import Depends, FastAPI, HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+    from sqlalchemy.orm import Session
+    from config.database import get_db
+    from models import Product, User
+    from utils.security import security, SECRET_KEY, ALGORITHM
+    from jose import jwt
+
+    app = FastAPI()
+
+    @app.get("/products/")
+    def products(db: Session = Depends(get_db)):
+        return db.query(Product).filter(Product.is_active == True).all()
+
+    @app.get("/auth/me")
+    def me(credentials: HTTPAuthorizationCredentials = Depends(security),
+           db: Session = Depends(get_db)):
+        payload = jwt.decode(credentials.credentials, SECRET_KEY,
+                             algorithms=[ALGORITHM])
+        user = db.query(User).filter(User.email == payload["sub"]).first()
+        if not user:
+            raise HTTPException(status_code=404)
+        return {"id": user.id, "email": user.email}
+
+    return app
+
+
+def prepare_data(products: int) -> str:
+    """Create the schema, products and a user; return a bearer token"""
+    from config.database import Base, SessionLocal, engine
+    from migrations.seed_data import get_dummy_products
+    from models import Product, User
+    from utils.security import create_access_token
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not db.query(Product).count():
+            dummy = get_dummy_products()
+            for i in range(products):
+                row = dict(dummy[i % len(dummy)])
+                row["name"] = f"{row['name']} #{i}"
+                db.add(Product(**row))
+        if not db.query(User).filter(User.email == "bench@example.com").first():
+            db.add(User(username="bench", email="bench@example.com",
+                        password="not-a-real-hash"))
+        db.commit()
+    finally:
+        db.close()
+    return create_access_token({"sub": "bench@example.com"})
+
+
+async def run(args) -> None:
+    import httpx
+    from main import app as async_app
+
+    token = prepare_data(args.products)
+    headers = {"Authorization": f"Bearer {token}"}
+    results = {}
+    for mode, app in (("sync", build_sync_app()), ("async", async_app)):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport,
+                                     base_url="http://bench") as client:
+            for path, kwargs in (("/products/", {}),
+                                 ("/auth/me", {"headers": headers})):
+                await run_load(client, "GET", path, args.concurrency,
+                               args.concurrency, **kwargs)  # warm up
+                results[f"{mode} GET {path}"] = await run_load(
+                    client, "GET", path, args.requests, args.concurrency,
+                    **kwargs
+                )
+    print_table(f"concurrency={args.concurrency}", results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=50)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Product write throughput: ``POST /products/bulk`` versus one request per row.
+
+Creates ``--rows`` products through the bulk endpoint in batches of
+``--batch`` items, replaces all of them again with their current versions
+(the optimistic concurrency path), and compares both with ``--single``
+rows written one ``PATCH /products/{id}`` at a time.
+
+    python -m benchmarks.bench_bulk_upsert --rows 100000 --batch 5000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_env
+
+
+def item(i: int) -> dict:
+    return {"name": f"Bulk product {i}", "description": f"Bulk loaded {i}",
+            "price": round(1 + i % 997 * 1.37, 2), "category": "Bulk",
+            "stock_quantity": i % 500}
+
+
+async def run(args) -> None:
+    import httpx
+    from config.database import Base, engine
+    from main import app
+    from utils import get_current_admin
+
+    Base.metadata.create_all(bind=engine)
+    # Measure the writes, not authentication
+    app.dependency_overrides[get_current_admin] = lambda: None
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 timeout=600) as client:
+        async def bulk(items: list[dict]) -> tuple[float, list[dict]]:
+            results = []
+            started = time.perf_counter()
+            for start in range(0, len(items), args.batch):
+                response = await client.post(
+                    "/products/bulk", json=items[start:start + args.batch]
+                )
+                response.raise_for_status()
+                results.extend(response.json()["results"])
+            return time.perf_counter() - started, results
+
+        elapsed, created = await bulk([item(i) for i in range(args.rows)])
+        print(f"\nbulk insert:  {args.rows:>8} rows in {elapsed:6.2f}s "
+              f"{args.rows / elapsed:>10,.0f} rows/sec")
+
+        replacements = [
+            {**item(i), "price": 2.5, "id": result["id"], "version": result["version"]}
+            for i, result in enumerate(created)
+        ]
+        elapsed, updated = await bulk(replacements)
+        ok = sum(result["status"] == "updated" for result in updated)
+        print(f"bulk replace: {ok:>8} rows in {elapsed:6.2f}s "
+              f"{ok / elapsed:>10,.0f} rows/sec")
+
+        started = time.perf_counter()
+        for result in created[:args.single]:
+            response = await client.patch(f"/products/{result['id']}",
+                                          json={"price": 3.5})
+            response.raise_for_status()
+        elapsed = time.perf_counter() - started
+        print(f"single PATCH: {args.single:>8} rows in {elapsed:6.2f}s "
+              f"{args.single / elapsed:>10,.0f} rows/sec")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--single", type=int, default=1000)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Response compression: ratio and CPU cost per content coding, and what
+storing compressed bytes with cached product responses saves.
+
+First compresses one product listing body with every available coding,
+then requests ``GET /products/`` with each coding, once with the stored
+compressed bytes reused and once with the cache cleared before every request
+(so the body is encoded and compressed each time).
+
+    python -m benchmarks.bench_compression --products 1000 --limit 200
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_env, percentile
+
+
+async def cpu_ms(call, repeats: int) -> float:
+    """Median process CPU time of ``call`` in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.process_time()
+        await call()
+        timings.append(time.process_time() - start)
+    return percentile(timings, 50) * 1000
+
+
+async def run(args) -> None:
+    import httpx
+    from benchmarks.bench_pagination import generate_catalog
+    from main import app
+    from services.product_cache import invalidate_product_cache
+    from utils.compression import STREAMS, compress, compression_stats
+
+    generate_catalog(args.products)
+    path = f"/products/?limit={args.limit}"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        body = (await client.get(path)).content
+        print(f"\nlisting of {args.limit} products: {len(body)} bytes")
+        print(f"\n{'coding':<10}{'bytes':>10}{'ratio':>9}{'compress ms':>14}")
+        for encoding in STREAMS:
+            started = time.process_time()
+            for _ in range(args.repeats):
+                data = compress(encoding, body)
+            elapsed = (time.process_time() - started) / args.repeats * 1000
+            print(f"{encoding:<10}{len(data):>10}{len(data) / len(body):>9.3f}"
+                  f"{elapsed:>14.3f}")
+
+        print(f"\n{'request':<24}{'CPU ms/request':>16}")
+        for encoding in ("identity", *STREAMS):
+            headers = {"Accept-Encoding": encoding}
+
+            async def request():
+                response = await client.get(path, headers=headers)
+                response.raise_for_status()
+
+            async def uncached():
+                invalidate_product_cache()
+                await request()
+
+            await request()
+            print(f"{encoding + ', stored':<24}{await cpu_ms(request, args.repeats):>16.3f}")
+            print(f"{encoding + ', uncached':<24}"
+                  f"{await cpu_ms(uncached, args.repeats):>16.3f}")
+
+    print("\n/internal/compression:")
+    for encoding, stats in compression_stats().items():
+        print(f"  {encoding}: {stats}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Messages rendered per second: per-call MIME building vs compiled templates.
+
+The legacy path is what send_reset_email used to do for every message: format
+the HTML and text bodies, build a MIMEMultipart tree and serialize it.
+
+    python -m benchmarks.bench_email_templates --messages 20000
+"""
+import argparse
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from benchmarks.common import configure_env
+
+configure_env()
+
+from services.email_templates import (  # noqa: E402
+    register_template, RESET_HTML, RESET_SUBJECT, RESET_TEXT,
+)
+
+SENDER = "noreply@example.com"
+LINK = "https://example.com/reset-password?token=" + "x" * 180
+
+
+def legacy_render(email: str, reset_link: str) -> bytes:
+    msg = MIMEMultipart('alternative')
+    msg['From'] = SENDER
+    msg['To'] = email
+    msg['Subject'] = RESET_SUBJECT
+    msg.attach(MIMEText(RESET_TEXT.format(reset_link=reset_link), 'plain'))
+    msg.attach(MIMEText(RESET_HTML.format(reset_link=reset_link), 'html'))
+    return msg.as_string().encode()
+
+
+def rate(fn, messages: int) -> float:
+    start = time.perf_counter()
+    fn()
+    return messages / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    template = register_template("bench_reset", RESET_SUBJECT, RESET_TEXT,
+                                 RESET_HTML, sender=SENDER)
+    recipients = [(f"user{i}@example.com", {"reset_link": LINK})
+                  for i in range(args.messages)]
+
+    results = {
+        "legacy MIMEMultipart": rate(
+            lambda: [legacy_render(to, ctx["reset_link"]) for to, ctx in recipients],
+            args.messages,
+        ),
+        "compiled render": rate(
+            lambda: [template.render(to, ctx) for to, ctx in recipients],
+            args.messages,
+        ),
+        "compiled render_batch": rate(
+            lambda: template.render_batch(recipients), args.messages
+        ),
+    }
+    baseline = results["legacy MIMEMultipart"]
+    print(f"\n{'renderer':<28}{'msgs/sec':>12}{'speedup':>10}")
+    for name, value in results.items():
+        print(f"{name:<28}{value:>12.0f}{value / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Facet counts from the incremental aggregates versus GROUP BY queries.
+
+Generates ``--rows`` products (1M by default), builds the facet aggregates,
+checks them against a full recompute and times both ways of answering the
+same filter combinations. Finally applies a batch of product changes and
+times bringing the aggregates up to date.
+
+    python -m benchmarks.bench_facets --rows 1000000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_env, percentile
+from benchmarks.bench_pagination import generate_catalog
+
+FILTERS = {
+    "none": {},
+    "category": {"category": "Books"},
+    "price range": {"min_price": 100, "max_price": 200},
+    "category + price": {"category": "Books", "min_price": 100, "max_price": 200},
+}
+
+
+async def timed(call, repeats: int) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def run(args) -> None:
+    from sqlalchemy import update
+    from config.database import AsyncSessionLocal
+    from models import Product
+    from services.catalog_events import publish_catalog_change
+    from services.product_facets import check_facets, facets_sql, product_facets
+
+    started = time.perf_counter()
+    generate_catalog(args.rows)
+    print(f"catalog ready: {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    counts = await product_facets.ready()
+    print(f"aggregates built: {counts.size} products in "
+          f"{time.perf_counter() - started:.1f}s")
+
+    async with AsyncSessionLocal() as db:
+        print(f"consistency check: {(await check_facets(db))['consistent']}")
+
+        print(f"\n{'filters':<20}{'aggregates p50 ms':>19}{'GROUP BY p50 ms':>17}")
+        for name, filters in FILTERS.items():
+            fast = await timed(lambda: asyncio.sleep(0, counts.facets(**filters)),
+                               args.repeats * 100)
+            slow = await timed(lambda: facets_sql(db, **filters), args.repeats)
+            print(f"{name:<20}{percentile(fast, 50) * 1000:>19.3f}"
+                  f"{percentile(slow, 50) * 1000:>17.2f}")
+
+        ids = list(range(1, args.rows + 1, max(1, args.rows // args.changes)))
+        await db.execute(update(Product).where(Product.id.in_(ids))
+                         .values(price=Product.price + 1, stock_quantity=0))
+        await db.commit()
+        publish_catalog_change(ids)
+        started = time.perf_counter()
+        await product_facets.ready()
+        print(f"\napplied {len(ids)} changes in "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms")
+        print(f"consistency check: {(await check_facets(db))['consistent']}")
+    await product_facets.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--changes", type=int, default=1000)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
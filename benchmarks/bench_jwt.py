@@ -0,0 +1,87 @@
+"""
+JWT sign and verify throughput per algorithm.
+
+Signs and verifies a typical access token with HS256 (the old shared
+secret), ES256 (the signing keys) and RS256 for reference, then compares
+ES256 verification through ``JWKSVerifier`` (parsed keys cached by kid)
+with parsing the public key from PEM or JWK on every call.
+
+    python -m benchmarks.bench_jwt --seconds 2
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import configure_env
+
+
+def rate(call, seconds: float) -> float:
+    """Calls per second of ``call`` over about ``seconds``"""
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        for _ in range(50):
+            call()
+        count += 50
+        now = time.perf_counter()
+        if now >= deadline:
+            return count / (now - started)
+
+
+def run(args) -> None:
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from jose import jwt
+    from jose.backends import RSAKey
+    from utils.jwt_keys import KeyRing
+    from utils.jwt_verifier import JWKSVerifier
+
+    claims = {"sub": "bench@example.com", "exp": int(time.time()) + 3600}
+    ring = KeyRing(args.keys_dir)
+    ring.load()
+    es256 = ring.active
+    rs256 = RSAKey(rsa.generate_private_key(65537, 2048), "RS256")
+    algorithms = {
+        "HS256": ("benchmark-secret", "benchmark-secret", {}),
+        "ES256": (es256.private_key, es256.public_key, {"kid": es256.kid}),
+        "RS256": (rs256, rs256.public_key(), {}),
+    }
+
+    print(f"\n{'algorithm':<28}{'sign/s':>12}{'verify/s':>12}{'token bytes':>13}")
+    tokens = {}
+    for name, (signing, verifying, headers) in algorithms.items():
+        token = tokens[name] = jwt.encode(claims, signing, algorithm=name,
+                                          headers=headers)
+        signs = rate(lambda: jwt.encode(claims, signing, algorithm=name,
+                                        headers=headers), args.seconds)
+        verifies = rate(lambda: jwt.decode(token, verifying, algorithms=[name]),
+                        args.seconds)
+        print(f"{name:<28}{signs:>12,.0f}{verifies:>12,.0f}{len(token):>13}")
+
+    token = tokens["ES256"]
+    verifier = JWKSVerifier(lambda: ({"keys": [es256.jwk]}, 300))
+    pem = es256.public_key.to_pem().decode()
+    print(f"\n{'ES256 verification':<28}{'verify/s':>12}")
+    for name, call in {
+        "JWKSVerifier (cached key)": lambda: verifier.verify(token),
+        "public key from JWK": lambda: jwt.decode(token, es256.jwk,
+                                                  algorithms=["ES256"]),
+        "public key from PEM": lambda: jwt.decode(token, pem, algorithms=["ES256"]),
+    }.items():
+        print(f"{name:<28}{rate(call, args.seconds):>12,.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--keys-dir", default=None,
+                        help="signing keys to use (default: a throwaway key)")
+    args = parser.parse_args()
+    configure_env()
+    if args.keys_dir is None:
+        args.keys_dir = tempfile.mkdtemp(prefix="bench_jwt_")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
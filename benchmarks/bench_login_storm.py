@@ -0,0 +1,94 @@
+"""
+Measure /products/ latency while a storm of logins keeps bcrypt busy.
+
+With hashing offloaded to the process pool the event loop stays free, so the
+product listing latency should barely move once the storm starts. Logins that
+overflow HASH_QUEUE_LIMIT are rejected with 503 and counted separately.
+
+    python -m benchmarks.bench_login_storm --storm 64 --requests 2000
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import configure_env, print_table, run_load
+
+
+def prepare_data() -> None:
+    from config.database import Base, SessionLocal, engine
+    from migrations.seed_data import seed_products
+    from models import User
+    from utils.security import hash_password
+
+    Base.metadata.create_all(bind=engine)
+    seed_products()
+    db = SessionLocal()
+    try:
+        if not db.query(User).filter(User.email == "storm@example.com").first():
+            db.add(User(username="storm", email="storm@example.com",
+                        password=hash_password("storm-password")))
+            db.commit()
+    finally:
+        db.close()
+
+
+async def login_storm(client, workers: int, stop: asyncio.Event) -> dict:
+    counts = {"ok": 0, "rejected": 0, "other": 0}
+    body = {"email": "storm@example.com", "password": "storm-password"}
+
+    async def worker():
+        while not stop.is_set():
+            response = await client.post("/auth/login", json=body)
+            if response.status_code == 200:
+                counts["ok"] += 1
+            elif response.status_code == 503:
+                counts["rejected"] += 1
+                await asyncio.sleep(0.05)  # back off like a real client
+            else:
+                counts["other"] += 1
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return counts
+
+
+async def run(args) -> None:
+    import httpx
+    from main import app
+    from utils import start_hashing_pool, shutdown_hashing_pool
+
+    prepare_data()
+    start_hashing_pool()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        results = {"idle GET /products/": await run_load(
+            client, "GET", "/products/", args.requests, args.concurrency
+        )}
+
+        stop = asyncio.Event()
+        storm = asyncio.create_task(login_storm(client, args.storm, stop))
+        await asyncio.sleep(0.5)
+        results["storm GET /products/"] = await run_load(
+            client, "GET", "/products/", args.requests, args.concurrency
+        )
+        stop.set()
+        counts = await storm
+    shutdown_hashing_pool()
+
+    print_table(f"login storm with {args.storm} concurrent logins", results)
+    print(f"logins: {counts['ok']} ok, {counts['rejected']} rejected (503), "
+          f"{counts['other']} other")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--storm", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
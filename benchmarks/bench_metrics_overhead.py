@@ -0,0 +1,89 @@
+"""
+Per-request cost of MetricsMiddleware.
+
+Calls a minimal FastAPI app directly through ASGI (no HTTP client or socket,
+so the middleware is a measurable share of the work) with and without the
+middleware, in alternating rounds to cancel out drift.
+
+    python -m benchmarks.bench_metrics_overhead --requests 20000 --rounds 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import FastAPI
+
+from benchmarks.common import configure_env
+
+configure_env()
+
+from middleware.metrics import MetricsMiddleware  # noqa: E402
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def call(app, path: str) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def per_request(app, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        await call(app, f"/items/{i % 100}")
+    return (time.perf_counter() - started) / requests
+
+
+async def run(args) -> None:
+    plain, instrumented = build_app(False), build_app(True)
+    # Warm up both stacks (middleware build, route compilation)
+    await per_request(plain, 200)
+    await per_request(instrumented, 200)
+
+    without, with_ = [], []
+    for _ in range(args.rounds):
+        without.append(await per_request(plain, args.requests))
+        with_.append(await per_request(instrumented, args.requests))
+
+    base = statistics.median(without) * 1e6
+    instr = statistics.median(with_) * 1e6
+    print(f"\n{'stack':<24}{'us/request':>12}")
+    print(f"{'without metrics':<24}{base:>12.2f}")
+    print(f"{'with metrics':<24}{instr:>12.2f}")
+    print(f"\noverhead: {instr - base:.2f} us/request "
+          f"({(instr - base) / base * 100:.1f}%)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Keyset pagination over a large generated catalog.
+
+Generates ``--rows`` products (1M by default), then times the first page and
+pages deep into the catalog for every sort order, with and without filters.
+Page latency should not depend on how far into the catalog the cursor is.
+
+    python -m benchmarks.bench_pagination --rows 1000000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import configure_env, percentile
+
+CATEGORIES = ["Electronics", "Clothing", "Home & Garden", "Sports & Fitness",
+              "Kitchen", "Office", "Books", "Toys"]
+
+
+def generate_catalog(rows: int, batch: int = 20000) -> None:
+    """Insert ``rows`` synthetic products with executemany batches"""
+    from sqlalchemy import func, insert, select
+    from config.database import Base, engine
+    from models import Product
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count(Product.id))).scalar()
+        rng = random.Random(42)
+        for start in range(existing, rows, batch):
+            conn.execute(insert(Product), [
+                {
+                    "name": f"Product {i}",
+                    "description": f"Generated product number {i}",
+                    "price": round(rng.uniform(1, 1000), 2),
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "stock_quantity": rng.randint(0, 500),
+                    "is_active": True,
+                }
+                for i in range(start, min(start + batch, rows))
+            ])
+
+
+async def walk(client, query: str, pages: int) -> list[float]:
+    """Follow next cursors for ``pages`` pages, returning per-page latency"""
+    timings = []
+    url = f"/products/?{query}"
+    for _ in range(pages):
+        start = time.perf_counter()
+        response = await client.get(url)
+        timings.append(time.perf_counter() - start)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        url = f"/products/?{query}&cursor={cursor}"
+    return timings
+
+
+async def run(args) -> None:
+    import httpx
+    from main import app
+
+    started = time.perf_counter()
+    generate_catalog(args.rows)
+    print(f"catalog ready: {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        print(f"\n{'query':<48}{'first ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for query in (
+            f"limit={args.limit}",
+            f"limit={args.limit}&sort=price",
+            f"limit={args.limit}&sort=price&order=desc",
+            f"limit={args.limit}&sort=created_at",
+            f"limit={args.limit}&category=Books",
+            f"limit={args.limit}&category=Books&sort=price",
+            f"limit={args.limit}&min_price=100&max_price=200",
+        ):
+            timings = await walk(client, query, args.pages)
+            print(f"{query:<48}{timings[0] * 1000:>10.2f}"
+                  f"{percentile(timings, 50) * 1000:>10.2f}"
+                  f"{percentile(timings, 99) * 1000:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Product read cache: miss path vs hit path vs conditional (304) requests.
+
+The miss path invalidates the cache before every request, so it pays for the
+query and the ProductResponse validation each time. SQL statements are counted
+with an engine event to show that hits never reach the database.
+
+    python -m benchmarks.bench_product_cache --products 200 --requests 2000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_env, percentile
+
+
+def prepare_data(products: int) -> None:
+    from benchmarks.bench_pagination import generate_catalog
+    generate_catalog(products)
+
+
+async def measure(client, path: str, requests: int, before=None,
+                  headers=None) -> list[float]:
+    timings = []
+    for _ in range(requests):
+        if before:
+            before()
+        start = time.perf_counter()
+        await client.get(path, headers=headers)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def run(args) -> None:
+    import httpx
+    from sqlalchemy import event
+    from config.database import async_engine
+    from main import app
+    from services.product_cache import invalidate_product_cache, product_cache
+
+    prepare_data(args.products)
+    statements = 0
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    path = f"/products/?limit={args.limit}"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        etag = (await client.get(path)).headers["etag"]
+        print(f"\n{'scenario':<24}{'p50 ms':>10}{'p99 ms':>10}{'SQL/request':>14}")
+        for name, kwargs in (
+            ("miss", {"before": invalidate_product_cache}),
+            ("hit", {}),
+            ("conditional (304)", {"headers": {"If-None-Match": etag}}),
+        ):
+            if name != "miss":
+                await client.get(path)  # repopulate after the miss run
+            statements = 0
+            timings = await measure(client, path, args.requests, **kwargs)
+            print(f"{name:<24}{percentile(timings, 50) * 1000:>10.3f}"
+                  f"{percentile(timings, 99) * 1000:>10.3f}"
+                  f"{statements / args.requests:>14.2f}")
+    print(f"\ncache stats: {product_cache.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
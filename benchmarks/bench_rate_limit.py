@@ -0,0 +1,90 @@
+"""
+Cost of a rate limit decision, measured by calling RateLimitMiddleware
+directly over ASGI in front of a no-op app.
+
+"allowed" goes through the per-IP and per-account checks and replays the
+body; "rejected (ip)" is refused at the first check. Pass --redis-url to
+measure the Redis store instead of the in-memory one.
+
+    python -m benchmarks.bench_rate_limit --requests 50000
+    python -m benchmarks.bench_rate_limit --redis-url redis://localhost:6379/0
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import configure_env
+
+configure_env()
+
+from middleware.rate_limit import RateLimitMiddleware, RoutePolicy  # noqa: E402
+from utils.rate_limit import Limit, MemoryStore, RedisStore  # noqa: E402
+
+PATH = "/auth/login"
+
+
+async def noop_app(scope, receive, send):
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def call(app, client_ip: str, body: bytes) -> int:
+    status = 0
+    scope = {"type": "http", "method": "POST", "path": PATH, "headers": [],
+             "client": (client_ip, 1234)}
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(app, requests: int, ip_for, body_for) -> tuple[float, dict]:
+    statuses: dict[int, int] = {}
+    started = time.perf_counter()
+    for i in range(requests):
+        status = await call(app, ip_for(i), body_for(i))
+        statuses[status] = statuses.get(status, 0) + 1
+    return (time.perf_counter() - started) / requests * 1e6, statuses
+
+
+async def run(args) -> None:
+    store = RedisStore(args.redis_url) if args.redis_url else MemoryStore()
+    bodies = [json.dumps({"email": f"user{i}@example.com", "password": "x"})
+              .encode() for i in range(args.requests)]
+    app = RateLimitMiddleware(noop_app, store, {
+        ("POST", PATH): RoutePolicy(Limit(10, 3600), Limit(10, 3600)),
+    })
+    scenarios = {
+        # A new client and account every request: both checks pass
+        "allowed": (lambda i: f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+                    lambda i: bodies[i]),
+        # One client over its limit: refused before the body is read
+        "rejected (ip)": (lambda i: "192.0.2.1", lambda i: bodies[0]),
+    }
+    print(f"\nstore: {type(store).__name__}")
+    print(f"{'scenario':<18}{'us/request':>12}  statuses")
+    for name, (ip_for, body_for) in scenarios.items():
+        per_request, statuses = await measure(app, args.requests, ip_for, body_for)
+        print(f"{name:<18}{per_request:>12.2f}  {statuses}")
+    await store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+CPU time per login before and after password hashes are upgraded.
+
+Creates ``--users`` users whose passwords were hashed with
+``--old-rounds`` bcrypt rounds and runs the app with ``BCRYPT_ROUNDS`` set
+to ``--rounds``. Every user logs in twice: the first login verifies the old
+hash and upgrades it after the response is sent, the second verifies the
+upgraded hash. CPU time covers the app and its hashing workers; latency is
+the app time until the response starts (the ``Server-Timing`` header), so
+a background upgrade that delayed the response would show up there.
+
+    python -m benchmarks.bench_rehash --users 50 --old-rounds 10 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import resource
+
+from benchmarks.common import configure_env, percentile
+
+PASSWORD = "rehash-password"
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process and of its finished children"""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def prepare_users(count: int, old_rounds: int) -> list[str]:
+    from passlib.hash import bcrypt
+    from sqlalchemy import insert
+    from config.database import Base, engine
+    from models import User
+
+    Base.metadata.create_all(bind=engine)
+    # One hash for everyone: only its cost matters here
+    password = bcrypt.using(rounds=old_rounds).hash(PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"username": f"rehash{i}", "email": f"rehash{i}@example.com",
+             "password": password}
+            for i in range(count)
+        ])
+    return [f"rehash{i}@example.com" for i in range(count)]
+
+
+def hash_rounds() -> dict[int, int]:
+    """Number of users per bcrypt cost"""
+    from sqlalchemy import select
+    from config.database import engine
+    from models import User
+
+    with engine.connect() as conn:
+        hashes = conn.execute(select(User.password)).scalars()
+        rounds: dict[int, int] = {}
+        for hashed in hashes:
+            cost = int(hashed.split("$")[2])
+            rounds[cost] = rounds.get(cost, 0) + 1
+    return rounds
+
+
+async def login_all(client, emails: list[str], concurrency: int) -> dict:
+    """Log every user in once; CPU per login and response latency"""
+    from utils import shutdown_hashing_pool, start_hashing_pool
+
+    start_hashing_pool()
+    latencies: list[float] = []
+    remaining = iter(emails)
+
+    async def worker():
+        for email in remaining:
+            response = await client.post("/auth/login", json={
+                "email": email, "password": PASSWORD})
+            response.raise_for_status()
+            timing = response.headers["server-timing"]
+            latencies.append(float(timing.rsplit("app;dur=", 1)[1]))
+
+    started = cpu_seconds()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    # Reap the workers so their CPU time is accounted
+    shutdown_hashing_pool(wait=True)
+    return {
+        "cpu_ms": (cpu_seconds() - started) / len(emails) * 1000,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+    }
+
+
+async def run(args) -> None:
+    import httpx
+    from main import app
+    from utils.hashing import REHASHES
+
+    emails = prepare_users(args.users, args.old_rounds)
+    print(f"\nhashes before: {hash_rounds()} (rounds: users)")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 timeout=600) as client:
+        rows = {
+            f"first login ({args.old_rounds} rounds)":
+                await login_all(client, emails, args.concurrency),
+            f"next login ({args.rounds} rounds)":
+                await login_all(client, emails, args.concurrency),
+        }
+    print(f"hashes after:  {hash_rounds()}")
+    print(f"upgrades: {REHASHES.value('upgraded'):g}, "
+          f"skipped: {REHASHES.value('skipped'):g}")
+
+    print(f"\n{'login':<28}{'CPU ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, stats in rows.items():
+        print(f"{name:<28}{stats['cpu_ms']:>10.1f}{stats['p50_ms']:>10.1f}"
+              f"{stats['p95_ms']:>10.1f}")
+    print("\nThe first login's CPU includes the background upgrade; its "
+          "latency should match a plain verify at the old cost.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--old-rounds", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ.setdefault("HASH_WORKERS", "1")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
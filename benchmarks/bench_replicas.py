@@ -0,0 +1,175 @@
+"""
+Read replica routing with two local SQLite replicas.
+
+Copies a generated catalog from the primary into two read-only replica
+files, then
+
+- spreads ``--requests`` product reads over the replicas and reports how
+  many each one served, and the throughput next to reading the primary only,
+- updates a product and reads it back: the writer's own reads stay on the
+  primary for ``REPLICA_STICKY_SECONDS`` and see the change, anonymous reads
+  go to the (never updated) replicas and do not,
+- deletes one replica file: reads fail over to the other replica, and to
+  the primary once both are gone, until the files are restored.
+
+    python -m benchmarks.bench_replicas --products 2000 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.common import configure_env, summarize
+
+PASSWORD = "replica-password"
+
+
+def prepare_replicas(database_url: str, directory: str) -> list[str]:
+    """Copy the primary into two replica files; returns their paths"""
+    primary = sqlite3.connect(database_url.removeprefix("sqlite:///"))
+    paths = []
+    for i in range(2):
+        path = os.path.join(directory, f"replica{i}.db")
+        with sqlite3.connect(path) as replica:
+            primary.backup(replica)
+        paths.append(path)
+    primary.close()
+    return paths
+
+
+def counts() -> dict[str, int]:
+    """Reads served so far by the primary and each replica"""
+    from config import replicas
+    stats = replicas.stats()
+    return {"primary": stats["primary_reads"],
+            **{name: r["reads"] for name, r in stats["replicas"].items()}}
+
+
+def served_by(before: dict[str, int]) -> str:
+    after = counts()
+    return ", ".join(f"{name} {after[name] - before[name]}" for name in after
+                     if after[name] != before[name]) or "cache"
+
+
+async def read_all(client, products: int, requests: int, concurrency: int) -> dict:
+    """Read distinct products, so every request reaches a database"""
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in remaining:
+            started = time.perf_counter()
+            response = await client.get(f"/products/{i % products + 1}")
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+async def login(client) -> dict:
+    await client.post("/auth/signup", json={
+        "username": "replica", "email": "replica@example.com",
+        "password": PASSWORD, "confirm_password": PASSWORD})
+    response = await client.post("/auth/login", json={
+        "email": "replica@example.com", "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run(args, replica_paths: list[str]) -> None:
+    import httpx
+    from config import replicas
+    from main import app
+    from services.product_cache import invalidate_product_cache
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+            transport=transport, base_url="http://bench") as client:
+        print(f"\nreplicas: {', '.join(r.url for r in replicas.replicas)} "
+              f"({replicas.selection})")
+
+        before = counts()
+        rows = {"replicas": await read_all(client, args.products, args.requests,
+                                           args.concurrency)}
+        print(f"\n{args.requests} reads served by: {served_by(before)}")
+        invalidate_product_cache()
+        for replica in replicas.replicas:
+            replica.healthy = False
+        rows["primary only"] = await read_all(client, args.products, args.requests,
+                                              args.concurrency)
+        await replicas.check()
+        print(f"\n{'reads':<16}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, stats in rows.items():
+            print(f"{name:<16}{stats['rps']:>10}{stats['p50_ms']:>10}"
+                  f"{stats['p99_ms']:>10}{stats['errors']:>8}")
+
+        print("\nread-your-writes")
+        headers = await login(client)
+        response = await client.patch("/products/1", headers=headers,
+                                      json={"name": "Renamed on the primary"})
+        response.raise_for_status()
+        for who, request_headers in (("anonymous", None), ("writer", headers)):
+            before = counts()
+            name = (await client.get("/products/1", headers=request_headers)).json()["name"]
+            print(f"  {who:<10} reads {name!r:<28} from {served_by(before)}")
+        await asyncio.sleep(float(os.environ["REPLICA_STICKY_SECONDS"]))
+        invalidate_product_cache()
+        before = counts()
+        name = (await client.get("/products/1", headers=headers)).json()["name"]
+        print(f"  {'writer':<10} reads {name!r:<28} from {served_by(before)} "
+              f"after the sticky window")
+
+        print("\nfailover")
+        backup = replica_paths[0] + ".bak"
+        for removed, path in enumerate(replica_paths, 1):
+            shutil.copy(path, backup + str(removed))
+            os.remove(path)
+            # Pooled connections keep the deleted file open; drop them
+            await replicas.replicas[removed - 1].engine.dispose()
+            invalidate_product_cache()
+            before = counts()
+            stats = await read_all(client, args.products, 200, args.concurrency)
+            print(f"  {removed} replica(s) gone: 200 reads, {stats['errors']} errors, "
+                  f"served by {served_by(before)}")
+        for removed, path in enumerate(replica_paths, 1):
+            os.replace(backup + str(removed), path)
+        await replicas.check()
+        invalidate_product_cache()
+        before = counts()
+        await read_all(client, args.products, 200, args.concurrency)
+        print(f"  restored: 200 reads served by {served_by(before)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--selection", default="round_robin",
+                        choices=("round_robin", "least_connections"))
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp(prefix="bench_replicas_")
+    database_url = configure_env(f"sqlite:///{os.path.join(directory, 'primary.db')}")
+    # Settings are read on first import, before the replica files exist
+    os.environ["DATABASE_REPLICA_URLS"] = ",".join(
+        f"sqlite:///file:{os.path.join(directory, f'replica{i}.db')}?mode=ro&uri=true"
+        for i in range(2))
+    os.environ["REPLICA_SELECTION"] = args.selection
+    os.environ.setdefault("REPLICA_STICKY_SECONDS", "1")
+    os.environ["ADMIN_EMAILS"] = "replica@example.com"
+
+    from benchmarks.bench_pagination import generate_catalog
+    generate_catalog(args.products)
+    paths = prepare_replicas(database_url, directory)
+    asyncio.run(run(args, paths))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Stock reservation under contention: hundreds of concurrent buyers on one
+hot product.
+
+``--buyers`` concurrent clients keep calling ``POST /reservations`` for
+``--quantity`` units of a product that starts with ``--stock`` units, until
+``--requests`` reservations have been attempted. Afterwards the stock is
+checked against what was handed out: the remaining stock must be the
+initial stock minus the reserved units and never negative.
+
+For comparison the same load runs against a read-modify-write version
+(SELECT the stock, check it in Python, UPDATE it), which loses updates
+and oversells as soon as buyers interleave.
+
+    python -m benchmarks.bench_reservations --buyers 500 --stock 1000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_env, print_table, summarize
+
+
+def create_buyer() -> int:
+    from sqlalchemy import insert
+    from config.database import Base, engine
+    from models import User
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        return conn.execute(
+            insert(User).values(username="buyer", email="buyer@example.com",
+                                password="-").returning(User.id)
+        ).scalar_one()
+
+
+def create_hot_product(stock: int) -> int:
+    from sqlalchemy import insert
+    from config.database import engine
+    from models import Product
+
+    with engine.begin() as conn:
+        return conn.execute(
+            insert(Product).values(name="Hot product", price=9.99, category="Hot",
+                                   stock_quantity=stock).returning(Product.id)
+        ).scalar_one()
+
+
+async def naive_reserve(product_id: int, quantity: int) -> int:
+    """Read-modify-write reservation, the way not to do it"""
+    from sqlalchemy import select, update
+    from config.database import AsyncSessionLocal
+    from models import Product
+
+    async with AsyncSessionLocal() as db:
+        stock = (await db.execute(
+            select(Product.stock_quantity).where(Product.id == product_id)
+        )).scalar_one()
+        if stock < quantity:
+            return 409
+        await db.execute(update(Product).where(Product.id == product_id)
+                         .values(stock_quantity=stock - quantity))
+        await db.commit()
+    return 201
+
+
+async def contend(reserve, args) -> tuple[dict, int]:
+    """Run ``--requests`` reservations from ``--buyers`` concurrent buyers"""
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    remaining = iter(range(args.requests))
+
+    async def buyer():
+        for _ in remaining:
+            start = time.perf_counter()
+            status = await reserve()
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(buyer() for _ in range(args.buyers)))
+    stats = summarize(latencies, time.perf_counter() - started,
+                      sum(n for status, n in statuses.items() if status >= 500))
+    return stats, statuses
+
+
+async def stock_left(product_id: int) -> int:
+    from sqlalchemy import select
+    from config.database import AsyncSessionLocal
+    from models import Product
+
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(Product.stock_quantity).where(Product.id == product_id)
+        )).scalar_one()
+
+
+async def reserved_units(product_id: int) -> int:
+    from sqlalchemy import func, select
+    from config.database import AsyncSessionLocal
+    from models import ReservationItem
+
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(func.coalesce(func.sum(ReservationItem.quantity), 0))
+            .where(ReservationItem.product_id == product_id)
+        )).scalar_one()
+
+
+def report(name: str, args, statuses: dict[int, int], handed_out: int,
+           left: int) -> bool:
+    consumed = args.stock - left
+    ok = left >= 0 and consumed == handed_out and handed_out <= args.stock
+    print(f"  {name}: statuses {dict(sorted(statuses.items()))}, "
+          f"{handed_out} units handed out, stock {args.stock} -> {left}"
+          f"{'' if ok else '  OVERSOLD'}")
+    return ok
+
+
+async def run(args) -> bool:
+    import httpx
+    from main import app
+    from models import User
+    from utils import get_current_user
+
+    user_id = create_buyer()
+    product_id = create_hot_product(args.stock)
+    buyer = User(id=user_id, username="buyer", email="buyer@example.com")
+    # Measure the reservations, not authentication
+    app.dependency_overrides[get_current_user] = lambda: buyer
+    body = {"items": [{"product_id": product_id, "quantity": args.quantity}]}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 timeout=600) as client:
+        async def reserve() -> int:
+            return (await client.post("/reservations/", json=body)).status_code
+
+        atomic, statuses = await contend(reserve, args)
+        ok = report("conditional UPDATE", args, statuses,
+                    await reserved_units(product_id), await stock_left(product_id))
+
+    naive_product = create_hot_product(args.stock)
+    naive, naive_statuses = await contend(
+        lambda: naive_reserve(naive_product, args.quantity), args
+    )
+    report("read-modify-write", args, naive_statuses,
+           naive_statuses.get(201, 0) * args.quantity,
+           await stock_left(naive_product))
+
+    print_table(f"{args.buyers} buyers, {args.requests} attempts, "
+                f"stock {args.stock}", {
+                    "POST /reservations": atomic,
+                    "read-modify-write": naive,
+                })
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--buyers", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--stock", type=int, default=1000)
+    parser.add_argument("--quantity", type=int, default=1)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    if not asyncio.run(run(args)):
+        raise SystemExit("Stock was oversold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Product search over a large generated catalog.
+
+Generates ``--rows`` products (1M by default) with names built from brands,
+adjectives, colours and nouns and Zipf-distributed description words, builds
+the in-process search index and times random one- and two-word queries and
+prefix queries through ``search_products``. Run against SQLite to measure
+the inverted index; the median should stay under 10 ms.
+
+    python -m benchmarks.bench_search --rows 1000000 --queries 2000
+"""
+import argparse
+import asyncio
+import random
+import resource
+import time
+
+from benchmarks.common import configure_env, percentile
+
+BRANDS = ["Acme", "Nordic", "Vertex", "Lumen", "Orbit", "Zenith", "Pioneer",
+          "Summit", "Harbor", "Apex", "Cobalt", "Maple", "Quartz", "Falcon"]
+ADJECTIVES = ["wireless", "portable", "compact", "premium", "classic", "smart",
+              "ergonomic", "waterproof", "foldable", "rechargeable", "organic",
+              "vintage", "heavy", "lightweight", "digital", "stainless"]
+COLOURS = ["black", "white", "red", "blue", "green", "silver", "grey", "navy",
+           "olive", "beige"]
+NOUNS = ["headphones", "speaker", "charger", "lamp", "backpack", "kettle",
+         "blender", "keyboard", "mouse", "monitor", "jacket", "sneakers",
+         "tent", "bottle", "notebook", "camera", "tripod", "mug", "chair",
+         "desk", "watch", "router", "drill", "pan", "pillow", "puzzle"]
+CATEGORIES = ["Electronics", "Clothing", "Home & Garden", "Sports & Fitness",
+              "Kitchen", "Office", "Books", "Toys"]
+
+
+def description_vocabulary(size: int, rng: random.Random) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 9))))
+    return sorted(words)
+
+
+def generate_catalog(rows: int, batch: int = 20000) -> list[str]:
+    """Insert ``rows`` products; returns the description vocabulary by rank"""
+    from sqlalchemy import func, insert, select
+    from config.database import Base, engine
+    from models import Product
+
+    rng = random.Random(42)
+    vocabulary = description_vocabulary(5000, rng)
+    # Zipf: the word of rank r is drawn with weight 1/r
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count(Product.id))).scalar()
+        for start in range(existing, rows, batch):
+            count = min(start + batch, rows) - start
+            words = rng.choices(vocabulary, weights, k=count * 12)
+            conn.execute(insert(Product), [
+                {
+                    "name": f"{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} "
+                            f"{rng.choice(COLOURS)} {rng.choice(NOUNS)}",
+                    "description": " ".join(words[i * 12:(i + 1) * 12]),
+                    "price": round(rng.uniform(1, 1000), 2),
+                    "category": rng.choice(CATEGORIES),
+                    "stock_quantity": rng.randint(0, 500),
+                    "is_active": True,
+                }
+                for i in range(count)
+            ])
+    return vocabulary
+
+
+def random_queries(count: int, vocabulary: list[str],
+                   rng: random.Random) -> dict[str, list[str]]:
+    # Query words are skewed too: a few searches are very popular
+    pool = [w.lower() for w in BRANDS + ADJECTIVES + COLOURS + NOUNS]
+    pool += vocabulary[:500]
+    rng.shuffle(pool)
+    weights = [1 / rank for rank in range(1, len(pool) + 1)]
+
+    def word():
+        return rng.choices(pool, weights)[0]
+
+    return {
+        "one word": [word() for _ in range(count)],
+        "two words": [f"{word()} {word()}" for _ in range(count)],
+        "prefix": [word()[:rng.randint(3, 4)] for _ in range(count)],
+        "word + prefix": [f"{word()} {word()[:3]}" for _ in range(count)],
+    }
+
+
+async def run(args) -> None:
+    from config.database import AsyncSessionLocal
+    from services.product_search import product_search, search_products
+
+    started = time.perf_counter()
+    vocabulary = generate_catalog(args.rows)
+    print(f"catalog ready: {args.rows} rows in {time.perf_counter() - started:.1f}s")
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    await product_search.start()
+    index = await product_search.ready()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"index built: {index.size} products in "
+          f"{time.perf_counter() - started:.1f}s, "
+          f"~{(rss_after - rss_before) / 1024:.0f} MB")
+
+    rng = random.Random(7)
+    print(f"\n{'queries':<16}{'index p50':>11}{'p95':>9}{'p99':>9}"
+          f"{'request p50':>13}{'p95':>9}{'p99':>9}{'avg hits':>10}")
+    async with AsyncSessionLocal() as db:
+        for name, queries in random_queries(args.queries, vocabulary, rng).items():
+            index_times, request_times, hits = [], [], 0
+            for q in queries:
+                start = time.perf_counter()
+                total, _ = index.search(q, args.limit)
+                index_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                await search_products(db, q, args.limit)
+                request_times.append(time.perf_counter() - start)
+                hits += total
+            print(f"{name:<16}"
+                  + "".join(f"{percentile(index_times, p) * 1000:>{w}.2f}"
+                            for p, w in ((50, 11), (95, 9), (99, 9)))
+                  + "".join(f"{percentile(request_times, p) * 1000:>{w}.2f}"
+                            for p, w in ((50, 13), (95, 9), (99, 9)))
+                  + f"{hits // len(queries):>10}")
+    print("\nmilliseconds; 'index' is ranking alone, 'request' adds loading "
+          "the page of products")
+    await product_search.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
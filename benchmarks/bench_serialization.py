@@ -0,0 +1,94 @@
+"""
+CPU cost of building product listing responses.
+
+Compares the previous pipeline (load ORM objects, validate them into
+ProductResponse, dump with pydantic) with the current one (select the
+response columns and encode the row tuples with orjson) at 100, 10k and
+100k rows per response, checks that both produce the same bytes, and times
+``GET /products/`` end to end with the response cache cleared.
+
+    python -m benchmarks.bench_serialization --sizes 100 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import List
+
+from benchmarks.common import configure_env, percentile
+from benchmarks.bench_pagination import generate_catalog
+
+
+async def cpu_ms(call, repeats: int) -> tuple[float, object]:
+    """Median process CPU time of ``call`` in milliseconds, and its result"""
+    timings = []
+    for _ in range(repeats):
+        start = time.process_time()
+        result = await call()
+        timings.append(time.process_time() - start)
+    return percentile(timings, 50) * 1000, result
+
+
+async def run(args) -> None:
+    import httpx
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from config.database import AsyncSessionLocal
+    from main import app
+    from models import Product
+    from schemas.product import ProductResponse
+    from services.product_cache import product_cache
+    from services.product_service import PRODUCT_COLUMNS, encode_products
+
+    generate_catalog(max(args.sizes))
+    adapter = TypeAdapter(List[ProductResponse])
+
+    async with AsyncSessionLocal() as db:
+        async def orm_pydantic(n):
+            result = await db.execute(select(Product).order_by(Product.id).limit(n))
+            products = result.scalars().all()
+            body = adapter.dump_json(adapter.validate_python(products, from_attributes=True))
+            db.expunge_all()
+            return body
+
+        async def rows_orjson(n):
+            result = await db.execute(
+                select(*PRODUCT_COLUMNS).order_by(Product.id).limit(n)
+            )
+            return encode_products(result.all())
+
+        print(f"\n{'rows':>8}{'ORM + pydantic ms':>20}{'rows + orjson ms':>19}"
+              f"{'speedup':>10}  same JSON")
+        for n in args.sizes:
+            repeats = max(3, args.repeats * 100 // n)
+            before, old = await cpu_ms(lambda: orm_pydantic(n), repeats)
+            after, new = await cpu_ms(lambda: rows_orjson(n), repeats)
+            print(f"{n:>8}{before:>20.2f}{after:>19.2f}{before / after:>9.1f}x"
+                  f"  {old == new}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def request():
+            product_cache.invalidate()
+            response = await client.get("/products/?limit=200")
+            response.raise_for_status()
+
+        per_response, _ = await cpu_ms(request, args.repeats * 10)
+        print(f"\nGET /products/?limit=200, uncached: {per_response:.2f} ms CPU "
+              f"per response")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    configure_env(args.database_url)
+    # Selecting 100k rows is slow by design; keep the log quiet
+    os.environ.setdefault("SQL_SLOW_QUERY_MS", "60000")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Cold start: import time of ``main`` and time to first response.
+
+Each measurement runs in a fresh interpreter. Time to first response starts
+uvicorn in a subprocess and polls ``GET /`` until it answers; it is measured
+against a new database (schema is created and seeded) and against one whose
+schema fingerprint already matches, which is what most worker boots see.
+Exits with status 1 when a median exceeds its budget.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --import-budget-ms 1500 --boot-budget-ms 3000
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.common import configure_env, free_port
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure_import(env: dict) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], env=env, check=True,
+        capture_output=True, text=True
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def measure_first_response(env: dict, timeout: float = 30) -> float:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"No response from {url} after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=2000)
+    parser.add_argument("--boot-budget-ms", type=float, default=4000)
+    args = parser.parse_args()
+
+    configure_env(args.database_url)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.getcwd()
+
+    def fresh_database() -> dict:
+        if args.database_url:
+            return env
+        path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "startup.db")
+        return {**env, "DATABASE_URL": f"sqlite:///{path}"}
+
+    results = {
+        "import main": [measure_import(env) for _ in range(args.runs)],
+        "first response (new db)": [
+            measure_first_response(fresh_database()) for _ in range(args.runs)
+        ],
+    }
+    # The database from the import runs has not been migrated yet
+    warm = fresh_database()
+    measure_first_response(warm)
+    results["first response (warm db)"] = [
+        measure_first_response(warm) for _ in range(args.runs)
+    ]
+
+    budgets = {
+        "import main": args.import_budget_ms,
+        "first response (new db)": args.boot_budget_ms,
+        "first response (warm db)": args.boot_budget_ms,
+    }
+    failed = False
+    print(f"\n{'phase':<28}{'median ms':>12}{'max ms':>10}{'budget ms':>12}")
+    for name, timings in results.items():
+        median = statistics.median(timings) * 1000
+        over = median > budgets[name]
+        failed |= over
+        print(f"{name:<28}{median:>12.0f}{max(timings) * 1000:>10.0f}"
+              f"{budgets[name]:>12.0f}{'  OVER BUDGET' if over else ''}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
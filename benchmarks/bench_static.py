@@ -0,0 +1,75 @@
+"""
+Font serving throughput: the ``FontFiles`` mount versus Starlette's stock
+``StaticFiles`` on the same directory.
+
+Both are mounted on bare Starlette apps (no middleware) and driven in
+process, so the numbers compare the per-request work of the two mounts:
+full downloads, an svg requested with ``Accept-Encoding: gzip`` (stock
+StaticFiles sends it uncompressed; the client inflating the gzip body counts
+against FontFiles there), conditional requests and ranges.
+
+    python -m benchmarks.bench_static --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import configure_env, print_table, run_load
+
+SCENARIOS = {
+    "woff2": ("fa-solid-900.woff2", {}),
+    "svg, gzip accepted": ("fa-solid-900.svg", {"Accept-Encoding": "gzip"}),
+    "ttf, range 64 KiB": ("fa-solid-900.ttf", {"Range": "bytes=0-65535"}),
+    "woff2, If-None-Match": ("fa-solid-900.woff2", None),
+}
+
+
+async def run(args) -> None:
+    import httpx
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from starlette.staticfiles import StaticFiles
+    from utils.static_files import FontFiles
+
+    fonts = FontFiles(directory=args.directory)
+    fonts.build()
+    apps = {
+        "StaticFiles": Starlette(routes=[
+            Mount("/fonts", StaticFiles(directory=args.directory))
+        ]),
+        "FontFiles": Starlette(routes=[Mount("/fonts", fonts)]),
+    }
+    for name, app in apps.items():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport,
+                                     base_url="http://bench") as client:
+            rows = {}
+            sizes = {}
+            for scenario, (path, headers) in SCENARIOS.items():
+                url = f"/fonts/{path}"
+                if headers is None:
+                    etag = (await client.get(url)).headers["etag"]
+                    headers = {"If-None-Match": etag}
+                response = await client.get(url, headers=headers)
+                sizes[scenario] = (response.status_code,
+                                   response.num_bytes_downloaded)
+                rows[scenario] = await run_load(
+                    client, "GET", url, args.requests, args.concurrency,
+                    headers=headers,
+                )
+            print_table(name, rows)
+            for scenario, (status, size) in sizes.items():
+                print(f"  {scenario:<30}{status:>5}{size:>10} bytes on the wire")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--directory", default="public/fonts")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    configure_env()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
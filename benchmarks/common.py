@@ -0,0 +1,85 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run in-process against a throwaway SQLite database unless
+DATABASE_URL is already set, so ``configure_env()`` must be called before
+any application module is imported.
+"""
+import asyncio
+import os
+import socket
+import tempfile
+import time
+
+
+def configure_env(database_url: str | None = None) -> str:
+    """Point the application at a benchmark database and return its URL"""
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+    elif not os.environ.get("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    # Load generators hammer the auth endpoints from a single client
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    return os.environ["DATABASE_URL"]
+
+
+def free_port() -> int:
+    """A TCP port on localhost that is free right now"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    """Throughput and latency percentiles (milliseconds)"""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run_load(client, method: str, path: str, total: int,
+                   concurrency: int, **kwargs) -> dict:
+    """Issue ``total`` requests with at most ``concurrency`` in flight"""
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def print_table(title: str, rows: dict[str, dict]) -> None:
+    """Print one line per scenario"""
+    print(f"\n{title}")
+    print(f"{'scenario':<32}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'errors':>8}")
+    for name, stats in rows.items():
+        print(f"{name:<32}{stats['rps']:>10}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}")
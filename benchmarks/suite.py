@@ -0,0 +1,328 @@
+"""
+Load test of every auth and product route, with results saved as JSON and
+compared against a baseline.
+
+Generates ``--users`` users and ``--products`` products, starts a mock SMTP
+server (aiosmtpd) that password reset emails are delivered to, and drives
+each route with ``--concurrency`` requests in flight, either in process
+through the ASGI transport or over HTTP against uvicorn (``--server
+uvicorn``). Routes that hash passwords and the bulk upsert get
+``--auth-requests`` requests, the others ``--requests``. A request with an
+unexpected status counts as an error.
+
+With ``--baseline`` the run is compared route by route against a previous
+results file: a route regresses when its p95 grows or its throughput drops
+by more than ``--tolerance``, and the suite then exits with status 1.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --baseline results.json --tolerance 0.2
+    python -m benchmarks.suite --server uvicorn --database-url postgresql://...
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from benchmarks.common import configure_env, free_port, print_table, summarize
+
+PASSWORD = "bench-password"
+
+
+@dataclass
+class Scenario:
+    name: str
+    status: int
+    total: int
+    # Request number -> (method, path, httpx keyword arguments)
+    request: Callable[[int], tuple[str, str, dict]]
+
+
+class MockSMTP:
+    """Local SMTP server that accepts and counts every message"""
+
+    def __init__(self):
+        self.port = free_port()
+        self.messages = 0
+        self._controller = None
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 Message accepted for delivery"
+
+    def start(self) -> None:
+        from aiosmtpd.controller import Controller
+        self._controller = Controller(self, hostname="127.0.0.1", port=self.port)
+        self._controller.start()
+
+    def stop(self) -> None:
+        if self._controller is not None:
+            self._controller.stop()
+
+
+def prepare_data(users: int, products: int) -> list[str]:
+    """Create the schema, users and products; return the user emails"""
+    from sqlalchemy import func, insert, select
+    from benchmarks.bench_pagination import generate_catalog
+    from config.database import engine
+    from models import User
+    from utils.security import hash_password
+
+    generate_catalog(products)
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count(User.id))
+                                .where(User.username.like("bench%"))).scalar()
+        # One hash for everyone: generating users should not take minutes
+        password = hash_password(PASSWORD)
+        if existing < users:
+            conn.execute(insert(User), [
+                {"username": f"bench{i}", "email": f"bench{i}@example.com",
+                 "password": password}
+                for i in range(existing, users)
+            ])
+    return [f"bench{i}@example.com" for i in range(users)]
+
+
+def build_scenarios(args, emails: list[str]) -> list[Scenario]:
+    from utils.security import create_access_token
+
+    rng = random.Random(42)
+    run = uuid.uuid4().hex[:8]
+    bearer = [{"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+              for email in emails]
+    signups = [f"signup-{run}-{i}@example.com" for i in range(args.auth_requests)]
+
+    def reset(i):
+        # The accounts created by the signup scenario, one reset each
+        token = create_access_token(
+            {"sub": signups[i], "type": "password_reset"},
+            expires_delta=timedelta(minutes=15),
+        )
+        return "POST", "/auth/reset-password", {
+            "json": {"token": token, "new_password": f"changed-{i}"}}
+
+    queries = ("phone", "wireless headphones", "product 12", "desk lamp", "book")
+    return [
+        Scenario("GET /products/", 200, args.requests, lambda i: (
+            "GET", "/products/", {})),
+        Scenario("GET /products/ (filtered)", 200, args.requests, lambda i: (
+            "GET", "/products/", {"params": {
+                "category": "Books", "min_price": rng.randint(1, 500),
+                "sort": "price", "limit": 20}})),
+        Scenario("GET /products/{id}", 200, args.requests, lambda i: (
+            "GET", f"/products/{rng.randint(1, args.products)}", {})),
+        Scenario("GET /products/search", 200, args.requests, lambda i: (
+            "GET", "/products/search", {"params": {"q": rng.choice(queries)}})),
+        Scenario("GET /products/facets", 200, args.requests, lambda i: (
+            "GET", "/products/facets", {"params": {
+                "min_price": rng.randint(1, 500)}})),
+        Scenario("POST /products/", 201, args.requests, lambda i: (
+            "POST", "/products/", {"headers": rng.choice(bearer), "json": {
+                "name": f"Suite product {run} {i}", "price": rng.randint(1, 500),
+                "category": "Suite", "stock_quantity": rng.randint(0, 50)}})),
+        Scenario("PATCH /products/{id}", 200, args.requests, lambda i: (
+            "PATCH", f"/products/{rng.randint(1, args.products)}",
+            {"headers": rng.choice(bearer), "json": {"price": rng.randint(1, 500)}})),
+        Scenario("POST /products/bulk", 200, args.auth_requests, lambda i: (
+            "POST", "/products/bulk", {"headers": rng.choice(bearer), "json": [
+                {"name": f"Suite bulk {run} {i}-{n}", "price": rng.randint(1, 500),
+                 "category": "Suite", "stock_quantity": 1}
+                for n in range(args.bulk_size)]})),
+        Scenario("GET /auth/me", 200, args.requests, lambda i: (
+            "GET", "/auth/me", {"headers": rng.choice(bearer)})),
+        Scenario("PATCH /auth/profile", 200, args.requests, lambda i: (
+            "PATCH", "/auth/profile", {"headers": rng.choice(bearer),
+                                       "json": {"age": rng.randint(18, 90)}})),
+        Scenario("POST /auth/forgot-password", 200, args.requests, lambda i: (
+            "POST", "/auth/forgot-password",
+            {"json": {"email": rng.choice(emails)}})),
+        Scenario("POST /auth/login", 200, args.auth_requests, lambda i: (
+            "POST", "/auth/login",
+            {"json": {"email": rng.choice(emails), "password": PASSWORD}})),
+        Scenario("POST /auth/signup", 201, args.auth_requests, lambda i: (
+            "POST", "/auth/signup", {"json": {
+                "username": f"signup-{run}-{i}", "email": signups[i],
+                "password": PASSWORD, "confirm_password": PASSWORD}})),
+        Scenario("POST /auth/reset-password", 200, args.auth_requests, reset),
+    ]
+
+
+async def drive(client, scenario: Scenario, concurrency: int) -> dict:
+    """Issue the scenario's requests with at most ``concurrency`` in flight"""
+    latencies: list[float] = []
+    unexpected: dict[str, int] = {}
+    remaining = iter(range(scenario.total))
+
+    async def worker():
+        for i in remaining:
+            method, path, kwargs = scenario.request(i)
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != scenario.status:
+                status = str(response.status_code)
+                unexpected[status] = unexpected.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stats = summarize(latencies, time.perf_counter() - started,
+                      sum(unexpected.values()))
+    stats["unexpected_statuses"] = unexpected
+    return stats
+
+
+def start_uvicorn(port: int, timeout: float = 60) -> subprocess.Popen:
+    import urllib.request
+
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning"], env=env,
+    )
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError(f"uvicorn did not answer within {timeout}s")
+
+
+async def run(args) -> dict:
+    import httpx
+
+    emails = prepare_data(args.users, args.products)
+    scenarios = [s for s in build_scenarios(args, emails)
+                 if not args.only or any(word in s.name for word in args.only)]
+    results = {}
+
+    async def measure(client):
+        for scenario in scenarios:
+            # Warm up: first requests build indexes and fill caches
+            method, path, kwargs = scenario.request(0)
+            if not scenario.name.startswith("POST /auth/"):
+                await client.request(method, path, **kwargs)
+            results[scenario.name] = await drive(client, scenario, args.concurrency)
+            print(f"  {scenario.name}: {results[scenario.name]['rps']} rps")
+
+    if args.server == "uvicorn":
+        port = free_port()
+        server = start_uvicorn(port)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}",
+                                         timeout=60) as client:
+                await measure(client)
+        finally:
+            # Shutdown gives the outbox time to deliver queued emails
+            server.terminate()
+            server.wait()
+    else:
+        from main import app
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport,
+                                         base_url="http://bench",
+                                         timeout=60) as client:
+                await measure(client)
+    return results
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> bool:
+    """Print the change per route; True when any route regressed"""
+    regressed = False
+    results = report["results"]
+    print(f"\ncompared with baseline from {baseline['meta']['timestamp']}")
+    for key in ("server", "database", "users", "products", "concurrency"):
+        if baseline["meta"].get(key) != report["meta"][key]:
+            print(f"⚠️ Baseline was recorded with {key}={baseline['meta'].get(key)}, "
+                  f"this run uses {report['meta'][key]}")
+    print(f"{'scenario':<32}{'rps':>10}{'change':>9}{'p95 ms':>10}{'change':>9}")
+    for name, stats in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<32}{stats['rps']:>10}{'new':>9}{stats['p95_ms']:>10}")
+            continue
+        rps = stats["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        p95 = stats["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        worse = rps < -tolerance or p95 > tolerance or \
+            stats["errors"] > before["errors"]
+        regressed |= worse
+        print(f"{name:<32}{stats['rps']:>10}{rps:>+9.0%}{stats['p95_ms']:>10}"
+              f"{p95:>+9.0%}{'  REGRESSION' if worse else ''}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url")
+    parser.add_argument("--server", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--auth-requests", type=int, default=50)
+    parser.add_argument("--bulk-size", type=int, default=100,
+                        help="products per POST /products/bulk request")
+    parser.add_argument("--only", nargs="+",
+                        help="only run scenarios whose name contains one of these")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    database_url = configure_env(args.database_url)
+    smtp = MockSMTP()
+    smtp.start()
+    os.environ.update({
+        "SMTP_SERVER": "127.0.0.1", "SMTP_PORT": str(smtp.port),
+        "SMTP_STARTTLS": "false", "EMAIL_PASSWORD": "",
+        "EMAIL_ADDRESS": "bench@example.com",
+        # Every generated user may write products
+        "ADMIN_EMAILS": ",".join(f"bench{i}@example.com" for i in range(args.users)),
+    })
+    # Measure the hashing routes rather than their load shedding (see
+    # bench_login_storm), which rejects hashes past the queue limit with 503
+    os.environ.setdefault("HASH_QUEUE_LIMIT", str(args.concurrency))
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        smtp.stop()
+
+    print_table(f"{args.server}, concurrency {args.concurrency}", results)
+    print(f"mock SMTP received {smtp.messages} messages")
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": database_url.split(":", 1)[0],
+            "server": args.server,
+            "users": args.users,
+            "products": args.products,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,22 @@
-from .database import engine, SessionLocal, Base, get_db
+from .settings import settings, Settings
+from .database import (
+    engine, async_engine, SessionLocal, AsyncSessionLocal, Base,
+    get_db, get_async_db, pool_stats
+)
+from .replicas import replicas, get_read_db, is_replica
 
-__all__ = ["engine", "SessionLocal", "Base", "get_db"]
+__all__ = [
+    "settings",
+    "Settings",
+    "engine",
+    "async_engine",
+    "SessionLocal",
+    "AsyncSessionLocal",
+    "Base",
+    "get_db",
+    "get_async_db",
+    "pool_stats",
+    "replicas",
+    "get_read_db",
+    "is_replica",
+]
@@ -0,0 +1,132 @@
+"""
+Connection pool instrumentation.
+
+Pool events keep counters for checkouts and connection churn. Checkout wait
+time has no event of its own, so the engines use a QueuePool subclass that
+times ``_do_get``, the call that blocks while the pool is exhausted.
+"""
+import asyncio
+import bisect
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import Pool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class PoolMetrics:
+    """Counters and checkout wait histogram for one engine's pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: Engine | None = None
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def watch(self, engine: Engine) -> None:
+        """Count pool events of ``engine``"""
+        self.engine = engine
+
+        def count(attr):
+            def listener(*_):
+                with self._lock:
+                    setattr(self, attr, getattr(self, attr) + 1)
+            return listener
+
+        event.listen(engine, "connect", count("connects"))
+        event.listen(engine, "close", count("closes"))
+        event.listen(engine, "close_detached", count("closes"))
+        event.listen(engine, "invalidate", count("invalidations"))
+        event.listen(engine, "soft_invalidate", count("invalidations"))
+        event.listen(engine, "checkout", count("checkouts"))
+        event.listen(engine, "checkin", count("checkins"))
+
+    def stats(self) -> dict:
+        pool = self.engine.pool if self.engine is not None else None
+        stats = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                timeout=pool.timeout(),
+            )
+        waits = sum(self.wait_buckets)
+        cumulative = 0
+        histogram = {}
+        for bound, count in zip((*WAIT_BUCKETS, "+Inf"), self.wait_buckets):
+            cumulative += count
+            histogram[f"le_{bound}"] = cumulative
+        stats.update(
+            checkouts=self.checkouts,
+            checkins=self.checkins,
+            connects=self.connects,
+            closes=self.closes,
+            invalidations=self.invalidations,
+            timeouts=self.timeouts,
+            wait={
+                "count": waits,
+                "avg_ms": round(self.wait_sum / waits * 1000, 3) if waits else 0.0,
+                "max_ms": round(self.wait_max * 1000, 3),
+                "buckets": histogram,
+            },
+        )
+        return stats
+
+
+class _TimedCheckout:
+    """Mixin that records how long each checkout waited for a connection"""
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def instrumented_pool_class(base: type[Pool], metrics: PoolMetrics) -> type[Pool]:
+    """
+    Subclass of ``base`` bound to ``metrics``. Binding on the class rather
+    than the instance keeps it across ``pool.recreate()`` (engine.dispose()).
+    """
+    return type(f"Instrumented{base.__name__}", (_TimedCheckout, base),
+                {"metrics": metrics})
+
+
+async def prewarm_pool(engine: AsyncEngine, connections: int) -> None:
+    """Open ``connections`` connections at once so they sit idle in the pool"""
+    opened = await asyncio.gather(
+        *(engine.connect().start() for _ in range(connections)),
+        return_exceptions=True
+    )
+    for conn in opened:
+        if isinstance(conn, BaseException):
+            print(f"⚠️ Pool prewarm failed: {conn}")
+        else:
+            await conn.close()
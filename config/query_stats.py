@@ -0,0 +1,117 @@
+"""
+SQL statement instrumentation.
+
+Cursor execute events time every statement. Statements run while a request
+is being handled are also attributed to that request through a ContextVar
+(SQLAlchemy's async greenlets run in the calling task's context), which the
+query stats middleware opens and closes around each request.
+"""
+import re
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import lru_cache
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import ExecuteStyle
+from utils.metrics import registry
+from .settings import settings
+
+QUERIES = registry.counter(
+    "db_queries_total", "SQL statements executed by operation", ("operation",)
+)
+QUERY_LATENCY = registry.histogram(
+    "db_query_duration_seconds", "SQL statement latency by operation",
+    ("operation",),
+)
+SLOW_QUERIES = registry.counter(
+    "db_slow_queries_total", "SQL statements slower than SQL_SLOW_QUERY_MS"
+)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUE_ROWS = re.compile(r"\(\?\.\.\.\)(?:\s*,\s*\(\?\.\.\.\))+")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|__\[POSTCOMPILE_\w+\]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> tuple[str, str]:
+    """
+    (operation, shape) of a statement. The shape has literals and bind
+    parameters replaced with ``?`` and IN lists and multi-row VALUES
+    collapsed, so statements that only differ in values compare equal.
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _LITERALS.sub("?", _PLACEHOLDERS.sub("?", shape))
+    shape = _VALUE_ROWS.sub("(?...)", _PARAM_LISTS.sub("(?...)", shape))
+    operation = shape.split(" ", 1)[0].upper() if shape else "UNKNOWN"
+    return operation, shape
+
+
+@dataclass
+class QueryStats:
+    """SQL statements issued while handling one request"""
+    count: int = 0
+    duration: float = 0.0
+    shapes: dict[str, int] = field(default_factory=dict)
+    repeated: list[str] = field(default_factory=list)
+
+    def record(self, shape: str, elapsed: float, batch: bool = False) -> None:
+        self.count += 1
+        self.duration += elapsed
+        if batch:
+            # One of the batches of a single executemany, not a repeat
+            return
+        seen = self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        if seen == settings.sql_repeat_threshold:
+            self.repeated.append(shape)
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def begin_request() -> tuple[QueryStats, Token]:
+    """Attribute statements in the current context to a new QueryStats"""
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token: Token) -> None:
+    _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    operation, shape = normalize_sql(statement)
+    QUERIES.inc(operation)
+    QUERY_LATENCY.observe(elapsed, operation)
+    if elapsed * 1000 >= settings.sql_slow_query_ms:
+        SLOW_QUERIES.inc()
+        print(f"⚠️ Slow query ({elapsed * 1000:.1f} ms): {shape}")
+    stats = _current.get()
+    if stats is not None:
+        batch = context is not None and \
+            context.execute_style is ExecuteStyle.INSERTMANYVALUES
+        stats.record(shape, elapsed, batch)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for failed statements
+    started = exception_context.connection.info.get("query_started") \
+        if exception_context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Time every statement ``engine`` executes"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
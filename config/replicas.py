@@ -0,0 +1,237 @@
+"""
+Read replica routing.
+
+``DATABASE_REPLICA_URLS`` lists replicas of the primary, comma separated and
+in the same form as ``DATABASE_URL``. ``get_read_db`` gives read-only routes
+a session on one of them, picked in turn (``REPLICA_SELECTION=round_robin``)
+or by fewest sessions in flight (``least_connections``), and a session on
+the primary instead when
+
+- no replica is configured or healthy,
+- the client committed a write in the last ``REPLICA_STICKY_SECONDS``, so
+  it reads its own writes (clients are told apart by their Authorization
+  header, per worker process),
+- the chosen replica cannot hand out a connection.
+
+A background task probes every replica each ``REPLICA_HEALTH_INTERVAL``
+seconds and skips the ones that fail until they answer again; on Postgres a
+replica replaying WAL more than ``REPLICA_MAX_LAG`` seconds behind fails
+too. SQLite files work as replicas for local testing; open them read-only
+(``sqlite:///file:replica.db?mode=ro&uri=true``) so a missing file fails
+the probe instead of being created empty.
+"""
+import asyncio
+import itertools
+import time
+from fastapi import Depends, Request
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .database import (
+    PrimarySession, _async_url, _connect_args, _pool_args, get_async_db,
+    pool_metrics,
+)
+from .pool import PoolMetrics
+from .settings import settings
+
+REPLICA_SELECTION = settings.replica_selection
+REPLICA_STICKY_SECONDS = settings.replica_sticky_seconds
+REPLICA_HEALTH_INTERVAL = settings.replica_health_interval
+REPLICA_MAX_LAG = settings.replica_max_lag
+# Sticky clients kept per process before expired ones are dropped
+STICKY_PRUNE_SIZE = 10000
+
+# Seconds the replica's replayed WAL is behind what it has received
+POSTGRES_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.postgres = make_url(url).get_backend_name() == "postgresql"
+        metrics = pool_metrics[name] = PoolMetrics(name)
+        async_url = _async_url(url)
+        self.engine = create_async_engine(
+            async_url, connect_args=_connect_args(async_url),
+            **_pool_args(async_url, AsyncAdaptedQueuePool, metrics),
+        )
+        metrics.watch(self.engine.sync_engine)
+        self.sessionmaker = async_sessionmaker(
+            bind=self.engine, class_=AsyncSession, autoflush=False,
+            expire_on_commit=False,
+        )
+        self.healthy = True
+        self.in_flight = 0
+        self.reads = 0
+        self.failures = 0
+        self.lag: float | None = None
+        self.error: str | None = None
+
+    async def probe(self) -> None:
+        """Raise unless the replica answers and is not lagging too far"""
+        async with self.engine.connect() as conn:
+            if self.postgres:
+                self.lag = float((await conn.execute(POSTGRES_LAG)).scalar())
+                if self.lag > REPLICA_MAX_LAG:
+                    raise RuntimeError(f"replication lag {self.lag:.1f}s")
+            else:
+                await conn.execute(text("SELECT 1"))
+
+    def mark_down(self, error: Exception) -> None:
+        self.failures += 1
+        self.error = str(error).splitlines()[0]
+        if self.healthy:
+            self.healthy = False
+            print(f"⚠️ Replica {self.name} is down, reading from the primary: "
+                  f"{self.error}")
+
+    def mark_up(self) -> None:
+        self.error = None
+        if not self.healthy:
+            self.healthy = True
+            print(f"Replica {self.name} is back")
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url, "healthy": self.healthy, "in_flight": self.in_flight,
+            "reads": self.reads, "failures": self.failures, "lag": self.lag,
+            "error": self.error,
+        }
+
+
+class ReplicaSet:
+    def __init__(self, urls: list[str], selection: str = REPLICA_SELECTION):
+        if selection not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown REPLICA_SELECTION '{selection}'")
+        self.selection = selection
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self.primary_reads = 0
+        self._turn = itertools.count()
+        # Authorization header -> monotonic time its reads may use replicas again
+        self._sticky: dict[str, float] = {}
+        self._health_task: asyncio.Task | None = None
+
+    def stick(self, client: str | None) -> None:
+        """Send ``client``'s reads to the primary for REPLICA_STICKY_SECONDS"""
+        if not client or not self.replicas:
+            return
+        now = time.monotonic()
+        if len(self._sticky) >= STICKY_PRUNE_SIZE:
+            self._sticky = {c: t for c, t in self._sticky.items() if t > now}
+        self._sticky[client] = now + REPLICA_STICKY_SECONDS
+
+    def choose(self, client: str | None) -> Replica | None:
+        """Replica for a read, or None for the primary"""
+        if client and self._sticky.get(client, 0) > time.monotonic():
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        turn = next(self._turn) % len(healthy)
+        if self.selection == "least_connections":
+            # Start from a different replica each time to break ties evenly
+            rotated = healthy[turn:] + healthy[:turn]
+            return min(rotated, key=lambda replica: replica.in_flight)
+        return healthy[turn]
+
+    async def check(self) -> None:
+        """Probe every replica once"""
+        async def probe(replica: Replica):
+            try:
+                await asyncio.wait_for(replica.probe(), REPLICA_HEALTH_INTERVAL)
+                replica.mark_up()
+            except Exception as e:
+                replica.mark_down(e)
+        await asyncio.gather(*(probe(replica) for replica in self.replicas))
+
+    async def _check_forever(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(REPLICA_HEALTH_INTERVAL)
+
+    async def start(self) -> None:
+        if self.replicas and self._health_task is None:
+            await self.check()
+            self._health_task = asyncio.create_task(self._check_forever())
+
+    async def stop(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "selection": self.selection,
+            "primary_reads": self.primary_reads,
+            "sticky_clients": sum(t > time.monotonic() for t in self._sticky.values()),
+            "replicas": {replica.name: replica.stats() for replica in self.replicas},
+        }
+
+
+replicas = ReplicaSet(settings.database_replica_urls)
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _note_statement_write(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _note_flush(session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _stick_writer(session) -> None:
+    if session.info.pop("wrote", False):
+        replicas.stick(session.info.get("client"))
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _forget_write(session) -> None:
+    session.info.pop("wrote", None)
+
+
+def is_replica(db: AsyncSession) -> bool:
+    """Whether ``db`` reads from a replica, which may lag behind the primary"""
+    return "replica" in db.info
+
+
+async def get_read_db(request: Request,
+                      primary: AsyncSession = Depends(get_async_db)):
+    """
+    Session for read-only work, on a replica when one is usable. Otherwise
+    it is the request's primary session, which FastAPI shares with the
+    handler's get_async_db, so a request never holds two primary connections.
+    """
+    replica = replicas.choose(request.headers.get("authorization"))
+    if replica is not None:
+        db = replica.sessionmaker()
+        try:
+            # Connect now, so an unreachable replica fails over to the primary
+            await db.connection()
+        except (exc.DBAPIError, OSError) as e:
+            await db.close()
+            replica.mark_down(e)
+            replica = None
+    if replica is None:
+        replicas.primary_reads += 1
+        yield primary
+        return
+    replica.reads += 1
+    replica.in_flight += 1
+    db.info["replica"] = replica.name
+    try:
+        async with db:
+            yield db
+    finally:
+        replica.in_flight -= 1
@@ -0,0 +1,224 @@
+"""
+Application settings.
+
+The environment (and .env) is read exactly once, when this module is first
+imported. Every other module takes its configuration from ``settings``.
+"""
+import os
+from dataclasses import dataclass
+from dotenv import load_dotenv
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Database
+    database_url: str
+    async_database_url: str | None
+    run_migrations: bool
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+    db_pool_prewarm: int
+    sql_slow_query_ms: float
+    sql_repeat_threshold: int
+    sql_query_budget: int
+
+    # Read replicas
+    database_replica_urls: list[str]
+    replica_selection: str
+    replica_sticky_seconds: float
+    replica_health_interval: float
+    replica_max_lag: float
+
+    # Auth
+    secret_key: str
+    token_cache_size: int
+    user_cache_size: int
+    user_cache_ttl: float
+    hash_workers: int
+    hash_queue_limit: int
+    password_scheme: str
+    bcrypt_rounds: int
+    argon2_time_cost: int
+    argon2_memory_cost: int
+    jwt_keys_dir: str
+    jwt_accept_hs256: bool
+    jwks_max_age: int
+    admin_emails: frozenset[str]
+
+    # Password reset
+    frontend_urls: list[str]
+    frontend_reset_url: str | None
+    used_token_cache_size: int
+    token_sweep_interval: float
+    token_sweep_batch: int
+
+    # Rate limiting, limits are "<requests>/<seconds>"
+    rate_limit_enabled: bool
+    rate_limit_store: str
+    rate_limit_redis_url: str
+    rate_limit_trust_forwarded: bool
+    # Proxies in front of the app that append to X-Forwarded-For
+    rate_limit_trusted_hops: int
+    rate_limit_login_ip: str
+    rate_limit_login_account: str
+    rate_limit_signup_ip: str
+    rate_limit_forgot_ip: str
+    rate_limit_forgot_account: str
+
+    # Email
+    smtp_server: str
+    smtp_port: int
+    smtp_starttls: bool
+    email_address: str
+    email_password: str
+    outbox_queue_size: int
+    outbox_workers: int
+    outbox_batch_size: int
+    outbox_max_attempts: int
+    outbox_retry_delay: float
+
+    # Products
+    product_cache_size: int
+    product_cache_ttl: float
+    search_refresh_interval: float
+    facet_refresh_interval: float
+    catalog_poll_overlap: float
+    product_bulk_max: int
+    facet_price_edges: tuple[float, ...]
+
+    # Stock reservations
+    reservation_ttl: float
+    reservation_sweep_interval: float
+    reservation_sweep_batch: int
+    reservation_writers: int
+
+    # Response compression
+    compression_enabled: bool
+    compression_min_size: int
+    gzip_level: int
+    brotli_quality: int
+    zstd_level: int
+
+    # Static fonts
+    static_fonts_dir: str
+    static_cache_dir: str
+    static_max_age: int
+    static_memory_max_size: int
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv()
+        # bcrypt is CPU bound, so one worker process per core
+        hash_workers = _int("HASH_WORKERS", os.cpu_count() or 1)
+        return cls(
+            database_url=os.getenv("DATABASE_URL", ""),
+            async_database_url=os.getenv("ASYNC_DATABASE_URL") or None,
+            run_migrations=_bool("RUN_MIGRATIONS", True),
+            db_pool_size=_int("DB_POOL_SIZE", 5),
+            db_max_overflow=_int("DB_MAX_OVERFLOW", 10),
+            db_pool_timeout=_float("DB_POOL_TIMEOUT", 30),
+            db_pool_recycle=_int("DB_POOL_RECYCLE", 1800),
+            db_pool_pre_ping=_bool("DB_POOL_PRE_PING", True),
+            db_pool_prewarm=_int("DB_POOL_PREWARM", 0),
+            sql_slow_query_ms=_float("SQL_SLOW_QUERY_MS", 100),
+            sql_repeat_threshold=_int("SQL_REPEAT_THRESHOLD", 5),
+            sql_query_budget=_int("SQL_QUERY_BUDGET", 20),
+            database_replica_urls=[
+                url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+                if url.strip()
+            ],
+            # round_robin or least_connections
+            replica_selection=os.getenv("REPLICA_SELECTION", "round_robin"),
+            replica_sticky_seconds=_float("REPLICA_STICKY_SECONDS", 5),
+            replica_health_interval=_float("REPLICA_HEALTH_INTERVAL", 5),
+            replica_max_lag=_float("REPLICA_MAX_LAG", 5),
+            secret_key=os.getenv("SECRET_KEY", "SUPER_SECRET_KEY_CHANGE_THIS"),
+            token_cache_size=_int("TOKEN_CACHE_SIZE", 10000),
+            user_cache_size=_int("USER_CACHE_SIZE", 10000),
+            user_cache_ttl=_float("USER_CACHE_TTL", 30),
+            hash_workers=hash_workers,
+            hash_queue_limit=_int("HASH_QUEUE_LIMIT", hash_workers * 8),
+            # Pick costs with `python -m utils.hash_calibration`
+            password_scheme=os.getenv("PASSWORD_SCHEME", "bcrypt"),
+            bcrypt_rounds=_int("BCRYPT_ROUNDS", 12),
+            argon2_time_cost=_int("ARGON2_TIME_COST", 3),
+            argon2_memory_cost=_int("ARGON2_MEMORY_COST", 65536),
+            jwt_keys_dir=os.getenv("JWT_KEYS_DIR", ".jwt-keys"),
+            # Only while HS256 tokens issued before ES256 signing can be live
+            jwt_accept_hs256=_bool("JWT_ACCEPT_HS256", False),
+            jwks_max_age=_int("JWKS_MAX_AGE", 300),
+            # Users allowed to change the catalog and read /internal/*
+            admin_emails=frozenset(
+                email.strip().lower()
+                for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+            ),
+            frontend_urls=os.getenv("FRONTEND_URLS", "").split(","),
+            frontend_reset_url=os.getenv("FRONTEND_RESET_URL"),
+            used_token_cache_size=_int("USED_TOKEN_CACHE_SIZE", 100000),
+            token_sweep_interval=_float("TOKEN_SWEEP_INTERVAL", 60),
+            token_sweep_batch=_int("TOKEN_SWEEP_BATCH", 1000),
+            rate_limit_enabled=_bool("RATE_LIMIT_ENABLED", True),
+            rate_limit_store=os.getenv("RATE_LIMIT_STORE", "memory"),
+            rate_limit_redis_url=os.getenv("RATE_LIMIT_REDIS_URL",
+                                           "redis://localhost:6379/0"),
+            rate_limit_trust_forwarded=_bool("RATE_LIMIT_TRUST_FORWARDED", False),
+            rate_limit_trusted_hops=max(1, _int("RATE_LIMIT_TRUSTED_HOPS", 1)),
+            rate_limit_login_ip=os.getenv("RATE_LIMIT_LOGIN_IP", "20/60"),
+            rate_limit_login_account=os.getenv("RATE_LIMIT_LOGIN_ACCOUNT", "5/60"),
+            rate_limit_signup_ip=os.getenv("RATE_LIMIT_SIGNUP_IP", "5/60"),
+            rate_limit_forgot_ip=os.getenv("RATE_LIMIT_FORGOT_IP", "5/60"),
+            rate_limit_forgot_account=os.getenv("RATE_LIMIT_FORGOT_ACCOUNT",
+                                                "3/900"),
+            smtp_server=os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+            smtp_port=_int("SMTP_PORT", 587),
+            smtp_starttls=_bool("SMTP_STARTTLS", True),
+            email_address=os.getenv("EMAIL_ADDRESS", ""),
+            email_password=os.getenv("EMAIL_PASSWORD", ""),
+            outbox_queue_size=_int("OUTBOX_QUEUE_SIZE", 1000),
+            outbox_workers=_int("OUTBOX_WORKERS", 2),
+            outbox_batch_size=_int("OUTBOX_BATCH_SIZE", 20),
+            outbox_max_attempts=_int("OUTBOX_MAX_ATTEMPTS", 5),
+            outbox_retry_delay=_float("OUTBOX_RETRY_DELAY", 1),
+            product_cache_size=_int("PRODUCT_CACHE_SIZE", 1024),
+            product_cache_ttl=_float("PRODUCT_CACHE_TTL", 60),
+            search_refresh_interval=_float("SEARCH_REFRESH_INTERVAL", 5),
+            facet_refresh_interval=_float("FACET_REFRESH_INTERVAL", 5),
+            # Longest expected write transaction: Postgres stamps now() at its start
+            catalog_poll_overlap=_float("CATALOG_POLL_OVERLAP", 30),
+            product_bulk_max=_int("PRODUCT_BULK_MAX", 10000),
+            facet_price_edges=tuple(sorted(
+                float(edge) for edge in
+                os.getenv("FACET_PRICE_EDGES", "25,50,100,250,500,1000").split(",")
+            )),
+            reservation_ttl=_float("RESERVATION_TTL", 600),
+            reservation_sweep_interval=_float("RESERVATION_SWEEP_INTERVAL", 15),
+            reservation_sweep_batch=_int("RESERVATION_SWEEP_BATCH", 500),
+            reservation_writers=_int("RESERVATION_WRITERS", 4),
+            compression_enabled=_bool("COMPRESSION_ENABLED", True),
+            compression_min_size=_int("COMPRESSION_MIN_SIZE", 1024),
+            gzip_level=_int("GZIP_LEVEL", 6),
+            brotli_quality=_int("BROTLI_QUALITY", 5),
+            zstd_level=_int("ZSTD_LEVEL", 3),
+            static_fonts_dir=os.getenv("STATIC_FONTS_DIR", "public/fonts"),
+            static_cache_dir=os.getenv("STATIC_CACHE_DIR", ".static-cache"),
+            static_max_age=_int("STATIC_MAX_AGE", 3600),
+            static_memory_max_size=_int("STATIC_MEMORY_MAX_SIZE", 256 * 1024),
+        )
+
+
+settings = Settings.from_env()
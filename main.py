@@ -1,22 +1,76 @@
+import asyncio
 from fastapi import FastAPI
-from middleware import setup_cors_middleware
-from routes import auth_router, products_router
+from config import async_engine, replicas, settings
+from config.pool import prewarm_pool
+from middleware import (
+    setup_compression_middleware, setup_cors_middleware, setup_metrics_middleware,
+    setup_query_stats_middleware, setup_rate_limit_middleware, rate_limit_store
+)
+from routes import (
+    auth_router, products_router, internal_router, metrics_router, reservations_router,
+    jwks_router,
+)
 from migrations.seed_data import run_migrations
+from services import email_outbox, start_token_sweeper, stop_token_sweeper
+from services.product_facets import start_product_facets, stop_product_facets
+from services.product_search import start_product_search, stop_product_search
+from services.reservation_service import (
+    start_reservation_sweeper, stop_reservation_sweeper,
+)
+from utils import start_hashing_pool, shutdown_hashing_pool
+from utils.jwt_keys import key_ring
+from utils.static_files import font_files
 
 app = FastAPI(title="Auth API", version="1.0.0")
 
-# Setup middleware
+# Setup middleware, innermost first
+setup_rate_limit_middleware(app)
 setup_cors_middleware(app)
+setup_compression_middleware(app)
+setup_query_stats_middleware(app)
+setup_metrics_middleware(app)
 
 # Include routers
 app.include_router(auth_router)
+app.include_router(jwks_router)
 app.include_router(products_router)
+app.include_router(reservations_router)
+app.include_router(internal_router)
+app.include_router(metrics_router)
+app.mount("/static/fonts", font_files, name="fonts")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Run migrations when the app starts"""
-    run_migrations()
+    if settings.run_migrations:
+        run_migrations()
+    if settings.db_pool_prewarm:
+        await prewarm_pool(async_engine, settings.db_pool_prewarm)
+    start_hashing_pool()
+    # Load (or create) the signing keys before the first login needs them
+    key_ring.ensure_loaded()
+    await email_outbox.start()
+    start_token_sweeper()
+    start_reservation_sweeper()
+    await start_product_search()
+    await start_product_facets()
+    await font_files.start()
+    await replicas.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    # Wait for the workers so their semaphores are released before exit
+    await asyncio.to_thread(shutdown_hashing_pool, True)
+    await email_outbox.stop()
+    await stop_token_sweeper()
+    await stop_reservation_sweeper()
+    await rate_limit_store.close()
+    await stop_product_search()
+    await stop_product_facets()
+    await replicas.stop()
 
 
 @app.get("/")
@@ -1,3 +1,14 @@
+from .compression import setup_compression_middleware
 from .cors import setup_cors_middleware
+from .metrics import setup_metrics_middleware
+from .query_stats import setup_query_stats_middleware
+from .rate_limit import setup_rate_limit_middleware, rate_limit_store
 
-__all__ = ["setup_cors_middleware"]
+__all__ = [
+    "setup_compression_middleware",
+    "setup_cors_middleware",
+    "setup_metrics_middleware",
+    "setup_query_stats_middleware",
+    "setup_rate_limit_middleware",
+    "rate_limit_store",
+]
@@ -0,0 +1,104 @@
+from fastapi import FastAPI
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.compression import (
+    COMPRESSION_MIN_SIZE, StreamCompressor, compressible, encoded_etag, negotiate,
+)
+
+# Partial content and bodiless responses are never compressed
+SKIP_STATUSES = (204, 206, 304)
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary", "")
+    if "accept-encoding" not in vary.lower():
+        headers.add_vary_header("Accept-Encoding")
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best content coding the client accepts.
+    A body sent in one piece is compressed when it has at least
+    ``minimum_size`` bytes; a streamed body is compressed chunk by chunk.
+    Responses that already carry a Content-Encoding, such as the stored
+    compressed product responses, pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        # The response start is held back until the first body chunk shows
+        # whether the response is worth compressing
+        pending: Message | None = None
+        stream: StreamCompressor | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal pending, stream
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if (message["status"] in SKIP_STATUSES
+                        or "content-encoding" in headers
+                        or "content-range" in headers
+                        or "no-transform" in headers.get("cache-control", "")
+                        or not compressible(headers.get("content-type"))):
+                    await send(message)
+                    return
+                _add_vary(headers)
+                if encoding is None:
+                    await send(message)
+                else:
+                    pending = message
+                return
+
+            if message["type"] != "http.response.body" or \
+                    (pending is None and stream is None):
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if pending is not None:
+                start, pending = pending, None
+                headers = MutableHeaders(scope=start)
+                length = headers.get("content-length")
+                if (not more_body and len(body) < self.minimum_size) or \
+                        (length is not None and int(length) < self.minimum_size):
+                    await send(start)
+                    await send(message)
+                    return
+                stream = StreamCompressor(encoding)
+                headers["Content-Encoding"] = encoding
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = stream.compress(body) + stream.flush()
+                    stream = None
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            data = stream.compress(body)
+            if not more_body:
+                data += stream.flush()
+                stream = None
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data,
+                            "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def setup_compression_middleware(app: FastAPI) -> None:
+    """Negotiated gzip / Brotli / zstd response compression"""
+    app.add_middleware(CompressionMiddleware)
@@ -0,0 +1,59 @@
+import time
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.metrics import registry
+
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status",
+    ("route", "method", "status"),
+)
+LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and method",
+    ("route", "method"),
+)
+IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled",
+    ("method",),
+)
+
+
+class MetricsMiddleware:
+    """
+    Records request count, latency and in-flight requests per route template
+    (``/products/{product_id}``, not the raw path, to keep label sets small).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec(method)
+            # Set by the router once a route matched
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUESTS.inc(path, method, status)
+            LATENCY.observe(elapsed, path, method)
+
+
+def setup_metrics_middleware(app: FastAPI) -> None:
+    """Add request metrics; add it last so it also times the other middleware"""
+    app.add_middleware(MetricsMiddleware)
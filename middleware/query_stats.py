@@ -0,0 +1,81 @@
+import time
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config.database import engine, async_engine
+from config.replicas import replicas
+from config.query_stats import begin_request, end_request, instrument_queries
+from config.settings import settings
+from utils.metrics import registry
+
+REQUEST_QUERIES = registry.histogram(
+    "http_request_db_queries", "SQL statements issued per request by route",
+    ("route",), buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_TIME = registry.histogram(
+    "http_request_db_seconds", "Time spent in SQL per request by route",
+    ("route",),
+)
+BUDGET_EXCEEDED = registry.counter(
+    "http_request_db_budget_exceeded_total",
+    "Requests that issued more than SQL_QUERY_BUDGET statements", ("route",),
+)
+REPEATED_QUERIES = registry.counter(
+    "http_request_db_repeated_queries_total",
+    "Statement shapes repeated SQL_REPEAT_THRESHOLD times in one request "
+    "(likely N+1)", ("route",),
+)
+
+
+class QueryStatsMiddleware:
+    """
+    Attributes SQL statements to the request that issued them, reports the
+    totals in a ``Server-Timing`` header and warns about requests that go over
+    the query budget or repeat the same statement (N+1 patterns).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = begin_request()
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total = (time.perf_counter() - started) * 1000
+                MutableHeaders(scope=message).append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+                    f"app;dur={total:.2f}"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_QUERIES.observe(stats.count, route)
+            REQUEST_DB_TIME.observe(stats.duration, route)
+            if stats.count > settings.sql_query_budget:
+                BUDGET_EXCEEDED.inc(route)
+                print(f"⚠️ {scope['method']} {route} issued {stats.count} queries "
+                      f"(budget {settings.sql_query_budget})")
+            for shape in stats.repeated:
+                REPEATED_QUERIES.inc(route)
+                print(f"⚠️ Possible N+1 in {scope['method']} {route}: "
+                      f"{stats.shapes[shape]}x {shape}")
+
+
+def setup_query_stats_middleware(app: FastAPI) -> None:
+    """Per-request SQL statistics; add before the metrics middleware"""
+    instrument_queries(engine)
+    instrument_queries(async_engine.sync_engine)
+    for replica in replicas.replicas:
+        instrument_queries(replica.engine.sync_engine)
+    app.add_middleware(QueryStatsMiddleware)
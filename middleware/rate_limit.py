@@ -0,0 +1,180 @@
+import json
+import math
+from dataclasses import dataclass
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config.settings import settings
+from utils.metrics import registry
+from utils.rate_limit import Limit, MemoryStore, RedisStore
+
+RATE_LIMITED = registry.counter(
+    "http_requests_rate_limited_total", "Requests rejected by the rate limiter",
+    ("route", "key"),
+)
+STORE_ERRORS = registry.counter(
+    "rate_limit_store_errors_total", "Rate limit checks skipped because the "
+    "store failed"
+)
+
+# Account keys are read from JSON bodies up to this size
+MAX_BODY_SIZE = 16 * 1024
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    per_ip: Limit | None = None
+    per_account: Limit | None = None
+    # JSON body field that identifies the account
+    account_field: str = "email"
+
+
+def default_policies() -> dict[tuple[str, str], RoutePolicy]:
+    return {
+        ("POST", "/auth/login"): RoutePolicy(
+            Limit.parse(settings.rate_limit_login_ip),
+            Limit.parse(settings.rate_limit_login_account),
+        ),
+        ("POST", "/auth/signup"): RoutePolicy(
+            Limit.parse(settings.rate_limit_signup_ip),
+        ),
+        ("POST", "/auth/forgot-password"): RoutePolicy(
+            Limit.parse(settings.rate_limit_forgot_ip),
+            Limit.parse(settings.rate_limit_forgot_account),
+        ),
+    }
+
+
+class RateLimitMiddleware:
+    """
+    Rejects requests over their route's per-IP or per-account limit with 429
+    before routing, so no database or hashing work is done for them.
+    Requests to routes without a policy pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp, store=None,
+                 policies: dict[tuple[str, str], RoutePolicy] | None = None):
+        self.app = app
+        self.store = store or MemoryStore()
+        self.policies = policies if policies is not None else default_policies()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        policy = None
+        if scope["type"] == "http":
+            policy = self.policies.get((scope["method"], scope["path"]))
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if policy.per_ip is not None:
+            retry_after = await self._hit(f"ip:{path}:{_client_ip(scope)}",
+                                          policy.per_ip)
+            if retry_after:
+                RATE_LIMITED.inc(path, "ip")
+                await _reject(send, retry_after)
+                return
+
+        if policy.per_account is not None:
+            body, complete = await _read_body(receive)
+            account = _account(body, policy.account_field) if complete else None
+            if account is not None:
+                retry_after = await self._hit(f"account:{path}:{account}",
+                                              policy.per_account)
+                if retry_after:
+                    RATE_LIMITED.inc(path, "account")
+                    await _reject(send, retry_after)
+                    return
+            receive = _replay(body, complete, receive)
+
+        await self.app(scope, receive, send)
+
+    async def _hit(self, key: str, limit: Limit) -> float:
+        try:
+            return await self.store.hit(key, limit)
+        except Exception as e:
+            # Fail open: a broken store must not lock everyone out of login
+            STORE_ERRORS.inc()
+            print(f"⚠️ Rate limit store error: {e}")
+            return 0.0
+
+
+def _client_ip(scope: Scope) -> str:
+    if settings.rate_limit_trust_forwarded:
+        # Clients can send any X-Forwarded-For; only the entries appended by
+        # our own proxies, counted from the right, can be trusted
+        hops = [
+            entry.strip()
+            for name, value in scope["headers"] if name == b"x-forwarded-for"
+            for entry in value.decode("latin-1").split(",") if entry.strip()
+        ]
+        if hops:
+            return hops[max(0, len(hops) - settings.rate_limit_trusted_hops)]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def _read_body(receive: Receive) -> tuple[bytes, bool]:
+    """Buffer the request body up to MAX_BODY_SIZE; report if it was all read"""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return b"".join(chunks), False
+        chunk = message.get("body", b"")
+        chunks.append(chunk)
+        size += len(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks), True
+        if size > MAX_BODY_SIZE:
+            return b"".join(chunks), False
+
+
+def _replay(body: bytes, complete: bool, receive: Receive) -> Receive:
+    """A receive callable that yields the buffered body first"""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": not complete}
+        return await receive()
+
+    return replay
+
+
+def _account(body: bytes, field: str) -> str | None:
+    try:
+        value = json.loads(body).get(field)
+    except (ValueError, AttributeError):
+        return None
+    return value.strip().lower() if isinstance(value, str) else None
+
+
+async def _reject(send: Send, retry_after: float) -> None:
+    body = b'{"detail":"Too many requests, please try again later"}'
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _create_store():
+    if settings.rate_limit_store == "redis":
+        return RedisStore(settings.rate_limit_redis_url)
+    return MemoryStore()
+
+
+rate_limit_store = _create_store()
+
+
+def setup_rate_limit_middleware(app: FastAPI) -> None:
+    """Throttle the auth endpoints; add first so CORS headers wrap 429s"""
+    if settings.rate_limit_enabled:
+        app.add_middleware(RateLimitMiddleware, store=rate_limit_store)
@@ -0,0 +1,176 @@
+"""
+Stream a product catalog from CSV or NDJSON into the products table.
+
+Rows are read and written in fixed-size chunks, so memory use does not grow
+with the input file. Each chunk is loaded into a temporary staging table
+(COPY on Postgres, executemany elsewhere) and merged into products with two
+set-based statements: update rows whose name already exists, insert the rest.
+
+    python -m migrations.import_catalog catalog.csv --upsert
+    python -m migrations.import_catalog catalog.ndjson --chunk-size 20000
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from itertools import islice
+from typing import Iterable, Iterator
+
+from sqlalchemy import (
+    Boolean, Column, Float, Integer, MetaData, String, Table, Text,
+    delete, exists, insert, select, update,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import func
+
+from config.database import engine
+from models import Product
+from services.catalog_events import publish_catalog_change
+
+FIELDS = ("name", "description", "price", "category", "stock_quantity", "is_active")
+
+staging = Table(
+    "product_import", MetaData(),
+    Column("name", String(255), nullable=False),
+    Column("description", Text),
+    Column("price", Float, nullable=False),
+    Column("category", String(100), nullable=False),
+    Column("stock_quantity", Integer, nullable=False),
+    Column("is_active", Boolean, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y", "t")
+
+
+def normalize(row: dict) -> dict:
+    """Coerce one input record to the staging columns"""
+    description = row.get("description")
+    return {
+        "name": str(row["name"]).strip(),
+        "description": description if description not in ("", None) else None,
+        "price": float(row["price"]),
+        "category": str(row["category"]).strip(),
+        "stock_quantity": int(row.get("stock_quantity") or 0),
+        "is_active": _as_bool(row.get("is_active", True)),
+    }
+
+
+def read_rows(path: str, fmt: str) -> Iterator[dict]:
+    """Yield normalized rows one at a time"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield normalize(row)
+        else:
+            for line in f:
+                if line.strip():
+                    yield normalize(json.loads(line))
+
+
+def chunked(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _copy_into_staging(conn: Connection, rows: list[dict]) -> None:
+    """Load a chunk with COPY when the driver supports it"""
+    dbapi_conn = conn.connection.dbapi_connection
+    columns = ", ".join(FIELDS)
+    with dbapi_conn.cursor() as cursor:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([
+                    "" if row[f] is None else row[f] for f in FIELDS
+                ])
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY product_import ({columns}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        else:  # psycopg 3
+            with cursor.copy(f"COPY product_import ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row([row[f] for f in FIELDS])
+
+
+def load_chunk(conn: Connection, rows: list[dict], upsert: bool) -> None:
+    """Stage one chunk and merge it into products"""
+    conn.execute(delete(staging))
+    if conn.dialect.name == "postgresql" and \
+            conn.dialect.driver in ("psycopg2", "psycopg"):
+        _copy_into_staging(conn, rows)
+    else:
+        conn.execute(insert(staging), rows)
+
+    products = Product.__table__
+    source = select(*(staging.c[f] for f in FIELDS))
+    if upsert:
+        conn.execute(
+            update(products)
+            .where(products.c.name == staging.c.name)
+            .values(
+                **{f: staging.c[f] for f in FIELDS if f != "name"},
+                updated_at=func.now(),
+                version=products.c.version + 1
+            )
+        )
+        source = source.where(
+            ~exists().where(products.c.name == staging.c.name)
+        )
+    conn.execute(insert(products).from_select(list(FIELDS), source))
+
+
+def import_catalog(path: str, fmt: str, chunk_size: int = 10000,
+                   upsert: bool = False) -> int:
+    """Import a catalog file and return the number of rows processed"""
+    total = 0
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        staging.create(conn, checkfirst=True)
+        conn.commit()
+        for chunk in chunked(read_rows(path, fmt), chunk_size):
+            if upsert:
+                # Last occurrence of a name within the chunk wins
+                chunk = list({row["name"]: row for row in chunk}.values())
+            load_chunk(conn, chunk, upsert)
+            conn.commit()
+            total += len(chunk)
+            elapsed = time.perf_counter() - started
+            print(f"  {total} rows, {total / elapsed:,.0f} rows/sec")
+        staging.drop(conn, checkfirst=True)
+        conn.commit()
+    publish_catalog_change()
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "ndjson"),
+                        help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--upsert", action="store_true",
+                        help="update products with the same name instead of "
+                             "inserting duplicates")
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+
+    print(f"Importing {args.path} ({fmt}, chunks of {args.chunk_size})")
+    started = time.perf_counter()
+    total = import_catalog(args.path, fmt, args.chunk_size, args.upsert)
+    elapsed = time.perf_counter() - started
+    print(f"Imported {total} rows in {elapsed:.1f}s "
+          f"({total / elapsed if elapsed else 0:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Bring existing tables in line with the models.
+
+``create_all`` only creates missing tables, so columns added to a model later
+are added here with ALTER TABLE, together with their single-column indexes.
+A fingerprint of the model DDL is stored after a successful run, so workers
+booting against an up-to-date database skip all of this.
+"""
+import hashlib
+from datetime import datetime, timezone
+from sqlalchemy import (
+    Column, DateTime, Integer, String, Table, delete, insert, inspect, select, text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex, CreateTable, MetaData
+
+# Arbitrary key for pg_advisory_xact_lock, held for the whole upgrade
+SCHEMA_LOCK_KEY = 814_202_517
+
+schema_state = Table(
+    "schema_state", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def add_missing_columns(conn: Connection, metadata: MetaData) -> list[str]:
+    """Add columns that exist on a model but not in its table"""
+    added = []
+    inspector = inspect(conn)
+    preparer = conn.dialect.identifier_preparer
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(
+                    f"Cannot add NOT NULL column {table.name}.{column.name} "
+                    "without a server default"
+                )
+            ddl = (
+                f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                f"{preparer.format_column(column)} "
+                f"{column.type.compile(dialect=conn.dialect)}"
+            )
+            if column.server_default is not None:
+                default = column.server_default.arg
+                default = getattr(default, "text", default)
+                ddl += f" DEFAULT {default}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            conn.execute(text(ddl))
+            for index in table.indexes:
+                if [c.name for c in index.columns] == [column.name]:
+                    conn.execute(CreateIndex(index))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def add_missing_indexes(conn: Connection, metadata: MetaData) -> list[str]:
+    """Create model indexes that are missing on existing tables"""
+    added = []
+    inspector = inspect(conn)
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        missing = [i for i in table.indexes if i.name not in existing]
+        for index in missing:
+            # Skipped by SQLAlchemy when ddl_if excludes this dialect
+            index.create(conn)
+        if missing:
+            created = {i["name"] for i in inspect(conn).get_indexes(table.name)}
+            added.extend(i.name for i in missing if i.name in created)
+    return added
+
+
+def schema_fingerprint(engine: Engine, metadata: MetaData) -> str:
+    """Hash of the DDL the models compile to on this dialect"""
+    digest = hashlib.sha256()
+    for table in metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode())
+    return digest.hexdigest()
+
+
+def _read_fingerprint(conn: Connection) -> str | None:
+    return conn.execute(
+        select(schema_state.c.fingerprint).where(schema_state.c.id == 1)
+    ).scalar()
+
+
+def _applied_fingerprint(engine: Engine) -> str | None:
+    try:
+        with engine.connect() as conn:
+            return _read_fingerprint(conn)
+    except DBAPIError:
+        # First boot: the state table does not exist yet
+        return None
+
+
+def ensure_schema(engine: Engine, metadata: MetaData) -> bool:
+    """
+    Create or upgrade the schema unless it already matches the models.
+    Returns True when DDL was run. A booting worker whose fingerprint matches
+    pays for one primary key lookup.
+    """
+    fingerprint = schema_fingerprint(engine, metadata)
+    if _applied_fingerprint(engine) == fingerprint:
+        return False
+
+    # One transaction for the lock, the re-check, all DDL and the new
+    # fingerprint, so workers that boot together upgrade one at a time
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"),
+                         {"key": SCHEMA_LOCK_KEY})
+            # Another worker may have finished while we waited
+            if inspect(conn).has_table(schema_state.name) and \
+                    _read_fingerprint(conn) == fingerprint:
+                return False
+        metadata.create_all(conn)
+        schema_state.create(conn, checkfirst=True)
+
+        for column in add_missing_columns(conn, metadata):
+            print(f"Added column {column}")
+        for index in add_missing_indexes(conn, metadata):
+            print(f"Added index {index}")
+
+        conn.execute(delete(schema_state))
+        conn.execute(insert(schema_state).values(
+            id=1, fingerprint=fingerprint, applied_at=datetime.now(timezone.utc)
+        ))
+    return True
@@ -1,9 +1,12 @@
 """
 Migration script to seed initial product data
 """
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from models import Product
-from config.database import SessionLocal
+from config.database import SessionLocal, Base, engine
+from migrations.schema import ensure_schema
+from services.catalog_events import publish_catalog_change
 
 
 def get_dummy_products():
@@ -113,13 +116,12 @@ def seed_products():
         # Get dummy products
         dummy_products = get_dummy_products()
         
-        # Insert each product
-        for product_data in dummy_products:
-            product = Product(**product_data)
-            db.add(product)
+        # Insert all products in one executemany batch
+        db.execute(insert(Product), dummy_products)
         
         # Commit all products
         db.commit()
+        publish_catalog_change()
         
         print(f"Successfully inserted {len(dummy_products)} products!")
         return True
@@ -135,13 +137,19 @@ def seed_products():
 def run_migrations():
     """
     Run all migration scripts.
-    This function is called when the app starts.
+    Called at startup unless RUN_MIGRATIONS=false, and from the command line:
+
+        python -m migrations.seed_data
     """
-    print("\n" + "=" * 60)
-    print("RUNNING DATABASE MIGRATIONS")
-    print("=" * 60)
-    
     try:
+        # Nothing to do when the schema fingerprint already matches
+        if not ensure_schema(engine, Base.metadata):
+            return
+
+        print("\n" + "=" * 60)
+        print("RUNNING DATABASE MIGRATIONS")
+        print("=" * 60)
+
         # Run product seeding
         seed_products()
         
@@ -151,4 +159,8 @@ def run_migrations():
         
     except Exception as e:
         print(f"MIGRATION FAILED: {e}")
-        print("=" * 60 + "\n")
\ No newline at end of file
+        print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    run_migrations()
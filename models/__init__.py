@@ -1,4 +1,5 @@
 from .user import User, UsedToken
 from .product import Product
+from .reservation import Reservation, ReservationItem
 
-__all__ = ["User", "UsedToken", "Product"]
+__all__ = ["User", "UsedToken", "Product", "Reservation", "ReservationItem"]
@@ -1,10 +1,42 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, Index
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.sql import func, literal_column
 from config.database import Base
 
+# SQLite's CURRENT_TIMESTAMP has second precision; store bound values the same
+# way so keyset comparisons on created_at match what the server default wrote.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d "
+                       "%(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite"
+)
+
+
+def search_vector():
+    """Document vector for full-text search; must match ix_products_search"""
+    return func.to_tsvector(
+        literal_column("'english'"),
+        func.coalesce(literal_column("name"), "") + " " +
+        func.coalesce(literal_column("description"), "")
+    )
+
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination: one index per supported sort order
+        Index("ix_products_active_id", "is_active", "id"),
+        Index("ix_products_active_price_id", "is_active", "price", "id"),
+        Index("ix_products_active_created_id", "is_active", "created_at", "id"),
+        Index("ix_products_category_active_id", "category", "is_active", "id"),
+        Index("ix_products_category_active_price_id",
+              "category", "is_active", "price", "id"),
+        # Full-text search (Postgres only; SQLite uses the in-process index)
+        Index("ix_products_search", search_vector(), postgresql_using="gin")
+        .ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -13,5 +45,9 @@ class Product(Base):
     category = Column(String(100), nullable=False, index=True)
     stock_quantity = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    created_at = Column(Timestamp, server_default=func.now())
+    # Indexed so the search index can pick up changes since its last refresh
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now(),
+                        index=True)
+    # Bumped by every write; product ETags are built from it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from config.database import Base
+
+
+class Reservation(Base):
+    """Stock held for a user until it is confirmed, released or expires"""
+    __tablename__ = "reservations"
+    __table_args__ = (
+        # The sweeper looks for held reservations past their expiry
+        Index("ix_reservations_status_expires", "status", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("Users.id"), nullable=False, index=True)
+    # held, confirmed, released or expired
+    status = Column(String(20), nullable=False, default="held")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    items = relationship("ReservationItem", lazy="selectin",
+                         order_by="ReservationItem.product_id")
+
+
+class ReservationItem(Base):
+    __tablename__ = "reservation_items"
+
+    id = Column(Integer, primary_key=True)
+    reservation_id = Column(Integer, ForeignKey("reservations.id"), nullable=False,
+                            index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
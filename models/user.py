@@ -23,3 +23,5 @@ class UsedToken(Base):
     token_hash = Column(String(255), unique=True, nullable=False, index=True)
     used_at = Column(DateTime(timezone=True), server_default=func.now())
     user_email = Column(String(100), nullable=False)
+    # When the token stops validating; the row can be purged after that
+    expires_at = Column(DateTime(timezone=True), nullable=True, index=True)
@@ -1,4 +1,9 @@
 from .auth import router as auth_router
 from .products import router as products_router
+from .internal import router as internal_router
+from .metrics import router as metrics_router
+from .reservations import router as reservations_router
+from .jwks import router as jwks_router
 
-__all__ = ["auth_router", "products_router"]
+__all__ = ["auth_router", "products_router", "internal_router", "metrics_router",
+           "reservations_router", "jwks_router"]
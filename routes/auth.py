@@ -1,11 +1,15 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from config import get_db, Base, engine
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_async_db
+from config.settings import settings
 from utils import (
-    hash_password, verify_password,
-    create_access_token,
-    get_current_user
+    hash_password_async, verify_password_async,
+    needs_rehash, upgrade_password_hash,
+    create_access_token, decode_token,
+    get_current_user, get_current_user_for_update,
+    invalidate_user_cache
 )
 from models import User
 from schemas import (
@@ -13,59 +17,54 @@ from schemas import (
     ForgotPasswordRequest, ResetPasswordRequest,
     LoginResponse, MessageResponse, ProfileUpdateResponse, UserResponse
 )
-from services import send_reset_email, is_token_used, mark_token_as_used
-from jose import JWTError, jwt
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from services import (
+    send_reset_email, email_outbox, OutboxFullError,
+    is_token_used, mark_token_as_used, remember_used_token,
+    RESET_TOKEN_EXPIRE_MINUTES
+)
+from jose import JWTError
 
 # Configuration
-SECRET_KEY = os.getenv("SECRET_KEY", "SUPER_SECRET_KEY_CHANGE_THIS")
-ALGORITHM = "HS256"
-RESET_TOKEN_EXPIRE_MINUTES = 10
-FRONTEND_RESET_URL = os.getenv("FRONTEND_RESET_URL")
-
-# Create tables on first import
-try:
-    Base.metadata.create_all(bind=engine)
-except Exception as e:
-    print(f"Error creating tables: {e}")
+FRONTEND_RESET_URL = settings.frontend_reset_url
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/signup", status_code=status.HTTP_201_CREATED,
              response_model=MessageResponse)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         # Validate password confirmation
         if user.password != user.confirm_password:
             raise HTTPException(status_code=400, detail="Passwords do not match")
 
         # Check if username exists
-        if db.query(User).filter(User.username == user.username).first():
+        result = await db.execute(
+            select(User.id).where(User.username == user.username)
+        )
+        if result.first():
             raise HTTPException(status_code=400, detail="Username already taken")
         
         # Check if email exists
-        if db.query(User).filter(User.email == user.email).first():
+        result = await db.execute(select(User.id).where(User.email == user.email))
+        if result.first():
             raise HTTPException(status_code=400, detail="Email already registered")
 
         # Create new user with hashed pwd
         new_user = User(
             username=user.username,
             email=user.email,
-            password=hash_password(user.password)
+            password=await hash_password_async(user.password)
         )
         # Save to db
         db.add(new_user)
-        db.commit()
+        await db.commit()
         return MessageResponse(message="User registered successfully",
                                success=True)
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         # Check if it's a unique constraint violation
         error_str = str(e).lower()
         if "unique constraint" in error_str or "duplicate key" in error_str:
@@ -82,12 +81,21 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, background_tasks: BackgroundTasks,
+                db: AsyncSession = Depends(get_async_db)):
     # Find user by email
-    db_user = db.query(User).filter(User.email == user.email).first()
+    result = await db.execute(select(User).where(User.email == user.email))
+    db_user = result.scalars().first()
     # Verifications
-    if not db_user or not verify_password(user.password, db_user.password):
+    if not db_user or not await verify_password_async(
+        user.password, db_user.password
+    ):
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    # Upgrade hashes from an older scheme or cost once the response is out
+    if needs_rehash(db_user.password):
+        background_tasks.add_task(
+            upgrade_password_hash, db_user.id, user.password, db_user.password
+        )
 
     # Create jwt token
     return LoginResponse(
@@ -98,56 +106,58 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/forgot-password", response_model=MessageResponse)
-def forgot_password(
-    data: ForgotPasswordRequest, db: Session = Depends(get_db)
+async def forgot_password(
+    data: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_db)
 ):
-    """Send password reset email to user"""
+    """
+    Queue a password reset email for the user.
+    The response is the same whether or not the email is registered.
+    """
+    if email_outbox.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Unable to process password reset request, try again later",
+            headers={"Retry-After": "5"}
+        )
     try:
         # Find user by email
-        user = db.query(User).filter(User.email == data.email).first()
-        if not user:
-            return MessageResponse(
-                message="Password reset link has been sent.",
-                success=True
-            )
+        result = await db.execute(select(User.email).where(User.email == data.email))
+        email = result.scalar()
 
-        # Generate reset token
+        # Generate reset token either way so both paths cost the same
         token = create_access_token(
-            {"sub": user.email, "type": "password_reset"},
+            {"sub": data.email, "type": "password_reset"},
             expires_delta=timedelta(minutes=RESET_TOKEN_EXPIRE_MINUTES)
         )
-        reset_link = f"{FRONTEND_RESET_URL}?token={token}"
-
-        # Attempt to send email
-        try:
-            send_reset_email(user.email, reset_link)
-            return MessageResponse(
-                message="Password reset link has been sent, please check.",
-                success=True
-            )
-        except Exception:
-            # Still return success to not reveal if email exists
-            return MessageResponse(
-                message="Password reset link has been sent.",
-                success=True
-            )
+        if email:
+            # Rendering and sending happen on the outbox workers
+            send_reset_email(email, f"{FRONTEND_RESET_URL}?token={token}")
+    except OutboxFullError:
+        # Still return success to not reveal if email exists
+        print("❌ Email outbox is full, dropped password reset email")
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Unable to process password reset request"
         )
+    return MessageResponse(
+        message="Password reset link has been sent.",
+        success=True
+    )
 
 
 @router.post("/reset-password", response_model=MessageResponse)
-def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(
+    data: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)
+):
     """Reset user password using token"""
+    # Tokens already used through this worker are rejected without the DB
+    if is_token_used(data.token):
+        raise HTTPException(status_code=400,
+                            detail="Reset link has already been used")
     try:
-        # Check if token has been used
-        if is_token_used(data.token, db):
-            raise HTTPException(status_code=400,
-                                detail="Reset link has already been used")
         # Decode and validate token
-        payload = jwt.decode(data.token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(data.token)
         email = payload.get("sub")
         token_type = payload.get("type")
         if not email or token_type != "password_reset":
@@ -155,15 +165,21 @@ def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid reset token"
             )
-    except JWTError:
+        expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    except (JWTError, KeyError):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired reset token"
         )
 
     try:
-        # Find user and update password
-        user = db.query(User).filter(User.email == email).first()
+        # Find the user, then end the read so no transaction or connection
+        # is held while hashing
+        result = await db.execute(
+            select(User.id, User.password).where(User.email == email)
+        )
+        user = result.first()
+        await db.rollback()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -171,17 +187,24 @@ def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
             )
 
         # Check if new password is different from current password
-        if verify_password(data.new_password, user.password):
+        if await verify_password_async(data.new_password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="New password must be different from your old password"
             )
+        new_password = await hash_password_async(data.new_password)
 
-        # Mark token as used BEFORE updating password
-        mark_token_as_used(data.token, user.email, db)
-        # Update password
-        user.password = hash_password(data.new_password)
-        db.commit()
+        # Claim the token and update the password in one short transaction;
+        # the insert fails if another request used the token first
+        if not await mark_token_as_used(data.token, email, expires_at, db):
+            raise HTTPException(status_code=400,
+                                detail="Reset link has already been used")
+        await db.execute(
+            update(User).where(User.id == user.id).values(password=new_password)
+        )
+        await db.commit()
+        remember_used_token(data.token, expires_at)
+        invalidate_user_cache(email)
 
         return MessageResponse(
             message="Password reset successful.",
@@ -190,7 +213,7 @@ def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to reset password"
@@ -198,10 +221,10 @@ def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
 
 
 @router.patch("/profile", response_model=ProfileUpdateResponse)
-def update_profile(
+async def update_profile(
     user_data: UserUpdate,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user profile information - requires JWT authentication"""
     try:
@@ -224,8 +247,9 @@ def update_profile(
             )
 
         # Commit changes
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        invalidate_user_cache(user.email)
+        await db.refresh(user)
 
         return ProfileUpdateResponse(
             message=f"Updated successfully: {', '.join(updated_fields)}",
@@ -235,7 +259,7 @@ def update_profile(
     except HTTPException:
         raise
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update profile"
@@ -243,8 +267,8 @@ def update_profile(
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(
+async def get_current_user_info(
     user: User = Depends(get_current_user)
 ):
     """Get current user information - requires JWT authentication"""
-    return UserResponse.model_validate(user)
+    return user
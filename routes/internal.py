@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_async_db, pool_stats, replicas
+from services.product_cache import product_cache
+from services.product_facets import check_facets
+from services.email_outbox import email_outbox
+from utils import auth_cache_stats, get_current_admin
+from utils.compression import compression_stats
+
+# Diagnostics, some of them expensive (the facet check recomputes every
+# count), so only for admins
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False,
+                   dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Hit, miss and eviction counters of the in-process caches"""
+    return {"products": product_cache.stats(), **auth_cache_stats()}
+
+
+@router.get("/outbox")
+async def outbox_stats():
+    """Email outbox queue depth and delivery counters"""
+    return email_outbox.stats()
+
+
+@router.get("/pool")
+async def database_pool_stats():
+    """Connection pool occupancy, checkout waits and connection churn"""
+    return pool_stats()
+
+
+@router.get("/replicas")
+async def replica_stats():
+    """Read replica health and reads per replica and on the primary"""
+    return replicas.stats()
+
+
+@router.get("/compression")
+async def response_compression_stats():
+    """Bytes in and out, ratio and CPU time of response compression"""
+    return compression_stats()
+
+
+@router.get("/facets")
+async def facet_consistency(db: AsyncSession = Depends(get_async_db)):
+    """Compare the facet aggregates with a full GROUP BY recompute"""
+    return await check_facets(db)
@@ -0,0 +1,21 @@
+import hashlib
+from fastapi import APIRouter, Request, Response
+from config.settings import settings
+from utils.http_cache import etag_matches
+from utils.jwt_keys import key_ring
+
+router = APIRouter(tags=["Auth"])
+
+JWKS_MAX_AGE = settings.jwks_max_age
+
+
+@router.get("/.well-known/jwks.json")
+def jwks(request: Request):
+    """Public keys that sign access tokens, for verifying them locally"""
+    key_ring.ensure_loaded()
+    body = key_ring.jwks
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={JWKS_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,74 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from config.database import pool_metrics
+from services.product_cache import product_cache
+from services.email_outbox import email_outbox
+from utils import auth_cache_stats
+from utils.metrics import registry
+
+router = APIRouter(tags=["internal"], include_in_schema=False)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _cache_families():
+    caches = {"products": product_cache.stats(), **auth_cache_stats()}
+    for name, kind, key in (
+        ("app_cache_hits_total", "counter", "hits"),
+        ("app_cache_misses_total", "counter", "misses"),
+        ("app_cache_evictions_total", "counter", "evictions"),
+        ("app_cache_entries", "gauge", "size"),
+    ):
+        yield name, kind, f"In-process cache {key}", [
+            (name, {"cache": cache}, stats[key]) for cache, stats in caches.items()
+        ]
+
+
+def _pool_families():
+    stats = {name: metrics.stats() for name, metrics in pool_metrics.items()}
+    for name, kind, key in (
+        ("db_pool_checked_out", "gauge", "checked_out"),
+        ("db_pool_overflow", "gauge", "overflow"),
+        ("db_pool_checkouts_total", "counter", "checkouts"),
+        ("db_pool_connects_total", "counter", "connects"),
+        ("db_pool_closes_total", "counter", "closes"),
+        ("db_pool_timeouts_total", "counter", "timeouts"),
+    ):
+        yield name, kind, f"Connection pool {key.replace('_', ' ')}", [
+            (name, {"engine": engine}, pool[key])
+            for engine, pool in stats.items() if key in pool
+        ]
+
+    name = "db_pool_checkout_wait_seconds"
+    samples = []
+    for engine, metrics in pool_metrics.items():
+        buckets = metrics.stats()["wait"]["buckets"]
+        for bound, count in buckets.items():
+            samples.append((f"{name}_bucket",
+                            {"engine": engine, "le": bound[3:]}, count))
+        samples.append((f"{name}_sum", {"engine": engine}, metrics.wait_sum))
+        samples.append((f"{name}_count", {"engine": engine},
+                        sum(metrics.wait_buckets)))
+    yield name, "histogram", "Time spent waiting for a pooled connection", samples
+
+
+def _outbox_families():
+    stats = email_outbox.stats()
+    yield "email_outbox_queued", "gauge", "Emails waiting to be sent", [
+        ("email_outbox_queued", {}, stats["queued"])
+    ]
+    for key in ("sent", "retried", "failed", "dropped"):
+        name = f"email_outbox_{key}_total"
+        yield name, "counter", f"Emails {key}", [(name, {}, stats[key])]
+
+
+registry.add_collector(_cache_families)
+registry.add_collector(_pool_families)
+registry.add_collector(_outbox_families)
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(registry.render(),
+                             media_type=PROMETHEUS_CONTENT_TYPE)
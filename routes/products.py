@@ -1,36 +1,254 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from config.database import get_db
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Literal
+from config.database import get_async_db
+from config.replicas import get_read_db, is_replica
+from config.settings import settings
 from models.product import Product
-from schemas.product import ProductResponse
+from schemas.product import (
+    BulkUpsertResponse, ProductCreate, ProductFacets, ProductResponse, ProductUpdate,
+)
+from services.product_cache import product_cache
+from services.product_facets import get_facets
+from services.product_search import search_products
+from services.product_service import (
+    PRODUCT_COLUMNS, bulk_upsert_products, create_product, delete_product,
+    encode_product, encode_products, expected_versions, list_products,
+    product_etag, update_product,
+)
+from utils import get_current_admin
+from utils.http_cache import cached_response
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+facets_adapter = TypeAdapter(ProductFacets)
+
+# Ranked results are paged by offset; deep pages are not useful
+MAX_SEARCH_OFFSET = 1000
+PRODUCT_BULK_MAX = settings.product_bulk_max
+# Fields that cannot be cleared with an explicit null
+REQUIRED_FIELDS = {"name", "price", "category", "stock_quantity", "is_active"}
+
+
+def product_response(product, status_code: int = 200,
+                     headers: dict | None = None) -> Response:
+    return Response(
+        content=encode_product(product), status_code=status_code,
+        media_type="application/json",
+        headers={**(headers or {}), "ETag": product_etag(product.id, product.version)},
+    )
+
 
 @router.get("/", response_model=List[ProductResponse])
-def get_all_products(db: Session = Depends(get_db)):
+async def get_all_products(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    sort: Literal["id", "price", "created_at"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    category: str | None = None,
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Fetch a page of products, ordered by `sort` and paginated by keyset.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    key = ("list", tuple(sorted(request.query_params.multi_items())))
+    entry = product_cache.get(key)
+    if entry is None:
+        snapshot = product_cache.snapshot()
+        try:
+            products, next_cursor = await list_products(
+                db, limit, cursor=cursor, sort=sort, order=order,
+                category=category, min_price=min_price, max_price=max_price
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching products: {str(e)}")
+
+        headers = {}
+        if next_cursor:
+            next_url = request.url.include_query_params(cursor=next_cursor)
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        body = encode_products(products)
+        entry = product_cache.put(key, body, headers, snapshot,
+                                  replica=is_replica(db),
+                                  product_ids=[p.id for p in products])
+    return cached_response(request, entry.body, entry.etag, entry.headers,
+                           entry.encoded)
+
+
+@router.get("/search", response_model=List[ProductResponse])
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Full-text search over product names and descriptions, best match first.
+    Every word must match, the last letters of a word may be left out.
+    The total number of matches is returned in the X-Total-Count header.
+    """
+    key = ("search", tuple(sorted(request.query_params.multi_items())))
+    entry = product_cache.get(key)
+    if entry is None:
+        snapshot = product_cache.snapshot()
+        try:
+            products, total = await search_products(db, q, limit, offset)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error searching products: {str(e)}")
+
+        headers = {"X-Total-Count": str(total)}
+        if offset + limit < total and offset + limit <= MAX_SEARCH_OFFSET:
+            next_url = request.url.include_query_params(offset=offset + limit)
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        body = encode_products(products)
+        entry = product_cache.put(key, body, headers, snapshot,
+                                  replica=is_replica(db),
+                                  product_ids=[p.id for p in products])
+    return cached_response(request, entry.body, entry.etag, entry.headers,
+                           entry.encoded)
+
+
+@router.get("/facets", response_model=ProductFacets)
+async def facets(
+    request: Request,
+    category: str | None = None,
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
     """
-    Fetch all products from the database
+    Product counts per category and price range, and in stock, under the
+    listing filters. The category counts ignore the category filter and the
+    price ranges ignore the price filter.
     """
-    try:
-        products = db.query(Product).filter(Product.is_active == True).all()
-        return products
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching products: {str(e)}")
+    key = ("facets", tuple(sorted(request.query_params.multi_items())))
+    entry = product_cache.get(key)
+    if entry is None:
+        snapshot = product_cache.snapshot()
+        try:
+            counts = await get_facets(db, category, min_price, max_price)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error counting products: {str(e)}")
+        body = facets_adapter.dump_json(facets_adapter.validate_python(counts))
+        entry = product_cache.put(key, body, None, snapshot,
+                                  replica=is_replica(db))
+    return cached_response(request, entry.body, entry.etag, entry.headers,
+                           entry.encoded)
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product_by_id(product_id: int, db: Session = Depends(get_db)):
+async def get_product_by_id(
+    product_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Fetch a single product by ID
     """
-    try:
-        product = db.query(Product).filter(Product.id == product_id, Product.is_active == True).first()
-        if not product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        return product
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching product: {str(e)}")
\ No newline at end of file
+    key = ("product", product_id)
+    entry = product_cache.get(key)
+    if entry is None:
+        snapshot = product_cache.snapshot()
+        try:
+            result = await db.execute(
+                select(*PRODUCT_COLUMNS)
+                .where(Product.id == product_id, Product.is_active == True)
+            )
+            product = result.first()
+            if not product:
+                raise HTTPException(status_code=404, detail="Product not found")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching product: {str(e)}")
+
+        body = encode_product(product)
+        # Versioned, so clients can send it back in If-Match
+        entry = product_cache.put(key, body, None, snapshot,
+                                  etag=product_etag(product.id, product.version),
+                                  replica=is_replica(db), product_ids=[product_id])
+    return cached_response(request, entry.body, entry.etag, entry.headers,
+                           entry.encoded)
+
+
+@router.post("/", response_model=ProductResponse, status_code=201,
+             dependencies=[Depends(get_current_admin)])
+async def create(
+    product: ProductCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a product - admins only"""
+    created = await create_product(db, product)
+    location = request.url_for("get_product_by_id", product_id=created.id)
+    return product_response(created, 201, {"Location": str(location)})
+
+
+@router.post("/bulk", response_model=BulkUpsertResponse,
+             dependencies=[Depends(get_current_admin)])
+async def bulk_upsert(
+    items: List[Dict[str, Any]] = Body(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create or replace many products in one request - admins only. Items
+    without an ``id`` are inserted; items with one replace that product, or
+    create it with that id, only if it is still at ``version`` when given.
+    Every item gets a result, in input order.
+    """
+    if len(items) > PRODUCT_BULK_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {PRODUCT_BULK_MAX} products per request"
+        )
+    results = await bulk_upsert_products(db, items)
+    counts = {"created": 0, "updated": 0}
+    for result in results:
+        if result["status"] in counts:
+            counts[result["status"]] += 1
+    return {**counts, "failed": len(results) - sum(counts.values()),
+            "results": results}
+
+
+@router.patch("/{product_id}", response_model=ProductResponse,
+              dependencies=[Depends(get_current_admin)])
+async def patch(
+    product_id: int,
+    changes: ProductUpdate,
+    if_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update some fields of a product - admins only.
+    With If-Match, the update only applies to the product version named
+    by the ETag and fails with 412 otherwise.
+    """
+    values = changes.model_dump(exclude_unset=True)
+    for field in REQUIRED_FIELDS & values.keys():
+        if values[field] is None:
+            raise HTTPException(status_code=422, detail=f"{field} cannot be null")
+    product = await update_product(db, product_id, values,
+                                   expected_versions(if_match, product_id))
+    return product_response(product)
+
+
+@router.delete("/{product_id}", status_code=204,
+               dependencies=[Depends(get_current_admin)])
+async def delete(
+    product_id: int,
+    if_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete a product - admins only; If-Match as for PATCH"""
+    await delete_product(db, product_id, expected_versions(if_match, product_id))
+    return Response(status_code=204)
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import get_async_db
+from models.user import User
+from schemas.reservation import ReservationCreate, ReservationResponse
+from services.reservation_service import (
+    confirm_reservation, get_reservation, release_reservation, reserve_stock,
+)
+from utils import get_current_user
+
+router = APIRouter(prefix="/reservations", tags=["reservations"])
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED,
+             response_model=ReservationResponse)
+async def create_reservation(
+    data: ReservationCreate,
+    response: Response,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Hold stock for every item or fail with 409 without holding any"""
+    reservation = await reserve_stock(db, user.id, data.items)
+    response.headers["Location"] = f"/reservations/{reservation.id}"
+    return reservation
+
+
+@router.get("/{reservation_id}", response_model=ReservationResponse)
+async def read_reservation(
+    reservation_id: int,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await get_reservation(db, reservation_id, user.id)
+
+
+@router.post("/{reservation_id}/confirm", response_model=ReservationResponse)
+async def confirm(
+    reservation_id: int,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await confirm_reservation(db, reservation_id, user.id)
+
+
+@router.delete("/{reservation_id}", status_code=204)
+async def release(
+    reservation_id: int,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    await release_reservation(db, reservation_id, user.id)
+    return Response(status_code=204)
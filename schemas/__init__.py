@@ -14,7 +14,19 @@ from .product import (
     ProductBase,
     ProductCreate,
     ProductUpdate,
+    ProductUpsert,
     ProductResponse,
+    BulkItemResult,
+    BulkUpsertResponse,
+    FacetCount,
+    PriceRangeCount,
+    ProductFacets,
+)
+from .reservation import (
+    ReservationItemIn,
+    ReservationCreate,
+    ReservationItemResponse,
+    ReservationResponse,
 )
 
 __all__ = [
@@ -31,5 +43,15 @@ __all__ = [
     "ProductBase",
     "ProductCreate",
     "ProductUpdate",
+    "ProductUpsert",
     "ProductResponse",
+    "BulkItemResult",
+    "BulkUpsertResponse",
+    "FacetCount",
+    "PriceRangeCount",
+    "ProductFacets",
+    "ReservationItemIn",
+    "ReservationCreate",
+    "ReservationItemResponse",
+    "ReservationResponse",
 ]
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
 
 class ProductBase(BaseModel):
@@ -25,10 +25,51 @@ class ProductUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class ProductUpsert(ProductBase):
+    """Bulk item: inserted without ``id``, replaces product ``id`` otherwise"""
+    id: Optional[int] = Field(None, ge=1, le=2**31 - 1)
+    # Expected current version; the item conflicts when the product moved on
+    version: Optional[int] = Field(None, ge=1)
+
+
 class ProductResponse(ProductBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: Literal["created", "updated", "conflict", "invalid"]
+    id: Optional[int] = None
+    version: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkUpsertResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class PriceRangeCount(BaseModel):
+    min: float
+    max: Optional[float] = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    total: int
+    in_stock: int
+    categories: List[FacetCount]
+    price_ranges: List[PriceRangeCount]
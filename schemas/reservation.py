@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List
+
+
+class ReservationItemIn(BaseModel):
+    product_id: int = Field(ge=1)
+    quantity: int = Field(ge=1, le=1000)
+
+
+class ReservationCreate(BaseModel):
+    items: List[ReservationItemIn] = Field(min_length=1, max_length=50)
+
+
+class ReservationItemResponse(BaseModel):
+    product_id: int
+    quantity: int
+
+    class Config:
+        from_attributes = True
+
+
+class ReservationResponse(BaseModel):
+    id: int
+    status: str
+    expires_at: datetime
+    items: List[ReservationItemResponse]
+
+    class Config:
+        from_attributes = True
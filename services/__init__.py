@@ -1,8 +1,24 @@
 from .email_service import send_reset_email
-from .token_service import is_token_used, mark_token_as_used
+from .email_outbox import email_outbox, OutboxFullError
+from .token_service import (
+    is_token_used,
+    mark_token_as_used,
+    remember_used_token,
+    purge_expired_tokens,
+    start_token_sweeper,
+    stop_token_sweeper,
+    RESET_TOKEN_EXPIRE_MINUTES,
+)
 
 __all__ = [
     "send_reset_email",
+    "email_outbox",
+    "OutboxFullError",
     "is_token_used",
     "mark_token_as_used",
+    "remember_used_token",
+    "purge_expired_tokens",
+    "start_token_sweeper",
+    "stop_token_sweeper",
+    "RESET_TOKEN_EXPIRE_MINUTES",
 ]
@@ -0,0 +1,209 @@
+"""
+In-process notifications about product changes.
+
+Code that writes products calls ``publish_catalog_change`` with the ids it
+touched, or with no ids after bulk changes; reservations only change stock
+and call ``publish_stock_change`` instead. Derived state (the response
+cache, the search index, the facet counts) subscribes and updates itself;
+``CatalogView`` is the base for state that is derived from product rows.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable
+from sqlalchemy import literal, or_, select
+from config.database import AsyncSessionLocal, engine
+from config.settings import settings
+from models.product import Product
+
+# Polls re-read rows this far behind the newest updated_at seen: a Postgres
+# transaction stamps now() when it starts, so a row can commit with an
+# updated_at older than rows that were already read
+CATALOG_POLL_OVERLAP = timedelta(seconds=settings.catalog_poll_overlap)
+
+CatalogListener = Callable[[frozenset[int] | None], None]
+
+_listeners: list[CatalogListener] = []
+_stock_listeners: list[CatalogListener] = []
+
+
+def subscribe(listener: CatalogListener) -> CatalogListener:
+    """Register ``listener``; it gets the changed ids, or None for "any"."""
+    _listeners.append(listener)
+    return listener
+
+
+def subscribe_stock(listener: CatalogListener) -> CatalogListener:
+    """Register ``listener`` for stock changes; it gets the changed ids."""
+    _stock_listeners.append(listener)
+    return listener
+
+
+def _notify(listeners: list[CatalogListener], ids: frozenset[int] | None) -> None:
+    for listener in listeners:
+        try:
+            listener(ids)
+        except Exception as e:
+            print(f"❌ Catalog listener {listener.__name__} failed: {e}")
+
+
+def publish_catalog_change(product_ids: Iterable[int] | None = None) -> None:
+    _notify(_listeners, frozenset(product_ids) if product_ids is not None else None)
+
+
+def publish_stock_change(product_ids: Iterable[int]) -> None:
+    """Only the stock of ``product_ids`` changed (reservations)"""
+    _notify(_stock_listeners, frozenset(product_ids))
+
+
+class CatalogView:
+    """
+    State derived from the products table, built in a worker thread at
+    startup and then updated incrementally: ids published through catalog
+    events are re-read before the next read, and a periodic poll of new ids
+    and ``updated_at`` picks up changes made by other processes (such as
+    the catalog import).
+
+    Subclasses name the product ``columns`` they need and implement
+    ``create``, ``apply`` (a changed row) and ``discard`` (a deleted id);
+    ``finish`` runs once the initial build has applied every row.
+    """
+    name = "catalog view"
+    columns: tuple = ()
+    refresh_interval: float = 5
+    BUILD_BATCH = 10000
+
+    def __init__(self):
+        self.state: Any = None
+        self._watermark: datetime | None = None
+        # updated_at of the rows applied within CATALOG_POLL_OVERLAP of the
+        # watermark, so polls skip the ones that did not change again
+        self._recent: dict[int, datetime] = {}
+        self._max_id = 0
+        self._dirty: set[int] = set()
+        self._stale = False
+        self._lock = asyncio.Lock()
+        self._build_task: asyncio.Task | None = None
+        self._refresher: asyncio.Task | None = None
+
+    def create(self) -> Any:
+        raise NotImplementedError
+
+    def apply(self, state: Any, row) -> None:
+        raise NotImplementedError
+
+    def discard(self, state: Any, product_id: int) -> None:
+        raise NotImplementedError
+
+    def finish(self, state: Any) -> None:
+        pass
+
+    def on_catalog_change(self, product_ids: frozenset[int] | None) -> None:
+        if product_ids is None:
+            self._stale = True
+        else:
+            self._dirty |= product_ids
+
+    def _select(self):
+        return select(Product.id, Product.updated_at, *self.columns)
+
+    def _apply(self, state: Any, rows, force: set[int] = frozenset()) -> None:
+        for row in rows:
+            id, updated_at = row.id, row.updated_at
+            if updated_at is not None and self._recent.get(id) == updated_at \
+                    and id not in force:
+                continue
+            self.apply(state, row)
+            self._max_id = max(self._max_id, id)
+            if updated_at is None:
+                continue
+            if self._watermark is None or updated_at > self._watermark:
+                self._watermark = updated_at
+            if updated_at >= self._watermark - CATALOG_POLL_OVERLAP:
+                self._recent[id] = updated_at
+
+    def _forget_old(self) -> None:
+        """Drop remembered rows that fell out of the overlap"""
+        if self._watermark is not None:
+            horizon = self._watermark - CATALOG_POLL_OVERLAP
+            self._recent = {id: updated_at for id, updated_at in self._recent.items()
+                            if updated_at >= horizon}
+
+    def _build(self) -> Any:
+        """Derive the state from the whole catalog; runs in a worker thread"""
+        state = self.create()
+        with engine.connect() as conn:
+            result = conn.execution_options(yield_per=self.BUILD_BATCH).execute(
+                self._select().order_by(Product.id)
+            )
+            for rows in result.partitions():
+                self._apply(state, rows)
+        self._forget_old()
+        self.finish(state)
+        return state
+
+    async def _initial_build(self) -> None:
+        self.state = await asyncio.to_thread(self._build)
+        print(f"{self.name.capitalize()} built")
+
+    async def start(self) -> None:
+        if self._build_task is None:
+            self._build_task = asyncio.create_task(self._initial_build())
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        for task in (self._build_task, self._refresher):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(t for t in (self._build_task, self._refresher) if t),
+                             return_exceptions=True)
+        self._build_task = self._refresher = None
+
+    async def refresh(self) -> None:
+        """Re-read products changed since the last build or refresh"""
+        async with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if self._stale:
+                # Bulk change in this process: re-apply the overlap too
+                self._recent = {}
+                self._stale = False
+            changed = [Product.id > self._max_id]
+            if self._watermark is not None:
+                # Re-read the overlap (timestamps can also be coarse),
+                # skipping rows already applied at the same updated_at
+                changed.append(
+                    Product.updated_at >= literal(
+                        self._watermark - CATALOG_POLL_OVERLAP, Product.updated_at.type
+                    )
+                )
+            if dirty:
+                changed.append(Product.id.in_(dirty))
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(self._select().where(or_(*changed)))
+                rows = result.all()
+            self._apply(self.state, rows, dirty)
+            self._forget_old()
+            # Dirty ids that no longer exist were deleted
+            for id in dirty - {row.id for row in rows}:
+                self.discard(self.state, id)
+
+    async def _refresh_loop(self) -> None:
+        await self._build_task
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"❌ {self.name.capitalize()} refresh failed: {e}")
+
+    def built(self) -> bool:
+        return self.state is not None
+
+    async def ready(self) -> Any:
+        """The state, built and with this process's own changes applied"""
+        if self._build_task is None:
+            await self.start()
+        if self.state is None:
+            await asyncio.shield(self._build_task)
+        if self._dirty or self._stale:
+            await self.refresh()
+        return self.state
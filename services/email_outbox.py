@@ -0,0 +1,208 @@
+"""
+Background email outbox.
+
+Request handlers enqueue messages and return immediately. A few worker tasks
+each keep one authenticated SMTP connection open, drain the queue in batches
+over that connection and retry failed messages with exponential backoff.
+"""
+import asyncio
+import random
+import smtplib
+import time
+from dataclasses import dataclass
+from typing import Callable
+from config.settings import settings
+from .email_templates import to_quoted_printable
+
+SMTP_SERVER = settings.smtp_server
+SMTP_PORT = settings.smtp_port
+SMTP_STARTTLS = settings.smtp_starttls
+EMAIL_ADDRESS = settings.email_address
+EMAIL_PASSWORD = settings.email_password
+
+OUTBOX_QUEUE_SIZE = settings.outbox_queue_size
+OUTBOX_WORKERS = settings.outbox_workers
+OUTBOX_BATCH_SIZE = settings.outbox_batch_size
+OUTBOX_MAX_ATTEMPTS = settings.outbox_max_attempts
+OUTBOX_RETRY_DELAY = settings.outbox_retry_delay
+# Connections idle for longer than this are checked with NOOP before reuse
+SMTP_IDLE_CHECK = 30
+
+
+class OutboxFullError(Exception):
+    """Raised when the outbox queue cannot take more messages"""
+
+
+@dataclass
+class OutgoingEmail:
+    to: str
+    build: Callable[[], bytes]
+    attempts: int = 0
+
+
+class SMTPConnection:
+    """One lazily opened, reusable SMTP session"""
+
+    def __init__(self):
+        self._server: smtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=10)
+        if SMTP_STARTTLS:
+            server.starttls()
+        if EMAIL_PASSWORD:
+            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
+        # Learn the extensions (8BITMIME) before the first message; STARTTLS
+        # forgets them and a plain session has not greeted yet
+        server.ehlo_or_helo_if_needed()
+        return server
+
+    def _get(self) -> smtplib.SMTP:
+        if self._server is not None and \
+                time.monotonic() - self._last_used > SMTP_IDLE_CHECK:
+            try:
+                self._server.noop()
+            except smtplib.SMTPException:
+                self.close()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def _sendmail(self, to: str, message: bytes) -> None:
+        server = self._get()
+        # Rendered templates use 8bit UTF-8 bodies
+        if server.has_extn("8bitmime"):
+            options = ["BODY=8BITMIME"]
+        else:
+            options = []
+            message = to_quoted_printable(message)
+        server.sendmail(EMAIL_ADDRESS, to, message, mail_options=options)
+
+    def send(self, to: str, message: bytes) -> None:
+        try:
+            self._sendmail(to, message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # The server dropped an idle session; reconnect once
+            self.close()
+            self._sendmail(to, message)
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+
+class EmailOutbox:
+    def __init__(self, maxsize: int = OUTBOX_QUEUE_SIZE,
+                 workers: int = OUTBOX_WORKERS):
+        self.queue: asyncio.Queue[OutgoingEmail] = asyncio.Queue(maxsize)
+        self.workers = workers
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self._tasks: list[asyncio.Task] = []
+
+    def is_full(self) -> bool:
+        return self.queue.full()
+
+    def enqueue(self, to: str, build: Callable[[], bytes]) -> None:
+        """Queue a message; ``build`` renders it to bytes later on a worker"""
+        if not self._tasks:
+            # Nothing would ever send it (email not configured or not started)
+            self.dropped += 1
+            print(f"❌ Email to {to} dropped: email is not configured")
+            return
+        try:
+            self.queue.put_nowait(OutgoingEmail(to, build))
+        except asyncio.QueueFull:
+            raise OutboxFullError("Email outbox is full")
+
+    async def start(self) -> None:
+        if not EMAIL_ADDRESS:
+            print("❌ Email not configured! Set EMAIL_ADDRESS to send emails.")
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 5) -> None:
+        """Give queued messages a moment to go out, then stop the workers"""
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Email outbox stopped with {self.queue.qsize()} queued")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        connection = SMTPConnection()
+        try:
+            while True:
+                batch = [await self.queue.get()]
+                while len(batch) < OUTBOX_BATCH_SIZE and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                try:
+                    failed = await asyncio.to_thread(
+                        self._send_batch, connection, batch
+                    )
+                    for item in failed:
+                        self._retry(item)
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+        finally:
+            await asyncio.to_thread(connection.close)
+
+    def _send_batch(self, connection: SMTPConnection,
+                    batch: list[OutgoingEmail]) -> list[OutgoingEmail]:
+        """Send a batch over one connection; return the messages that failed"""
+        failed = []
+        for item in batch:
+            try:
+                connection.send(item.to, item.build())
+                self.sent += 1
+            except Exception as e:
+                print(f"❌ Email to {item.to} failed: {e}")
+                connection.close()
+                failed.append(item)
+        return failed
+
+    def _retry(self, item: OutgoingEmail) -> None:
+        item.attempts += 1
+        if item.attempts >= OUTBOX_MAX_ATTEMPTS:
+            self.failed += 1
+            print(f"❌ Giving up on email to {item.to} after {item.attempts} attempts")
+            return
+        delay = OUTBOX_RETRY_DELAY * 2 ** (item.attempts - 1)
+        delay *= random.uniform(0.5, 1.5)
+        self.retried += 1
+        asyncio.get_running_loop().call_later(delay, self._requeue, item)
+
+    def _requeue(self, item: OutgoingEmail) -> None:
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.failed += 1
+            print(f"❌ Dropped retry of email to {item.to}: outbox is full")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+email_outbox = EmailOutbox()
@@ -0,0 +1,257 @@
+"""
+Precompiled email templates.
+
+Templates are parsed once when registered: the MIME headers, part boundaries
+and the static text are encoded to bytes up front, so rendering a message only
+encodes the per-recipient fields and joins byte strings.
+"""
+import email
+import html
+import re
+import secrets
+from email import charset, policy
+from email.header import Header
+from email.utils import formatdate, make_msgid
+from string import Formatter
+from typing import Iterable
+
+# Body encoding for servers without 8BITMIME
+_QP_UTF8 = charset.Charset("utf-8")
+_QP_UTF8.body_encoding = charset.QP
+
+
+def _escape_text(value) -> str:
+    # Field values must never start a new header or MIME line
+    return re.sub(r"[\r\n]+", " ", str(value))
+
+
+def _escape_html(value) -> str:
+    return html.escape(_escape_text(value))
+
+
+class CompiledTemplate:
+    """
+    A multipart/alternative message split into static byte chunks and
+    substitution slots. ``render`` fills the slots for one recipient.
+    """
+
+    def __init__(self, name: str, subject: str, text: str, html_body: str,
+                 sender: str):
+        self.name = name
+        self._domain = sender.rpartition("@")[2] or "localhost"
+        boundary = f"=={secrets.token_hex(16)}=="
+        subject_header = subject if subject.isascii() \
+            else Header(subject, "utf-8").encode()
+
+        chunks: list = []
+        self._add_static(chunks, (
+            f"From: {sender}\r\n"
+            f"Subject: {subject_header}\r\n"
+            "MIME-Version: 1.0\r\n"
+            f'Content-Type: multipart/alternative; boundary="{boundary}"\r\n'
+            "To: "
+        ))
+        chunks.append(("to", _escape_text))
+        self._add_static(chunks, "\r\nDate: ")
+        chunks.append(("date", _escape_text))
+        self._add_static(chunks, "\r\nMessage-ID: ")
+        chunks.append(("message_id", _escape_text))
+        self._add_static(chunks, "\r\n\r\n")
+        for subtype, source, escape in (("plain", text, _escape_text),
+                                        ("html", html_body, _escape_html)):
+            self._add_static(chunks, (
+                f"--{boundary}\r\n"
+                f"Content-Type: text/{subtype}; charset=\"utf-8\"\r\n"
+                "Content-Transfer-Encoding: 8bit\r\n\r\n"
+            ))
+            self._compile_body(chunks, source, escape)
+            self._add_static(chunks, "\r\n")
+        self._add_static(chunks, f"--{boundary}--\r\n")
+
+        # Static chunks are bytes, slots are (field, escape) pairs
+        self._chunks = chunks
+        self._slots = [
+            (index, *chunk)
+            for index, chunk in enumerate(chunks) if isinstance(chunk, tuple)
+        ]
+
+    @staticmethod
+    def _add_static(chunks: list, value: str) -> None:
+        data = value.replace("\r\n", "\n").replace("\n", "\r\n").encode("utf-8")
+        if chunks and isinstance(chunks[-1], bytes):
+            chunks[-1] += data
+        else:
+            chunks.append(data)
+
+    def _compile_body(self, chunks: list, source: str, escape) -> None:
+        for literal, field, _, _ in Formatter().parse(source):
+            if literal:
+                self._add_static(chunks, literal)
+            if field is not None:
+                chunks.append((field, escape))
+
+    def _render(self, to: str, context: dict, date: str) -> bytes:
+        values = {
+            **context,
+            "to": to,
+            "date": date,
+            "message_id": make_msgid(domain=self._domain),
+        }
+        out = self._chunks.copy()
+        for index, field, escape in self._slots:
+            out[index] = escape(values[field]).encode("utf-8")
+        return b"".join(out)
+
+    def render(self, to: str, context: dict) -> bytes:
+        """Render the complete message for one recipient as SMTP-ready bytes"""
+        return self._render(to, context, formatdate(usegmt=True))
+
+    def render_batch(self, recipients: Iterable[tuple[str, dict]]) -> list[bytes]:
+        """Render one message per (email, context) pair, sharing the Date header"""
+        date = formatdate(usegmt=True)
+        render = self._render
+        return [render(to, context, date) for to, context in recipients]
+
+
+_registry: dict[str, CompiledTemplate] = {}
+
+
+def register_template(name: str, subject: str, text: str, html_body: str,
+                      sender: str) -> CompiledTemplate:
+    """Compile a template and make it available under ``name``"""
+    template = CompiledTemplate(name, subject, text, html_body, sender)
+    _registry[name] = template
+    return template
+
+
+def get_template(name: str) -> CompiledTemplate:
+    return _registry[name]
+
+
+def render_email(name: str, to: str, **context) -> bytes:
+    return _registry[name].render(to, context)
+
+
+def render_batch(name: str, recipients: Iterable[tuple[str, dict]]) -> list[bytes]:
+    return _registry[name].render_batch(recipients)
+
+
+RESET_SUBJECT = "Password Reset Request"
+
+RESET_HTML = """\
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Password Reset</title>
+</head>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
+    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
+        <h1 style="color: white; margin: 0; font-size: 28px;">Password Reset Request</h1>
+    </div>
+
+    <div style="background: #f8f9fa; padding: 30px; border-radius: 0 0 10px 10px; border: 1px solid #e9ecef;">
+        <p style="font-size: 16px; margin-bottom: 20px;">Hello,</p>
+
+        <p style="font-size: 16px; margin-bottom: 25px;">
+            We received a request to reset your password. Click the button below to create a new password:
+        </p>
+
+        <div style="text-align: center; margin: 30px 0;">
+            <a href="{reset_link}"
+               style="background: #007bff; color: white; padding: 15px 30px; text-decoration: none; border-radius: 5px; font-size: 16px; font-weight: bold; display: inline-block; box-shadow: 0 2px 4px rgba(0,123,255,0.3);">
+                Reset My Password
+            </a>
+        </div>
+
+        <p style="font-size: 14px; color: #666; margin-top: 25px;">
+            Or copy and paste this link in your browser:<br>
+            <a href="{reset_link}" style="color: #007bff; word-break: break-all;">{reset_link}</a>
+        </p>
+
+        <div style="background: #fff3cd; border: 1px solid #ffeaa7; padding: 15px; border-radius: 5px; margin: 20px 0;">
+            <p style="margin: 0; font-size: 14px; color: #856404;">
+                <strong>⚠️ Important:</strong> This link expires in 10 minutes for security reasons.
+            </p>
+        </div>
+
+        <p style="font-size: 14px; color: #666; margin-top: 25px;">
+            If you didn't request this password reset, please ignore this email. Your password will remain unchanged.
+        </p>
+
+        <hr style="border: none; border-top: 1px solid #e9ecef; margin: 25px 0;">
+
+        <p style="font-size: 12px; color: #999; text-align: center; margin: 0;">
+            This is an automated message, please do not reply to this email.
+        </p>
+    </div>
+</body>
+</html>
+"""
+
+RESET_TEXT = """\
+Password Reset Request
+
+We received a request to reset your password.
+
+Click this link to reset your password:
+{reset_link}
+
+This link expires in 10 minutes.
+
+If you didn't request this, please ignore this email.
+"""
+
+WELCOME_SUBJECT = "Welcome aboard"
+
+WELCOME_HTML = """\
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Welcome</title>
+</head>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
+    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
+        <h1 style="color: white; margin: 0; font-size: 28px;">Welcome, {username}!</h1>
+    </div>
+
+    <div style="background: #f8f9fa; padding: 30px; border-radius: 0 0 10px 10px; border: 1px solid #e9ecef;">
+        <p style="font-size: 16px; margin-bottom: 20px;">Your account has been created and you can sign in right away.</p>
+
+        <hr style="border: none; border-top: 1px solid #e9ecef; margin: 25px 0;">
+
+        <p style="font-size: 12px; color: #999; text-align: center; margin: 0;">
+            This is an automated message, please do not reply to this email.
+        </p>
+    </div>
+</body>
+</html>
+"""
+
+WELCOME_TEXT = """\
+Welcome, {username}!
+
+Your account has been created and you can sign in right away.
+"""
+
+
+def to_quoted_printable(message: bytes) -> bytes:
+    """
+    Re-encode the 8bit parts of a rendered message as quoted-printable,
+    for servers that do not advertise 8BITMIME
+    """
+    if message.isascii():
+        return message
+    parsed = email.message_from_bytes(message, policy=policy.SMTP)
+    for part in parsed.walk():
+        if part.get("Content-Transfer-Encoding", "").lower() == "8bit":
+            body = part.get_payload(decode=True).decode("utf-8")
+            del part["Content-Transfer-Encoding"]
+            part.set_payload(body, _QP_UTF8)
+            if part is not parsed:
+                # set_payload adds one; it belongs on the top level only
+                del part["MIME-Version"]
+    return parsed.as_bytes(policy=policy.SMTP)
@@ -0,0 +1,123 @@
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+from config.settings import settings
+from services.catalog_events import subscribe, subscribe_stock
+from utils.cache import LRUCache
+from utils.http_cache import make_etag
+
+PRODUCT_CACHE_SIZE = settings.product_cache_size
+PRODUCT_CACHE_TTL = settings.product_cache_ttl
+REPLICA_MAX_LAG = settings.replica_max_lag
+# Product -> entries links kept per cache slot before they are all dropped;
+# links of evicted entries are otherwise only dropped with the version
+LINKS_PER_ENTRY = 256
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: dict = field(default_factory=dict)
+    # Compressed copies of body by content coding, filled on demand
+    encoded: dict = field(default_factory=dict)
+
+
+class ProductCache:
+    """
+    Serialized product responses keyed by route and query.
+    Entries are tagged with the catalog version they were built from, so
+    bumping the version makes every older entry unreachable. Stock changes
+    (reservations) only drop the entries that show the changed products.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.version = 0
+        self.changed_at = float("-inf")
+        self._entries = LRUCache(maxsize, ttl)
+        # Stock changes so far, and the last one of each product
+        self._stock_epoch = 0
+        self._stock_changed: dict[int, int] = {}
+        # Keys of the entries showing each product, and of the entries that
+        # depend on every product's stock
+        self._keys_by_product: dict[int, set] = {}
+        self._stock_wide: set = set()
+
+    def get(self, key) -> CachedResponse | None:
+        return self._entries.get((self.version, key))
+
+    def snapshot(self) -> tuple[int, int]:
+        """Take before reading the database; ``put`` checks it for races"""
+        return self.version, self._stock_epoch
+
+    def put(self, key, body: bytes, headers: dict | None, snapshot: tuple[int, int],
+            etag: str | None = None, replica: bool = False,
+            product_ids: Iterable[int] | None = None) -> CachedResponse:
+        """
+        Store a response built from the database as it was at ``snapshot``;
+        the ETag is derived from the body unless given. ``product_ids`` are
+        the products the response shows; None means it depends on the stock
+        of all of them. Responses read from a ``replica`` right after a
+        change may predate it and are not stored.
+        """
+        entry = CachedResponse(body, etag or make_etag(body), headers or {})
+        version, epoch = snapshot
+        # Skip responses that raced with a catalog or stock change
+        if version != self.version or \
+                (replica and time.monotonic() - self.changed_at < REPLICA_MAX_LAG):
+            return entry
+        if product_ids is None:
+            if epoch != self._stock_epoch:
+                return entry
+            self._stock_wide.add(key)
+        else:
+            product_ids = list(product_ids)
+            if any(self._stock_changed.get(id, 0) > epoch for id in product_ids):
+                return entry
+            for id in product_ids:
+                self._keys_by_product.setdefault(id, set()).add(key)
+        self._entries.set((version, key), entry)
+        if len(self._keys_by_product) > self._entries.maxsize * LINKS_PER_ENTRY:
+            self.invalidate()
+        return entry
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self.changed_at = time.monotonic()
+        self._entries.clear()
+        self._stock_changed.clear()
+        self._keys_by_product.clear()
+        self._stock_wide.clear()
+
+    def invalidate_stock(self, product_ids: Iterable[int]) -> None:
+        """Drop the entries showing ``product_ids`` and the stock-wide ones"""
+        self._stock_epoch += 1
+        self.changed_at = time.monotonic()
+        keys = self._stock_wide
+        self._stock_wide = set()
+        for id in product_ids:
+            self._stock_changed[id] = self._stock_epoch
+            keys |= self._keys_by_product.pop(id, set())
+        for key in keys:
+            self._entries.pop((self.version, key))
+
+    def stats(self) -> dict:
+        return {"version": self.version, "stock_changes": self._stock_epoch,
+                **self._entries.stats()}
+
+
+product_cache = ProductCache(PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL)
+
+
+def invalidate_product_cache(product_ids=None) -> None:
+    """Drop every cached response; listens to catalog changes"""
+    product_cache.invalidate()
+
+
+def invalidate_product_stock(product_ids: frozenset[int]) -> None:
+    """Drop the responses showing these products; listens to stock changes"""
+    product_cache.invalidate_stock(product_ids)
+
+
+subscribe(invalidate_product_cache)
+subscribe_stock(invalidate_product_stock)
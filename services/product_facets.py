@@ -0,0 +1,235 @@
+"""
+Facet counts for the storefront sidebar: products per category, per price
+range and in stock, over the active catalog.
+
+The counts come from aggregates kept in process as a ``CatalogView``: for
+every (category, in stock) cell, the sorted prices of its active products.
+Any price filter is then two bisections per cell, so a request never scans
+the products table. Until the aggregates are built the same numbers are
+computed with ``GROUP BY`` queries, which also serve as the full recompute
+that ``check_facets`` compares against.
+"""
+import bisect
+from array import array
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.settings import settings
+from models.product import Product
+from services.catalog_events import CatalogView, subscribe, subscribe_stock
+
+FACET_REFRESH_INTERVAL = settings.facet_refresh_interval
+# Upper bounds of the price ranges; the last range is open-ended
+PRICE_EDGES = settings.facet_price_edges
+
+
+def price_ranges() -> list[tuple[float, float | None]]:
+    return list(zip([0.0, *PRICE_EDGES], [*PRICE_EDGES, None]))
+
+
+class FacetCounts:
+    """Sorted prices per (category, in stock) cell of the active products"""
+
+    def __init__(self, bulk: bool = False):
+        self.categories: list[str] = []
+        self._category_ids: dict[str, int] = {}
+        self._cells: dict[tuple[int, bool], array] = {}
+        # Indexed by product id: category id + 1 (0: not counted), price, stock
+        self._category = array("I")
+        self._price = array("d")
+        self._in_stock = array("b")
+        self.size = 0
+        # Bulk loads append prices and sort them once, in seal()
+        self._sorted = not bulk
+
+    def add(self, product_id: int, category: str, price: float,
+            in_stock: bool) -> None:
+        self.remove(product_id)
+        category_id = self._category_ids.get(category)
+        if category_id is None:
+            category_id = self._category_ids[category] = len(self.categories)
+            self.categories.append(category)
+        if product_id >= len(self._category):
+            grow = product_id + 1 - len(self._category)
+            self._category.extend([0] * grow)
+            self._price.extend([0.0] * grow)
+            self._in_stock.extend([0] * grow)
+        self._category[product_id] = category_id + 1
+        self._price[product_id] = price
+        self._in_stock[product_id] = in_stock
+
+        prices = self._cells.get((category_id, in_stock))
+        if prices is None:
+            prices = self._cells[(category_id, in_stock)] = array("d")
+        if self._sorted:
+            bisect.insort(prices, price)
+        else:
+            prices.append(price)
+        self.size += 1
+
+    def seal(self) -> None:
+        """Sort the prices appended since the aggregates were created"""
+        for cell, prices in self._cells.items():
+            self._cells[cell] = array("d", sorted(prices))
+        self._sorted = True
+
+    def remove(self, product_id: int) -> None:
+        if product_id >= len(self._category) or not self._category[product_id]:
+            return
+        cell = (self._category[product_id] - 1, bool(self._in_stock[product_id]))
+        prices = self._cells[cell]
+        del prices[bisect.bisect_left(prices, self._price[product_id])]
+        self._category[product_id] = 0
+        self.size -= 1
+
+    def _cells_for(self, category: str | None):
+        if category is None:
+            return self._cells.items()
+        category_id = self._category_ids.get(category)
+        return [(cell, prices) for cell, prices in self._cells.items()
+                if cell[0] == category_id]
+
+    def facets(self, category: str | None = None, min_price: float | None = None,
+               max_price: float | None = None) -> dict:
+        """
+        Counts under the listing filters. Each facet ignores its own filter,
+        so the sidebar still shows the other categories and price ranges.
+        """
+        low = float("-inf") if min_price is None else min_price
+        high = float("inf") if max_price is None else max_price
+
+        total = in_stock = 0
+        for (_, stocked), prices in self._cells_for(category):
+            count = bisect.bisect_right(prices, high) - bisect.bisect_left(prices, low)
+            total += count
+            if stocked:
+                in_stock += count
+
+        categories = [0] * len(self.categories)
+        for (category_id, _), prices in self._cells.items():
+            categories[category_id] += (bisect.bisect_right(prices, high)
+                                        - bisect.bisect_left(prices, low))
+
+        range_counts = [0] * (len(PRICE_EDGES) + 1)
+        for _, prices in self._cells_for(category):
+            ends = [bisect.bisect_left(prices, edge) for edge in PRICE_EDGES]
+            for i, (start, end) in enumerate(zip([0, *ends], [*ends, len(prices)])):
+                range_counts[i] += end - start
+
+        return _facets(
+            total, in_stock,
+            {name: count for name, count in zip(self.categories, categories)},
+            range_counts,
+        )
+
+
+def _facets(total: int, in_stock: int, categories: dict[str, int],
+            range_counts: list[int]) -> dict:
+    return {
+        "total": total,
+        "in_stock": in_stock,
+        "categories": [
+            {"value": name, "count": count}
+            for name, count in sorted(categories.items(), key=lambda c: (-c[1], c[0]))
+            if count
+        ],
+        "price_ranges": [
+            {"min": lower, "max": upper, "count": count}
+            for (lower, upper), count in zip(price_ranges(), range_counts)
+        ],
+    }
+
+
+class ProductFacetIndex(CatalogView):
+    """Facet counts of the active products"""
+    name = "facet counts"
+    columns = (Product.category, Product.price, Product.stock_quantity,
+               Product.is_active)
+    refresh_interval = FACET_REFRESH_INTERVAL
+
+    def create(self) -> FacetCounts:
+        return FacetCounts(bulk=True)
+
+    def finish(self, counts: FacetCounts) -> None:
+        counts.seal()
+
+    def apply(self, counts: FacetCounts, row) -> None:
+        if row.is_active:
+            counts.add(row.id, row.category, row.price, (row.stock_quantity or 0) > 0)
+        else:
+            counts.remove(row.id)
+
+    def discard(self, counts: FacetCounts, product_id: int) -> None:
+        counts.remove(product_id)
+
+
+product_facets = ProductFacetIndex()
+subscribe(product_facets.on_catalog_change)
+# Facets count products in stock
+subscribe_stock(product_facets.on_catalog_change)
+
+
+async def facets_sql(db: AsyncSession, category: str | None = None,
+                     min_price: float | None = None,
+                     max_price: float | None = None) -> dict:
+    """The same counts as ``FacetCounts.facets``, computed with GROUP BY"""
+    prices = []
+    if min_price is not None:
+        prices.append(Product.price >= min_price)
+    if max_price is not None:
+        prices.append(Product.price <= max_price)
+    in_category = [Product.category == category] if category is not None else []
+    active = Product.is_active == True
+
+    total, in_stock = (await db.execute(
+        select(func.count(), func.count().filter(Product.stock_quantity > 0))
+        .where(active, *in_category, *prices)
+    )).one()
+
+    categories = dict((await db.execute(
+        select(Product.category, func.count()).where(active, *prices)
+        .group_by(Product.category)
+    )).all())
+
+    bucket = case(*((Product.price < edge, i) for i, edge in enumerate(PRICE_EDGES)),
+                  else_=len(PRICE_EDGES))
+    range_counts = [0] * (len(PRICE_EDGES) + 1)
+    for i, count in (await db.execute(
+        select(bucket, func.count()).where(active, *in_category).group_by(bucket)
+    )).all():
+        range_counts[i] = count
+
+    return _facets(total, in_stock or 0, categories, range_counts)
+
+
+async def get_facets(db: AsyncSession, category: str | None = None,
+                     min_price: float | None = None,
+                     max_price: float | None = None) -> dict:
+    """Facet counts from the aggregates, or with GROUP BY while they build"""
+    if not product_facets.built():
+        return await facets_sql(db, category, min_price, max_price)
+    counts = await product_facets.ready()
+    return counts.facets(category, min_price, max_price)
+
+
+async def check_facets(db: AsyncSession) -> dict:
+    """
+    Compare the aggregates with a full recompute. Products written while
+    the check runs can show up as transient differences.
+    """
+    counts = await product_facets.ready()
+    expected = await facets_sql(db)
+    actual = counts.facets()
+    differences = {
+        key: {"aggregates": actual[key], "recomputed": expected[key]}
+        for key in expected if actual[key] != expected[key]
+    }
+    return {"consistent": not differences, "products": counts.size,
+            "differences": differences}
+
+
+async def start_product_facets() -> None:
+    await product_facets.start()
+
+
+async def stop_product_facets() -> None:
+    await product_facets.stop()
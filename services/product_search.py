@@ -0,0 +1,94 @@
+"""
+Ranked full-text product search.
+
+On Postgres, queries run against the ``ix_products_search`` GIN index and
+are ranked with ``ts_rank_cd``. Other databases use an in-process inverted
+index with BM25 ranking, kept current as a ``CatalogView``.
+"""
+from sqlalchemy import Row, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import engine
+from config.settings import settings
+from models.product import Product, search_vector
+from services.catalog_events import CatalogView, subscribe
+from services.product_service import PRODUCT_COLUMNS
+from utils.inverted_index import InvertedIndex, tokenize
+
+SEARCH_REFRESH_INTERVAL = settings.search_refresh_interval
+# Name matches count this many times more than description matches
+NAME_WEIGHT = 3
+
+
+class ProductSearchIndex(CatalogView):
+    """Inverted index over the names and descriptions of active products"""
+    name = "search index"
+    columns = (Product.name, Product.description, Product.is_active)
+    refresh_interval = SEARCH_REFRESH_INTERVAL
+
+    def create(self) -> InvertedIndex:
+        return InvertedIndex()
+
+    def apply(self, index: InvertedIndex, row) -> None:
+        if row.is_active:
+            index.add(row.id, [(row.name, NAME_WEIGHT), (row.description, 1)])
+        else:
+            index.remove(row.id)
+
+    def discard(self, index: InvertedIndex, product_id: int) -> None:
+        index.remove(product_id)
+
+
+product_search = ProductSearchIndex()
+subscribe(product_search.on_catalog_change)
+
+
+def _tsquery(q: str) -> str | None:
+    """Prefix-matching tsquery requiring every term; tokens are [a-z0-9]+"""
+    tokens = tokenize(q)
+    return " & ".join(f"{token}:*" for token in tokens) if tokens else None
+
+
+async def _search_postgres(db: AsyncSession, q: str, limit: int,
+                           offset: int) -> tuple[list[Row], int]:
+    tsquery = _tsquery(q)
+    if tsquery is None:
+        return [], 0
+    query = func.to_tsquery(literal_column("'english'"), tsquery)
+    vector = search_vector()
+    matches = (Product.is_active == True, vector.op("@@")(query))
+    rank = func.ts_rank_cd(vector, query)
+
+    total = (await db.execute(
+        select(func.count()).select_from(Product).where(*matches)
+    )).scalar()
+    result = await db.execute(
+        select(*PRODUCT_COLUMNS).where(*matches)
+        .order_by(rank.desc(), Product.id).limit(limit).offset(offset)
+    )
+    return list(result.all()), total
+
+
+async def search_products(db: AsyncSession, q: str, limit: int = 20,
+                          offset: int = 0) -> tuple[list[Row], int]:
+    """One page of active products matching ``q``, best first, and the total"""
+    if db.bind.dialect.name == "postgresql":
+        return await _search_postgres(db, q, limit, offset)
+
+    index = await product_search.ready()
+    total, page = index.search(q, limit, offset)
+    if not page:
+        return [], total
+    ids = [id for id, _ in page]
+    result = await db.execute(select(*PRODUCT_COLUMNS).where(Product.id.in_(ids)))
+    by_id = {row.id: row for row in result}
+    return [by_id[id] for id in ids if id in by_id], total
+
+
+async def start_product_search() -> None:
+    """Build the in-process index when the database has no full-text search"""
+    if engine.dialect.name != "postgresql":
+        await product_search.start()
+
+
+async def stop_product_search() -> None:
+    await product_search.stop()
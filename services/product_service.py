@@ -0,0 +1,305 @@
+import re
+import orjson
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Row, insert, literal, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from models.product import Product
+from schemas.product import ProductCreate, ProductResponse, ProductUpsert
+from services.catalog_events import publish_catalog_change
+from utils.compression import CODINGS
+from utils.pagination import encode_cursor, decode_cursor
+
+# ProductResponse fields, and the columns that hold them in the same order,
+# so rows encode to exactly the JSON the model would produce
+PRODUCT_FIELDS = tuple(ProductResponse.model_fields)
+PRODUCT_COLUMNS = tuple(getattr(Product, field) for field in PRODUCT_FIELDS)
+# Columns a client writes
+WRITE_FIELDS = tuple(ProductCreate.model_fields)
+# Bulk writes touching more products than this publish one catalog-wide
+# change instead of every id
+BULK_PUBLISH_IDS = 1000
+# New products may take explicit ids past the highest one in use up to twice
+# the catalog size plus this; the facet counts and the search index keep
+# arrays indexed by product id, so far-off ids would cost memory per id
+BULK_ID_HEADROOM = 100_000
+
+upsert_adapter = TypeAdapter(ProductUpsert)
+
+
+def encode_product(row: Row) -> bytes:
+    """ProductResponse JSON for a row of PRODUCT_COLUMNS, without validation"""
+    return orjson.dumps(dict(zip(PRODUCT_FIELDS, row)), option=orjson.OPT_UTC_Z)
+
+
+def encode_products(rows: list[Row]) -> bytes:
+    return orjson.dumps([dict(zip(PRODUCT_FIELDS, row)) for row in rows],
+                        option=orjson.OPT_UTC_Z)
+
+
+SORT_COLUMNS = {
+    "id": (Product.id,),
+    "price": (Product.price, Product.id),
+    "created_at": (Product.created_at, Product.id),
+}
+
+
+async def list_products(
+    db: AsyncSession,
+    limit: int,
+    cursor: str | None = None,
+    sort: str = "id",
+    order: str = "asc",
+    category: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+) -> tuple[list[Row], str | None]:
+    """
+    Fetch one page of active products using keyset pagination.
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    columns = SORT_COLUMNS[sort]
+    query = select(*PRODUCT_COLUMNS).where(Product.is_active == True)
+    if category is not None:
+        query = query.where(Product.category == category)
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+
+    if cursor:
+        # Bind with the column types so dialect storage formats apply
+        decoded = decode_cursor(cursor, sort, len(columns))
+        values = [
+            literal(value, column.type) for value, column in zip(decoded, columns)
+        ]
+        key = tuple_(*columns) if len(columns) > 1 else columns[0]
+        bound = tuple_(*values) if len(columns) > 1 else values[0]
+        query = query.where(key > bound if order == "asc" else key < bound)
+
+    ordering = [c.asc() if order == "asc" else c.desc() for c in columns]
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(query.order_by(*ordering).limit(limit + 1))
+    products = list(result.all())
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, c.key) for c in columns])
+    return products, next_cursor
+
+
+def product_etag(product_id: int, version: int) -> str:
+    """Strong ETag of one product; every write bumps the version"""
+    return f'"p{product_id}-v{version}"'
+
+
+def expected_versions(if_match: str | None, product_id: int) -> list[int] | None:
+    """
+    Versions an If-Match header accepts for ``product_id``, or None when any
+    version does (no header, or ``*``). If-Match uses strong comparison, so
+    weak tags never match; the tags of compressed responses (``"p1-v2-gzip"``)
+    name the same version.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    pattern = re.compile(rf'"p{product_id}-v(\d+)(?:-(?:{"|".join(CODINGS)}))?"')
+    versions = []
+    for tag in if_match.split(","):
+        match = pattern.fullmatch(tag.strip())
+        if match:
+            versions.append(int(match.group(1)))
+    return versions
+
+
+async def _precondition_failed(db: AsyncSession, product_id: int,
+                               active_only: bool = False) -> HTTPException:
+    """404 when the product is gone, 412 when it has another version"""
+    conditions = [Product.id == product_id]
+    if active_only:
+        conditions.append(Product.is_active == True)
+    exists = (await db.execute(
+        select(Product.id).where(*conditions)
+    )).first()
+    if exists is None:
+        return HTTPException(status_code=404, detail="Product not found")
+    return HTTPException(status_code=412,
+                         detail="Product was changed by another request")
+
+
+async def create_product(db: AsyncSession, data: ProductCreate) -> Row:
+    result = await db.execute(
+        insert(Product).values(**data.model_dump()).returning(*PRODUCT_COLUMNS)
+    )
+    product = result.one()
+    await db.commit()
+    publish_catalog_change([product.id])
+    return product
+
+
+async def update_product(db: AsyncSession, product_id: int, changes: dict,
+                         versions: list[int] | None = None) -> Row:
+    """
+    Apply ``changes`` if the product is at one of ``versions`` (any when
+    None), in one conditional UPDATE. Raises 404 or 412 otherwise.
+    """
+    conditions = [Product.id == product_id]
+    if versions is not None:
+        conditions.append(Product.version.in_(versions))
+    if not changes:
+        result = await db.execute(select(*PRODUCT_COLUMNS).where(*conditions))
+    else:
+        result = await db.execute(
+            update(Product).where(*conditions)
+            .values(**changes, version=Product.version + 1, updated_at=func.now())
+            .returning(*PRODUCT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    product = result.first()
+    if product is None:
+        raise await _precondition_failed(db, product_id)
+    if changes:
+        await db.commit()
+        publish_catalog_change([product_id])
+    return product
+
+
+async def delete_product(db: AsyncSession, product_id: int,
+                         versions: list[int] | None = None) -> None:
+    """
+    Soft delete: the product is deactivated and its version and updated_at
+    bumped, so other processes' catalog views see it go when they poll and
+    reservations that name it keep their rows.
+    """
+    conditions = [Product.id == product_id, Product.is_active == True]
+    if versions is not None:
+        conditions.append(Product.version.in_(versions))
+    result = await db.execute(
+        update(Product).where(*conditions)
+        .values(is_active=False, version=Product.version + 1, updated_at=func.now())
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.first() is None:
+        raise await _precondition_failed(db, product_id, active_only=True)
+    await db.commit()
+    publish_catalog_change([product_id])
+
+
+def _upsert(dialect: str):
+    """INSERT ... ON CONFLICT (id) DO UPDATE guarded by the expected version"""
+    insert_ = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert_(Product.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=[Product.id],
+        set_={
+            **{field: stmt.excluded[field] for field in WRITE_FIELDS},
+            "version": Product.version + 1,
+            "updated_at": func.now(),
+        },
+        where=Product.version == stmt.excluded.version,
+    ).returning(Product.id, Product.version)
+
+
+async def bulk_upsert_products(db: AsyncSession, items: list) -> list[dict]:
+    """
+    Insert items without an id and upsert products by id (inserting ids that
+    do not exist yet, up to a bound), in two set-based statements. Each item
+    is validated on its own; an item whose product changed since its
+    ``version`` (or since it was read here) is reported as a conflict and
+    left out. Returns one result per item, in input order.
+    """
+    results: list[dict | None] = [None] * len(items)
+    creates: list[tuple[int, dict]] = []
+    replaces: dict[int, tuple[int, int | None, dict]] = {}
+    for index, raw in enumerate(items):
+        try:
+            item = upsert_adapter.validate_python(raw)
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            results[index] = {"index": index, "status": "invalid",
+                              "detail": f"{location}: {error['msg']}"}
+            continue
+        values = item.model_dump(include=set(WRITE_FIELDS))
+        if item.id is None:
+            creates.append((index, values))
+        elif item.id in replaces:
+            results[index] = {"index": index, "status": "invalid", "id": item.id,
+                              "detail": "Duplicate id in request"}
+        else:
+            replaces[item.id] = (index, item.version, values)
+
+    changed: list[int] = []
+    if replaces:
+        current = dict((await db.execute(
+            select(Product.id, Product.version).where(Product.id.in_(replaces))
+        )).all())
+        max_id = None
+        if any(product_id not in current for product_id in replaces):
+            highest, count = (await db.execute(
+                select(func.max(Product.id), func.count())
+            )).one()
+            max_id = max(highest or 0, 2 * count + BULK_ID_HEADROOM)
+        rows = []
+        for product_id, (index, version, values) in replaces.items():
+            if product_id not in current and product_id > max_id:
+                results[index] = {"index": index, "status": "invalid",
+                                  "id": product_id,
+                                  "detail": f"id: New ids may be at most {max_id}"}
+            elif version is not None and version != current.get(product_id):
+                # Also when the product does not exist: nothing is at that version
+                results[index] = {"index": index, "status": "conflict",
+                                  "id": product_id, "version": current.get(product_id)}
+            else:
+                # Unknown ids are inserted with that id
+                rows.append({"id": product_id, "version": current.get(product_id, 1),
+                             **values})
+        if rows:
+            result = await db.execute(_upsert(db.bind.dialect.name), rows)
+            written = dict(result.all())
+            for row in rows:
+                product_id = row["id"]
+                index = replaces[product_id][0]
+                if product_id in written:
+                    status = "updated" if product_id in current else "created"
+                    results[index] = {"index": index, "status": status,
+                                      "id": product_id,
+                                      "version": written[product_id]}
+                    changed.append(product_id)
+                else:
+                    # Written by someone else between the read and the upsert
+                    results[index] = {"index": index, "status": "conflict",
+                                      "id": product_id}
+            if db.bind.dialect.name == "postgresql" and \
+                    any(row["id"] not in current for row in rows):
+                # Explicit ids do not advance the id sequence
+                await db.execute(text(
+                    "SELECT setval(seq, GREATEST((SELECT MAX(id) FROM products), "
+                    "COALESCE(pg_sequence_last_value(seq::regclass), 1))) "
+                    "FROM (SELECT pg_get_serial_sequence('products', 'id') AS seq) s"
+                ))
+
+    if creates:
+        # SQLAlchemy falls back to one INSERT per row to order RETURNING on
+        # SQLite; there a batch assigns ascending rowids in VALUES order
+        ordered = db.bind.dialect.name != "sqlite"
+        result = await db.execute(
+            insert(Product.__table__).returning(
+                Product.id, Product.version, sort_by_parameter_order=ordered
+            ),
+            [values for _, values in creates],
+        )
+        created = result.all() if ordered else sorted(result.all())
+        for (index, _), (product_id, version) in zip(creates, created):
+            results[index] = {"index": index, "status": "created",
+                              "id": product_id, "version": version}
+            changed.append(product_id)
+
+    await db.commit()
+    if changed:
+        publish_catalog_change(changed if len(changed) <= BULK_PUBLISH_IDS else None)
+    return results
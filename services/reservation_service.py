@@ -0,0 +1,206 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from models.product import Product
+from models.reservation import Reservation, ReservationItem
+from schemas.reservation import ReservationItemIn, ReservationResponse
+from services.catalog_events import publish_stock_change
+
+RESERVATION_TTL = settings.reservation_ttl
+RESERVATION_SWEEP_INTERVAL = settings.reservation_sweep_interval
+RESERVATION_SWEEP_BATCH = settings.reservation_sweep_batch
+
+# Stock writes allowed in flight per process. Buyers of a hot product all
+# wait on the same row lock; queueing them here instead keeps the rest of
+# the connection pool free and spares SQLite its busy-retry backoff.
+_writers = asyncio.Semaphore(settings.reservation_writers)
+
+_sweeper: asyncio.Task | None = None
+
+
+def _per_product(quantities: dict[int, int]):
+    """CASE expression giving each product id its quantity"""
+    return case(quantities, value=Product.id)
+
+
+async def _restock(db: AsyncSession, quantities: dict[int, int]) -> None:
+    """Put reserved quantities back, all products in one UPDATE"""
+    if not quantities:
+        return
+    await db.execute(
+        update(Product).where(Product.id.in_(quantities))
+        .values(stock_quantity=Product.stock_quantity + _per_product(quantities),
+                version=Product.version + 1, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def reserve_stock(db: AsyncSession, user_id: int,
+                        items: list[ReservationItemIn]) -> ReservationResponse:
+    """
+    Take stock for every item or none of them. All products are decremented
+    by one conditional UPDATE that only matches rows with enough stock left,
+    so concurrent buyers can never take the stock below zero. Raises 409
+    naming the products that could not be reserved.
+    """
+    quantities = Counter()
+    for item in items:
+        quantities[item.product_id] += item.quantity
+    quantities = dict(sorted(quantities.items()))
+    wanted = _per_product(quantities)
+    async with _writers:
+        result = await db.execute(
+            update(Product)
+            .where(Product.id.in_(quantities), Product.is_active == True,
+                   Product.stock_quantity >= wanted)
+            .values(stock_quantity=Product.stock_quantity - wanted,
+                    version=Product.version + 1, updated_at=func.now())
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        reserved = set(result.scalars())
+        if len(reserved) < len(quantities):
+            await db.rollback()
+            missing = ", ".join(str(i) for i in quantities if i not in reserved)
+            raise HTTPException(status_code=409,
+                                detail=f"Insufficient stock for products {missing}")
+
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=RESERVATION_TTL)
+        reservation_id = (await db.execute(
+            insert(Reservation)
+            .values(user_id=user_id, status="held", expires_at=expires_at)
+            .returning(Reservation.id)
+        )).scalar_one()
+        await db.execute(insert(ReservationItem), [
+            {"reservation_id": reservation_id, "product_id": product_id,
+             "quantity": quantity}
+            for product_id, quantity in quantities.items()
+        ])
+        await db.commit()
+    publish_stock_change(list(quantities))
+    return ReservationResponse(
+        id=reservation_id, status="held", expires_at=expires_at,
+        items=[{"product_id": product_id, "quantity": quantity}
+               for product_id, quantity in quantities.items()],
+    )
+
+
+async def get_reservation(db: AsyncSession, reservation_id: int,
+                          user_id: int) -> Reservation:
+    reservation = (await db.execute(
+        select(Reservation)
+        .where(Reservation.id == reservation_id, Reservation.user_id == user_id)
+    )).scalar_one_or_none()
+    if reservation is None:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    return reservation
+
+
+async def _transition(db: AsyncSession, reservation_id: int, user_id: int,
+                      status: str, *conditions) -> None:
+    """Move a held reservation to ``status``; 404 or 409 when it is not held"""
+    result = await db.execute(
+        update(Reservation)
+        .where(Reservation.id == reservation_id, Reservation.user_id == user_id,
+               Reservation.status == "held", *conditions)
+        .values(status=status)
+        .returning(Reservation.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.first() is None:
+        await db.rollback()
+        reservation = await get_reservation(db, reservation_id, user_id)
+        state = "expired" if reservation.status == "held" else reservation.status
+        raise HTTPException(status_code=409, detail=f"Reservation is {state}")
+
+
+async def confirm_reservation(db: AsyncSession, reservation_id: int,
+                              user_id: int) -> Reservation:
+    """Keep the reserved stock for good, if the hold has not expired"""
+    await _transition(db, reservation_id, user_id, "confirmed",
+                      Reservation.expires_at > datetime.now(timezone.utc))
+    await db.commit()
+    return await get_reservation(db, reservation_id, user_id)
+
+
+async def release_reservation(db: AsyncSession, reservation_id: int,
+                              user_id: int) -> None:
+    """Cancel a held reservation and return its stock"""
+    async with _writers:
+        await _transition(db, reservation_id, user_id, "released")
+        quantities = dict((await db.execute(
+            select(ReservationItem.product_id, ReservationItem.quantity)
+            .where(ReservationItem.reservation_id == reservation_id)
+        )).all())
+        await _restock(db, quantities)
+        await db.commit()
+    publish_stock_change(list(quantities))
+
+
+async def release_expired_reservations(
+        batch_size: int = RESERVATION_SWEEP_BATCH) -> int:
+    """
+    Expire held reservations past their deadline and return their stock, in
+    batches. Each batch is claimed by a conditional UPDATE, so a reservation
+    confirmed or released meanwhile is never restocked twice.
+    """
+    released = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            due = (select(Reservation.id)
+                   .where(Reservation.status == "held",
+                          Reservation.expires_at <= datetime.now(timezone.utc))
+                   .limit(batch_size))
+            claimed = (await db.execute(
+                update(Reservation)
+                .where(Reservation.id.in_(due.scalar_subquery()),
+                       Reservation.status == "held")
+                .values(status="expired")
+                .returning(Reservation.id)
+                .execution_options(synchronize_session=False)
+            )).scalars().all()
+            quantities = {}
+            if claimed:
+                quantities = dict((await db.execute(
+                    select(ReservationItem.product_id,
+                           func.sum(ReservationItem.quantity))
+                    .where(ReservationItem.reservation_id.in_(claimed))
+                    .group_by(ReservationItem.product_id)
+                )).all())
+                await _restock(db, quantities)
+            await db.commit()
+        if quantities:
+            publish_stock_change(list(quantities))
+        released += len(claimed)
+        if len(claimed) < batch_size:
+            return released
+
+
+async def _sweep_forever() -> None:
+    while True:
+        try:
+            released = await release_expired_reservations()
+            if released:
+                print(f"Released {released} expired reservations")
+        except Exception as e:
+            print(f"❌ Reservation sweep failed: {e}")
+        await asyncio.sleep(RESERVATION_SWEEP_INTERVAL)
+
+
+def start_reservation_sweeper() -> None:
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = asyncio.create_task(_sweep_forever())
+
+
+async def stop_reservation_sweeper() -> None:
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.cancel()
+        await asyncio.gather(_sweeper, return_exceptions=True)
+        _sweeper = None
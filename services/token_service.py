@@ -1,19 +1,104 @@
+import asyncio
 import hashlib
-from sqlalchemy.orm import Session
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import AsyncSessionLocal
+from config.settings import settings
 from models.user import UsedToken
+from utils.cache import LRUCache
 
+RESET_TOKEN_EXPIRE_MINUTES = 10
+USED_TOKEN_CACHE_SIZE = settings.used_token_cache_size
+TOKEN_SWEEP_INTERVAL = settings.token_sweep_interval
+TOKEN_SWEEP_BATCH = settings.token_sweep_batch
 
-def is_token_used(token: str, db: Session) -> bool:
-    """Check if reset token has been used"""
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    return db.query(UsedToken).filter(
-        UsedToken.token_hash == token_hash
-    ).first() is not None
+# Hashes of tokens used through this process, kept until the token expires
+used_tokens = LRUCache(USED_TOKEN_CACHE_SIZE)
+_sweeper: asyncio.Task | None = None
 
 
-def mark_token_as_used(token: str, user_email: str, db: Session) -> None:
-    """Mark reset token as used"""
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    used_token = UsedToken(token_hash=token_hash, user_email=user_email)
-    db.add(used_token)
-    db.commit()
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def is_token_used(token: str) -> bool:
+    """
+    Fast in-process check for replayed tokens. A miss is not authoritative:
+    other workers may have used the token, which mark_token_as_used detects.
+    """
+    return used_tokens.get(hash_token(token)) is not None
+
+
+async def mark_token_as_used(token: str, user_email: str, expires_at: datetime,
+                             db: AsyncSession) -> bool:
+    """
+    Record the token as used in the current transaction, which must not hold
+    other pending writes. Returns False if it was used before; the unique
+    index on token_hash makes the check and the insert one atomic step.
+    """
+    db.add(UsedToken(token_hash=hash_token(token), user_email=user_email,
+                     expires_at=expires_at))
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        remember_used_token(token, expires_at)
+        return False
+    return True
+
+
+def remember_used_token(token: str, expires_at: datetime) -> None:
+    """Cache a used token locally until it would have expired anyway"""
+    ttl = expires_at.timestamp() - time.time()
+    if ttl > 0:
+        used_tokens.set(hash_token(token), True, ttl=ttl)
+
+
+async def purge_expired_tokens(batch_size: int = TOKEN_SWEEP_BATCH) -> int:
+    """Delete used tokens that can no longer validate, in batches"""
+    now = datetime.now(timezone.utc)
+    expired = or_(
+        UsedToken.expires_at < now,
+        # Rows recorded before expires_at existed
+        and_(UsedToken.expires_at.is_(None),
+             UsedToken.used_at < now - timedelta(minutes=RESET_TOKEN_EXPIRE_MINUTES))
+    )
+    purged = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            ids = select(UsedToken.id).where(expired).limit(batch_size)
+            result = await db.execute(
+                delete(UsedToken).where(UsedToken.id.in_(ids.scalar_subquery()))
+            )
+            await db.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+
+
+async def _sweep_forever() -> None:
+    while True:
+        try:
+            purged = await purge_expired_tokens()
+            if purged:
+                print(f"Purged {purged} expired reset tokens")
+        except Exception as e:
+            print(f"❌ Token sweep failed: {e}")
+        await asyncio.sleep(TOKEN_SWEEP_INTERVAL)
+
+
+def start_token_sweeper() -> None:
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = asyncio.create_task(_sweep_forever())
+
+
+async def stop_token_sweeper() -> None:
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.cancel()
+        await asyncio.gather(_sweeper, return_exceptions=True)
+        _sweeper = None
@@ -1,15 +1,39 @@
 from .security import (
     hash_password,
     verify_password,
+    needs_rehash,
     create_access_token,
+    decode_token,
     verify_token,
     get_current_user,
+    get_current_admin,
+    get_current_user_for_update,
+    invalidate_user_cache,
+    auth_cache_stats,
+)
+from .hashing import (
+    hash_password_async,
+    verify_password_async,
+    upgrade_password_hash,
+    start_hashing_pool,
+    shutdown_hashing_pool,
 )
 
 __all__ = [
     "hash_password",
     "verify_password",
+    "needs_rehash",
     "create_access_token",
+    "decode_token",
     "verify_token",
     "get_current_user",
+    "get_current_admin",
+    "get_current_user_for_update",
+    "invalidate_user_cache",
+    "auth_cache_stats",
+    "hash_password_async",
+    "verify_password_async",
+    "upgrade_password_hash",
+    "start_hashing_pool",
+    "shutdown_hashing_pool",
 ]
@@ -0,0 +1,174 @@
+"""
+Response compression: content-coding negotiation, one-shot and streaming
+compressors, and the metrics both record.
+
+gzip is always available. Brotli and zstd are used when the ``brotli`` and
+``zstandard`` packages are installed.
+"""
+import gzip
+import time
+import zlib
+from config.settings import settings
+from utils.metrics import registry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = settings.compression_min_size
+GZIP_LEVEL = settings.gzip_level
+BROTLI_QUALITY = settings.brotli_quality
+ZSTD_LEVEL = settings.zstd_level
+
+# Media types worth compressing; everything else (images, fonts in woff2,
+# archives) is compressed already
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript",
+                      "application/xml", "image/svg+xml")
+
+BYTES_IN = registry.counter(
+    "http_compression_input_bytes_total",
+    "Response bytes before compression, by content coding", ("encoding",),
+)
+BYTES_OUT = registry.counter(
+    "http_compression_output_bytes_total",
+    "Response bytes after compression, by content coding", ("encoding",),
+)
+CPU_SECONDS = registry.counter(
+    "http_compression_cpu_seconds_total",
+    "CPU time spent compressing responses, by content coding", ("encoding",),
+)
+REUSED = registry.counter(
+    "http_compression_reused_total",
+    "Responses served from stored compressed bytes, by content coding",
+    ("encoding",),
+)
+
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Server preference when the client accepts several codings equally
+STREAMS = {"br": _Brotli, "zstd": _Zstd, "gzip": _Gzip}
+# Every coding an encoded ETag can name, whether installed here or not
+CODINGS = tuple(STREAMS)
+if brotli is None:
+    del STREAMS["br"]
+if zstandard is None:
+    del STREAMS["zstd"]
+
+
+def negotiate(accept_encoding: str | None, codings=STREAMS) -> str | None:
+    """Best of ``codings`` (in preference order) for an Accept-Encoding header"""
+    if not accept_encoding or not settings.compression_enabled:
+        return None
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in codings:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compressible(content_type: str | None) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class StreamCompressor:
+    """Compresses a body chunk by chunk, recording metrics as it goes"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._stream = STREAMS[encoding]()
+
+    def _timed(self, call, data: bytes = b"") -> bytes:
+        started = time.thread_time()
+        out = call(data) if data else call()
+        CPU_SECONDS.inc(self.encoding, amount=time.thread_time() - started)
+        BYTES_IN.inc(self.encoding, amount=len(data))
+        BYTES_OUT.inc(self.encoding, amount=len(out))
+        return out
+
+    def compress(self, data: bytes) -> bytes:
+        return self._timed(self._stream.compress, data) if data else b""
+
+    def flush(self) -> bytes:
+        return self._timed(self._stream.flush)
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    """Compress a whole body"""
+    stream = StreamCompressor(encoding)
+    return stream.compress(data) + stream.flush()
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag of the ``encoding`` coded bytes of a response. Compressed bytes
+    differ from the plain ones, so they get their own tag; a strong tag
+    stays strong.
+    """
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def compression_stats() -> dict:
+    stats = {}
+    for encoding in STREAMS:
+        before = BYTES_IN.value(encoding)
+        after = BYTES_OUT.value(encoding)
+        stats[encoding] = {
+            "input_bytes": before,
+            "output_bytes": after,
+            "ratio": round(after / before, 4) if before else None,
+            "cpu_seconds": round(CPU_SECONDS.value(encoding), 6),
+            "reused": REUSED.value(encoding),
+        }
+    return stats
@@ -0,0 +1,90 @@
+"""
+Pick password hashing costs that fit a latency budget on this host.
+
+Times bcrypt at increasing rounds (each round doubles the work) and, when
+``argon2-cffi`` is installed, argon2id at increasing time cost with a fixed
+memory cost, and recommends the highest cost whose median hash time stays
+within ``--target-ms``. Run it on the hardware the API is deployed to:
+
+    python -m utils.hash_calibration --target-ms 250
+
+Existing hashes are upgraded to the chosen cost as users log in.
+"""
+import argparse
+import statistics
+import time
+from passlib.hash import argon2, bcrypt
+from config.settings import settings
+
+PASSWORD = "calibration-password"
+# Below this bcrypt no longer offers meaningful brute-force resistance
+MIN_BCRYPT_ROUNDS = 10
+
+
+def time_hash(handler, samples: int) -> tuple[float, float]:
+    """Median wall and CPU milliseconds of one hash"""
+    wall, cpu = [], []
+    for _ in range(samples):
+        started, started_cpu = time.perf_counter(), time.process_time()
+        handler.hash(PASSWORD)
+        wall.append(time.perf_counter() - started)
+        cpu.append(time.process_time() - started_cpu)
+    return statistics.median(wall) * 1000, statistics.median(cpu) * 1000
+
+
+def calibrate(name: str, configure, costs: range, target_ms: float,
+              samples: int) -> int | None:
+    """Highest cost in ``costs`` whose hash fits ``target_ms``"""
+    print(f"\n{name:<16}{'wall ms':>10}{'CPU ms':>10}{'hashes/s/core':>16}")
+    chosen = None
+    for cost in costs:
+        wall_ms, cpu_ms = time_hash(configure(cost), samples)
+        print(f"  cost {cost:<9}{wall_ms:>10.1f}{cpu_ms:>10.1f}{1000 / wall_ms:>16.1f}")
+        if wall_ms > target_ms:
+            break
+        chosen = cost
+    return chosen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target-ms", type=float, default=250,
+                        help="hash time budget per login")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    parser.add_argument("--argon2-memory-kib", type=int,
+                        default=settings.argon2_memory_cost)
+    args = parser.parse_args()
+
+    rounds = calibrate(
+        "bcrypt", lambda cost: bcrypt.using(rounds=cost),
+        range(4, args.max_rounds + 1), args.target_ms, args.samples,
+    )
+    time_cost = None
+    if argon2.has_backend():
+        time_cost = calibrate(
+            f"argon2id {args.argon2_memory_kib} KiB",
+            lambda cost: argon2.using(type="ID", time_cost=cost,
+                                      memory_cost=args.argon2_memory_kib),
+            range(1, 11), args.target_ms, args.samples,
+        )
+    else:
+        print("\nargon2: skipped, install argon2-cffi to calibrate it")
+
+    print(f"\nWithin {args.target_ms:g} ms per hash "
+          f"(current: PASSWORD_SCHEME={settings.password_scheme} "
+          f"BCRYPT_ROUNDS={settings.bcrypt_rounds}):")
+    if rounds is None:
+        print("  ⚠️ even 4 bcrypt rounds are over budget")
+    else:
+        print(f"  BCRYPT_ROUNDS={rounds}")
+        if rounds < MIN_BCRYPT_ROUNDS:
+            print(f"  ⚠️ fewer than {MIN_BCRYPT_ROUNDS} rounds is weak; "
+                  "raise the budget or add HASH_WORKERS")
+    if time_cost is not None:
+        print(f"  or PASSWORD_SCHEME=argon2 ARGON2_TIME_COST={time_cost} "
+              f"ARGON2_MEMORY_COST={args.argon2_memory_kib}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from models import User
+from .metrics import registry
+from .security import hash_password, verify_password
+
+HASH_WORKERS = settings.hash_workers
+# Hash jobs allowed to wait or run before new ones are rejected with 503
+HASH_QUEUE_LIMIT = settings.hash_queue_limit
+# Workers start from a clean server process rather than a fork of this one,
+# which holds database connections, threads and their locks by the time the
+# pool starts (forkserver is not available on Windows)
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() \
+    else "spawn"
+
+REHASHES = registry.counter(
+    "password_rehash_total",
+    "Password hashes upgraded to the current scheme and cost after login, by outcome",
+    ("outcome",),
+)
+
+_executor: ProcessPoolExecutor | None = None
+_pending = 0
+# Users whose hash is being upgraded, so concurrent logins hash it once
+_rehashing: set[int] = set()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Lower priority so request handling wins when cores are saturated
+        # (os.nice is not available on Windows)
+        priority = {"initializer": os.nice, "initargs": (10,)} \
+            if hasattr(os, "nice") else {}
+        _executor = ProcessPoolExecutor(
+            max_workers=HASH_WORKERS,
+            mp_context=multiprocessing.get_context(START_METHOD),
+            **priority,
+        )
+    return _executor
+
+
+async def _run(fn, *args):
+    """Run a hashing job in the pool, failing fast when the queue is full"""
+    global _executor, _pending
+    if _pending >= HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    executor = _get_executor()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for the next caller, unless a
+        # concurrent job already replaced it
+        if _executor is executor:
+            _executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a plain text password in the hashing pool"""
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash in the hashing pool"""
+    return await _run(verify_password, plain_password, hashed_password)
+
+
+async def upgrade_password_hash(user_id: int, password: str, old_hash: str) -> None:
+    """
+    Replace a hash made with an outdated scheme or cost. Runs after the login
+    response has been sent and only when a hashing worker is idle, so it never
+    delays a login; a skipped upgrade is retried on the user's next login.
+    The hash is only replaced if it did not change in the meantime.
+    """
+    if user_id in _rehashing or _pending >= HASH_WORKERS:
+        REHASHES.inc("skipped")
+        return
+    _rehashing.add(user_id)
+    try:
+        new_hash = await hash_password_async(password)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(User)
+                .where(User.id == user_id, User.password == old_hash)
+                .values(password=new_hash)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        REHASHES.inc("upgraded")
+    except HTTPException:
+        REHASHES.inc("skipped")
+    except Exception as e:
+        REHASHES.inc("failed")
+        print(f"❌ Password rehash failed for user {user_id}: {e}")
+    finally:
+        _rehashing.discard(user_id)
+
+
+def start_hashing_pool() -> None:
+    """Spawn the worker processes so the first login does not pay for it"""
+    executor = _get_executor()
+    for _ in range(HASH_WORKERS):
+        executor.submit(os.getpid)
+
+
+def shutdown_hashing_pool(wait: bool = False) -> None:
+    """Stop the worker processes"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait, cancel_futures=True)
+        _executor = None
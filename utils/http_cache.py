@@ -0,0 +1,46 @@
+import hashlib
+from fastapi import Request, Response
+from utils.compression import COMPRESSION_MIN_SIZE, REUSED, compress, encoded_etag, negotiate
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def cached_response(request: Request, body: bytes, etag: str,
+                    headers: dict | None = None,
+                    encoded: dict[str, bytes] | None = None) -> Response:
+    """
+    JSON response carrying an ETag, or 304 when the client has it already.
+    ``encoded`` holds compressed copies of ``body`` by content coding; a
+    missing one is compressed once and stored there for later requests.
+    """
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": "no-cache"}
+    encoding = None
+    if encoded is not None and len(body) >= COMPRESSION_MIN_SIZE:
+        encoding = negotiate(request.headers.get("accept-encoding"))
+        headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["ETag"] = encoded_etag(etag, encoding)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        data = encoded.get(encoding)
+        if data is None:
+            data = encoded[encoding] = compress(encoding, body)
+        else:
+            REUSED.inc(encoding)
+        headers["Content-Encoding"] = encoding
+        return Response(content=data, media_type="application/json", headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,344 @@
+"""
+Compact in-memory inverted index with BM25 ranking and prefix matching.
+
+Postings are parallel ``array`` objects (sorted document ids and term
+frequencies), so a million short documents fit in a few hundred MB. Every
+query term must match (AND); a term also matches vocabulary words it is a
+prefix of, found by bisecting the sorted vocabulary.
+
+Queries whose rarest term matches few documents score every candidate.
+Broader queries are counted with per-word bitmaps (big-integer AND and
+popcount) and ranked from impact-ordered postings: documents arrive best
+first for the rarest term and the scan stops once no later document can
+reach the page. Both structures are built for the words queries use, kept
+in small LRU caches and updated in place as documents change.
+"""
+import bisect
+import heapq
+import math
+import re
+import sys
+from array import array
+from collections import OrderedDict
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [t for t in _TOKEN.findall(text.lower())
+            if len(t) > 1 and t not in STOP_WORDS]
+
+
+class InvertedIndex:
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+    # Words matched by one query prefix, and the weight of a non-exact match
+    MAX_EXPANSIONS = 32
+    PREFIX_WEIGHT = 0.7
+    MIN_PREFIX = 2
+    # Rarest-term matches up to which every candidate is scored directly
+    SCAN_LIMIT = 2048
+    # Cache sizes: bitmaps (words) and impact-ordered postings (entries)
+    BITMAP_CACHE = 256
+    IMPACT_CACHE = 16_000_000
+    # Relative drift of the average document length that re-bases scores
+    REBASE_DRIFT = 0.1
+
+    def __init__(self):
+        # term -> (sorted doc ids, term frequencies)
+        self._postings: dict[str, tuple[array, array]] = {}
+        self._vocabulary: list[str] = []
+        # Indexed by doc id; weighted document lengths and indexed terms
+        self._lengths = array("H")
+        self._terms: list[tuple | None] = []
+        self._total_length = 0
+        self.size = 0
+        # Average length that scores are normalised by (see _rebase)
+        self._avg: float | None = None
+        # term -> bitmap of its doc ids
+        self._bitmaps: OrderedDict[str, bytearray] = OrderedDict()
+        # term -> (negated length-normalised tf, doc ids), best first
+        self._impacts: OrderedDict[str, tuple[array, array]] = OrderedDict()
+        self._impact_entries = 0
+
+    def add(self, doc_id: int, fields: list[tuple[str | None, int]]) -> None:
+        """Index (or re-index) a document from ``(text, weight)`` fields"""
+        self.remove(doc_id)
+        frequencies: dict[str, int] = {}
+        for text, weight in fields:
+            for token in tokenize(text):
+                # Interned, so every document shares one copy of each word
+                token = sys.intern(token)
+                frequencies[token] = frequencies.get(token, 0) + weight
+        if not frequencies:
+            return
+        length = min(sum(frequencies.values()), 0xFFFF)
+
+        if doc_id >= len(self._terms):
+            grow = doc_id + 1 - len(self._terms)
+            self._terms.extend([None] * grow)
+            self._lengths.extend([0] * grow)
+        self._terms[doc_id] = tuple(frequencies)
+        self._lengths[doc_id] = length
+        self._total_length += length
+        self.size += 1
+
+        for term, tf in frequencies.items():
+            tf = min(tf, 255)
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("B"))
+                bisect.insort(self._vocabulary, term)
+            ids, tfs = postings
+            if not ids or ids[-1] < doc_id:
+                ids.append(doc_id)
+                tfs.append(tf)
+            else:
+                at = bisect.bisect_left(ids, doc_id)
+                ids.insert(at, doc_id)
+                tfs.insert(at, tf)
+
+            bitmap = self._bitmaps.get(term)
+            if bitmap is not None:
+                if doc_id >> 3 >= len(bitmap):
+                    bitmap.extend(bytes((doc_id >> 3) + 1 - len(bitmap)))
+                bitmap[doc_id >> 3] |= 1 << (doc_id & 7)
+            impact = self._impacts.get(term)
+            if impact is not None:
+                keys, ordered = impact
+                key = -self._ratio(tf, length)
+                # Equal scores are kept in doc id order
+                at = bisect.bisect_left(ordered, doc_id, bisect.bisect_left(keys, key),
+                                        bisect.bisect_right(keys, key))
+                keys.insert(at, key)
+                ordered.insert(at, doc_id)
+                self._impact_entries += 1
+
+    def remove(self, doc_id: int) -> None:
+        if doc_id >= len(self._terms) or self._terms[doc_id] is None:
+            return
+        length = self._lengths[doc_id]
+        for term in self._terms[doc_id]:
+            ids, tfs = self._postings[term]
+            at = bisect.bisect_left(ids, doc_id)
+            tf = tfs[at]
+            del ids[at]
+            del tfs[at]
+
+            bitmap = self._bitmaps.get(term)
+            if bitmap is not None:
+                bitmap[doc_id >> 3] &= ~(1 << (doc_id & 7)) & 0xFF
+            impact = self._impacts.get(term)
+            if impact is not None:
+                keys, ordered = impact
+                key = -self._ratio(tf, length)
+                at = bisect.bisect_left(ordered, doc_id, bisect.bisect_left(keys, key),
+                                        bisect.bisect_right(keys, key))
+                del keys[at]
+                del ordered[at]
+                self._impact_entries -= 1
+
+            if not ids:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+                self._bitmaps.pop(term, None)
+                self._impacts.pop(term, None)
+        self._total_length -= length
+        self._terms[doc_id] = None
+        self._lengths[doc_id] = 0
+        self.size -= 1
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id < len(self._terms) and self._terms[doc_id] is not None
+
+    def _expand(self, term: str) -> list[tuple[str, float]]:
+        """Vocabulary words matching ``term`` exactly or by prefix"""
+        matches = [(term, 1.0)] if term in self._postings else []
+        if len(term) >= self.MIN_PREFIX:
+            start = bisect.bisect_right(self._vocabulary, term)
+            for word in self._vocabulary[start:start + self.MAX_EXPANSIONS]:
+                if not word.startswith(term):
+                    break
+                matches.append((word, self.PREFIX_WEIGHT))
+        return matches
+
+    def _rebase(self) -> None:
+        """
+        Pin the average document length scores are normalised by. Cached
+        impact orders depend on it, so they are dropped when it drifts.
+        """
+        avg = self._total_length / self.size
+        if self._avg is None or abs(avg - self._avg) > self.REBASE_DRIFT * self._avg:
+            self._avg = avg
+            self._impacts.clear()
+            self._impact_entries = 0
+
+    def _ratio(self, tf: int, length: int) -> float:
+        """Length-normalised BM25 term frequency, without idf"""
+        return tf / (tf + self.K1 * (1 - self.B + self.B * length / self._avg))
+
+    def _coefficient(self, word: str, weight: float) -> float:
+        df = len(self._postings[word][0])
+        idf = math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+        return idf * weight * (self.K1 + 1)
+
+    def _df(self, group: list[tuple[str, float]]) -> int:
+        return sum(len(self._postings[word][0]) for word, _ in group)
+
+    def _group_score(self, group: list[tuple[str, float]], doc_id: int) -> float:
+        """Best-scoring word of ``group`` in ``doc_id``; 0.0 if none occur"""
+        best = 0.0
+        for word, coefficient in group:
+            ids, tfs = self._postings[word]
+            at = bisect.bisect_left(ids, doc_id)
+            if at < len(ids) and ids[at] == doc_id:
+                s = coefficient * self._ratio(tfs[at], self._lengths[doc_id])
+                if s > best:
+                    best = s
+        return best
+
+    def _bitmap(self, word: str) -> int:
+        bitmap = self._bitmaps.get(word)
+        if bitmap is None:
+            ids = self._postings[word][0]
+            bitmap = bytearray((ids[-1] >> 3) + 1)
+            for doc_id in ids:
+                bitmap[doc_id >> 3] |= 1 << (doc_id & 7)
+            self._bitmaps[word] = bitmap
+            if len(self._bitmaps) > self.BITMAP_CACHE:
+                self._bitmaps.popitem(last=False)
+        else:
+            self._bitmaps.move_to_end(word)
+        return int.from_bytes(bitmap, "little")
+
+    def _impact(self, word: str) -> tuple[array, array]:
+        impact = self._impacts.get(word)
+        if impact is None:
+            ids, tfs = self._postings[word]
+            lengths = self._lengths
+            keys = [-self._ratio(tf, lengths[doc_id]) for doc_id, tf in zip(ids, tfs)]
+            # Stable, so equal scores stay in doc id order
+            order = sorted(range(len(ids)), key=keys.__getitem__)
+            impact = (array("d", [keys[i] for i in order]),
+                      array("I", [ids[i] for i in order]))
+            self._impacts[word] = impact
+            self._impact_entries += len(ids)
+            while self._impact_entries > self.IMPACT_CACHE and len(self._impacts) > 1:
+                _, (evicted, _) = self._impacts.popitem(last=False)
+                self._impact_entries -= len(evicted)
+        else:
+            self._impacts.move_to_end(word)
+        return impact
+
+    def _matches(self, groups: list[list[tuple[str, float]]]) -> int:
+        """Bitmap of the documents containing a word from every group"""
+        matches = None
+        for group in groups:
+            bits = 0
+            for word, _ in group:
+                bits |= self._bitmap(word)
+            matches = bits if matches is None else matches & bits
+            if not matches:
+                break
+        return matches
+
+    def _scan(self, groups: list[list[tuple[str, float]]]) -> dict[int, float]:
+        """Score every match, starting from the candidates of the rarest group"""
+        lengths = self._lengths
+        scores: dict[int, float] = {}
+        for word, coefficient in groups[0]:
+            ids, tfs = self._postings[word]
+            for doc_id, tf in zip(ids, tfs):
+                s = coefficient * self._ratio(tf, lengths[doc_id])
+                if s > scores.get(doc_id, 0.0):
+                    scores[doc_id] = s
+        for group in groups[1:]:
+            matched = {}
+            for doc_id, s in scores.items():
+                t = self._group_score(group, doc_id)
+                if t:
+                    matched[doc_id] = s + t
+            scores = matched
+            if not scores:
+                break
+        return scores
+
+    def _top(self, groups: list[list[tuple[str, float]]], want: int,
+             matches: bytes | None) -> list[tuple[int, float]]:
+        """
+        Best ``want`` matches, reading the rarest group in impact order.
+        ``matches`` is the bitmap of documents in every group, when there
+        is more than one.
+        """
+        streams = []
+        for word, coefficient in groups[0]:
+            keys, ids = self._impact(word)
+            streams.append(zip(map(coefficient.__mul__, keys), ids))
+        stream = streams[0] if len(streams) == 1 else heapq.merge(*streams)
+        others = groups[1:]
+        # The most the other groups can add to any document
+        rest = sum(max(-self._impact(word)[0][0] * coefficient
+                       for word, coefficient in group) for group in others)
+
+        heap: list[tuple[float, int]] = []
+        seen = set()
+        for negated, doc_id in stream:
+            if len(heap) == want:
+                # Equal scores arrive in id order, so with nothing to add
+                # a tie with the page can not displace it either
+                bound = rest - negated
+                if bound < heap[0][0] or not others and bound == heap[0][0]:
+                    break
+            if matches is not None and not matches[doc_id >> 3] >> (doc_id & 7) & 1:
+                continue
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            score = -negated
+            for group in others:
+                score += self._group_score(group, doc_id)
+            # Ties go to the lower id so pages are stable
+            item = (score, -doc_id)
+            if len(heap) < want:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        return [(-doc_id, score) for score, doc_id in sorted(heap, reverse=True)]
+
+    def search(self, query: str, limit: int = 20,
+               offset: int = 0) -> tuple[int, list[tuple[int, float]]]:
+        """Return (total matches, ranked (doc id, score) page)"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.size:
+            return 0, []
+        self._rebase()
+        groups = []
+        for term in terms:
+            variants = self._expand(term)
+            if not variants:
+                return 0, []
+            groups.append([(word, self._coefficient(word, weight))
+                           for word, weight in variants])
+        groups.sort(key=self._df)
+
+        want = offset + limit
+        if self._df(groups[0]) <= self.SCAN_LIMIT:
+            scores = self._scan(groups)
+            page = heapq.nsmallest(want, scores.items(),
+                                   key=lambda item: (-item[1], item[0]))
+            return len(scores), page[offset:]
+        if len(groups) == 1 and len(groups[0]) == 1:
+            total, matches = self._df(groups[0]), None
+        else:
+            bits = self._matches(groups)
+            total = bits.bit_count()
+            if not total:
+                return 0, []
+            matches = bits.to_bytes((len(self._terms) >> 3) + 1, "little")
+        return total, self._top(groups, want, matches)[offset:]
@@ -0,0 +1,145 @@
+"""
+ES256 signing keys for access tokens.
+
+Keys are PEM files in ``JWT_KEYS_DIR``, one per key, named by key id (the
+RFC 7638 thumbprint of the public key). The newest key signs new tokens;
+every key in the directory is published at ``/.well-known/jwks.json`` and
+accepted when verifying, so tokens signed before a rotation stay valid
+until old keys are pruned. Workers re-read the directory every minute and
+when they meet a key id they do not know, so a key added by a rotation (or
+by another worker's first boot) is picked up without a restart.
+
+    python -m utils.manage_jwt_keys rotate
+    python -m utils.manage_jwt_keys prune --keep 2
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose.backends import ECKey
+from config.settings import settings
+
+ALGORITHM = "ES256"
+# The directory is re-read this often, and at most this often for
+# unknown key ids
+REFRESH_INTERVAL = 60.0
+RELOAD_INTERVAL = 5.0
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    created: float
+    private_key: ECKey
+    public_key: ECKey
+    jwk: dict
+
+
+def _signing_key(private: ec.EllipticCurvePrivateKey, created: float) -> SigningKey:
+    numbers = private.public_key().public_numbers()
+    public = {
+        "crv": "P-256", "kty": "EC",
+        "x": _b64(numbers.x.to_bytes(32, "big")),
+        "y": _b64(numbers.y.to_bytes(32, "big")),
+    }
+    # RFC 7638 thumbprint: members in lexicographic order, no whitespace
+    kid = _b64(hashlib.sha256(
+        json.dumps(public, sort_keys=True, separators=(",", ":")).encode()
+    ).digest())
+    private_key = ECKey(private, ALGORITHM)
+    return SigningKey(
+        kid=kid, created=created, private_key=private_key,
+        public_key=private_key.public_key(),
+        jwk={**public, "kid": kid, "use": "sig", "alg": ALGORITHM},
+    )
+
+
+class KeyRing:
+    """The signing keys in a directory, newest first"""
+
+    def __init__(self, directory: str = settings.jwt_keys_dir):
+        self.directory = directory
+        self.keys: dict[str, SigningKey] = {}
+        self.active: SigningKey | None = None
+        self.jwks = b'{"keys":[]}'
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read every key in the directory, creating the first one if empty"""
+        keys = {}
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".pem") or not entry.is_file():
+                    continue
+                with open(entry.path, "rb") as f:
+                    private = serialization.load_pem_private_key(f.read(), None)
+                key = _signing_key(private, entry.stat().st_mtime)
+                keys[key.kid] = key
+        if not keys:
+            key = self.rotate()
+            keys[key.kid] = key
+        ordered = sorted(keys.values(), key=lambda k: (k.created, k.kid), reverse=True)
+        self.keys = {key.kid: key for key in ordered}
+        self.active = ordered[0]
+        self.jwks = json.dumps(
+            {"keys": [key.jwk for key in ordered]}, separators=(",", ":")
+        ).encode()
+        self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self) -> None:
+        """Load the keys, again when they were read REFRESH_INTERVAL ago"""
+        if self.active is None or \
+                time.monotonic() - self._loaded_at > REFRESH_INTERVAL:
+            with self._lock:
+                if self.active is None or \
+                        time.monotonic() - self._loaded_at > REFRESH_INTERVAL:
+                    self.load()
+
+    def get(self, kid: str) -> SigningKey | None:
+        """Key by id, reloading the directory once if it is unknown"""
+        self.ensure_loaded()
+        key = self.keys.get(kid)
+        if key is None and time.monotonic() - self._loaded_at > RELOAD_INTERVAL:
+            with self._lock:
+                self.load()
+            key = self.keys.get(kid)
+        return key
+
+    def rotate(self) -> SigningKey:
+        """Write a new key; it signs from the next load on"""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        private = ec.generate_private_key(ec.SECP256R1())
+        key = _signing_key(private, time.time())
+        pem = private.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        path = os.path.join(self.directory, f"{key.kid}.pem")
+        fd = os.open(path + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(pem)
+        os.replace(path + ".tmp", path)
+        return key
+
+    def prune(self, keep: int) -> list[str]:
+        """Delete all but the ``keep`` newest keys; returns the removed ids"""
+        self.load()
+        removed = list(self.keys)[max(keep, 1):]
+        for kid in removed:
+            os.remove(os.path.join(self.directory, f"{kid}.pem"))
+        self.load()
+        return removed
+
+
+key_ring = KeyRing()
+
@@ -0,0 +1,100 @@
+"""
+Local verification of access tokens against a JWKS document.
+
+Services that accept our tokens (and extra nodes of this one) validate them
+without calling back: public keys are parsed once per key id and kept, and
+the JWKS is fetched again only when a token names a key id not seen yet or
+when the document's ``Cache-Control: max-age`` has run out.
+
+    verifier = JWKSVerifier.from_url("https://api.example.com/.well-known/jwks.json")
+    claims = verifier.verify(token)
+
+Only python-jose and the standard library are needed.
+"""
+import json
+import re
+import threading
+import time
+import urllib.request
+from typing import Callable
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
+
+# Fetches the JWKS and returns it with its max-age in seconds (None if unknown)
+JWKSFetcher = Callable[[], tuple[dict, float | None]]
+
+DEFAULT_MAX_AGE = 300.0
+
+
+def fetch_url(url: str, timeout: float = 5.0) -> JWKSFetcher:
+    def fetch() -> tuple[dict, float | None]:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+            return json.load(response), float(match.group(1)) if match else None
+    return fetch
+
+
+class JWKSVerifier:
+    """Verify token signatures and expiry with keys from a JWKS"""
+
+    def __init__(self, fetch: JWKSFetcher, algorithms: tuple[str, ...] = ("ES256",),
+                 min_refresh_interval: float = 5.0):
+        self._fetch = fetch
+        self.algorithms = algorithms
+        # Unknown key ids refetch at most this often, so junk tokens
+        # cannot turn into a flood of requests to the issuer
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: dict[str, Key] = {}
+        self._fetched_at = float("-inf")
+        self._expires_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 5.0, **kwargs) -> "JWKSVerifier":
+        return cls(fetch_url(url, timeout), **kwargs)
+
+    def refresh(self) -> None:
+        """Fetch the JWKS, keeping already parsed keys that are still listed"""
+        document, max_age = self._fetch()
+        keys = {}
+        for entry in document.get("keys", []):
+            kid, algorithm = entry.get("kid"), entry.get("alg")
+            if not kid or algorithm not in self.algorithms:
+                continue
+            keys[kid] = self._keys.get(kid) or jwk.construct(entry, algorithm)
+        now = time.monotonic()
+        self._keys = keys
+        self._fetched_at = now
+        self._expires_at = now + (DEFAULT_MAX_AGE if max_age is None else max_age)
+
+    def key(self, kid: str) -> Key | None:
+        now = time.monotonic()
+        key = self._keys.get(kid)
+        stale = now >= self._expires_at
+        if (key is None or stale) and now - self._fetched_at >= self.min_refresh_interval:
+            with self._lock:
+                # Another thread may have refreshed while we waited
+                if self._fetched_at < now:
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        # Keep the keys we have and retry after the interval
+                        self._fetched_at = now
+                        print(f"⚠️ JWKS refresh failed: {e}")
+            key = self._keys.get(kid)
+        return key
+
+    def verify(self, token: str, **options) -> dict:
+        """
+        Claims of a valid token. Raises JWTError for a bad signature, an
+        expired token or an unknown key; ``options`` go to ``jwt.decode``
+        (``audience``, ``issuer``, ...).
+        """
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm not in self.algorithms:
+            raise JWTError(f"Algorithm {algorithm} is not accepted")
+        key = self.key(header.get("kid", ""))
+        if key is None:
+            raise JWTError("Token is signed with an unknown key")
+        return jwt.decode(token, key, algorithms=[algorithm], **options)
@@ -0,0 +1,39 @@
+"""
+List, rotate and prune the JWT signing keys in ``JWT_KEYS_DIR``.
+
+A rotated key signs once workers re-read the directory, within a minute.
+Prune only keys older than the longest token lifetime, so tokens signed
+with them have expired.
+
+    python -m utils.manage_jwt_keys rotate
+    python -m utils.manage_jwt_keys prune --keep 2
+    python -m utils.manage_jwt_keys list
+"""
+import argparse
+import time
+from utils.jwt_keys import key_ring
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    commands.add_parser("rotate")
+    prune = commands.add_parser("prune")
+    prune.add_argument("--keep", type=int, default=2)
+    args = parser.parse_args()
+
+    if args.command == "rotate":
+        print(f"New signing key {key_ring.rotate().kid}")
+    elif args.command == "prune":
+        for kid in key_ring.prune(args.keep):
+            print(f"Removed {kid}")
+    key_ring.load()
+    for key in key_ring.keys.values():
+        marker = "*" if key is key_ring.active else " "
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(key.created))
+        print(f"{marker} {key.kid}  {created}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort: str, values: list) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    payload = [sort] + [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, size: int) -> list:
+    """Decode a cursor produced by encode_cursor for the same sort order"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or payload[0] != sort:
+            raise ValueError("cursor does not match sort order")
+        values = payload[1:]
+        if len(values) != size:
+            raise ValueError("cursor has the wrong number of values")
+        if sort == "created_at":
+            values[0] = datetime.fromisoformat(values[0])
+        return values
+    except (ValueError, TypeError, IndexError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
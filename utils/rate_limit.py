@@ -0,0 +1,194 @@
+"""
+Rate limit state stores.
+
+``MemoryStore`` keeps a token bucket per key in a sharded dict, one lock per
+shard, for single-node deployments. ``RedisStore`` shares limits between
+nodes using a sliding window counter built from INCR/PEXPIRE/GET only, so it
+works with any server that speaks the Redis protocol (no Lua required).
+"""
+import asyncio
+import math
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+
+@dataclass(frozen=True)
+class Limit:
+    """``requests`` allowed per ``window`` seconds"""
+    requests: int
+    window: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Parse ``"<requests>/<seconds>"``, e.g. ``"10/60"``"""
+        requests, window = value.split("/")
+        return cls(int(requests), float(window))
+
+
+class MemoryStore:
+    """Token buckets for one process, sharded to keep lock hold times short"""
+
+    def __init__(self, shards: int = 16, max_keys: int = 100000):
+        self._shards = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._max_keys_per_shard = max(1, max_keys // shards)
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        """Take one token; return 0 if allowed, else seconds until retry"""
+        index = hash(key) % len(self._shards)
+        buckets = self._shards[index]
+        rate = limit.requests / limit.window
+        now = time.monotonic()
+        with self._locks[index]:
+            state = buckets.get(key)
+            if state is None:
+                if len(buckets) >= self._max_keys_per_shard:
+                    self._prune(buckets, now, rate, limit.requests,
+                                self._max_keys_per_shard)
+                tokens = limit.requests
+            else:
+                tokens = min(limit.requests, state[0] + (now - state[1]) * rate)
+            if tokens >= 1:
+                buckets[key] = (tokens - 1, now)
+                return 0.0
+            buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    @staticmethod
+    def _prune(buckets: dict, now: float, rate: float, capacity: int,
+               max_keys: int) -> None:
+        """Forget refilled buckets, then the oldest keys if still too many"""
+        for key, (tokens, last) in list(buckets.items()):
+            if tokens + (now - last) * rate >= capacity:
+                del buckets[key]
+        while len(buckets) > max_keys * 0.9:
+            buckets.pop(next(iter(buckets)))
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisError(Exception):
+    """Error reply or protocol failure from the Redis server"""
+
+
+class RedisConnection:
+    """Minimal RESP client: pipelines commands over one socket"""
+
+    def __init__(self, host: str, port: int, password: str | None, db: int):
+        self.host, self.port, self.password, self.db = host, port, password, db
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def _open(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout=1
+        )
+        if self.password:
+            await self._pipeline([("AUTH", self.password)])
+        if self.db:
+            await self._pipeline([("SELECT", self.db)])
+
+    @staticmethod
+    def _encode(command: tuple) -> bytes:
+        parts = [f"*{len(command)}\r\n".encode()]
+        for arg in command:
+            arg = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis closed the connection")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise RedisError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            size = int(payload)
+            return None if size < 0 else (await self._reader.readexactly(size + 2))[:-2]
+        if prefix == b"*":
+            size = int(payload)
+            return None if size < 0 else [await self._read() for _ in range(size)]
+        raise RedisError(f"Unexpected reply {line!r}")
+
+    async def _pipeline(self, commands: list[tuple]) -> list:
+        self._writer.write(b"".join(self._encode(c) for c in commands))
+        await self._writer.drain()
+        replies = []
+        for _ in commands:
+            try:
+                replies.append(await self._read())
+            except RedisError as e:
+                replies.append(e)
+        return replies
+
+    async def pipeline(self, commands: list[tuple]) -> list:
+        if self._writer is None:
+            await self._open()
+        try:
+            return await asyncio.wait_for(self._pipeline(commands), timeout=1)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = self._reader = None
+
+
+class RedisStore:
+    """
+    Sliding window counters shared through Redis. The count for a window is
+    estimated from the current and previous fixed windows, weighted by how
+    much of the previous window still overlaps.
+    """
+
+    def __init__(self, url: str, connections: int = 4, prefix: str = "rl:"):
+        parsed = urlparse(url)
+        self.prefix = prefix
+        self._pool: asyncio.Queue[RedisConnection] = asyncio.Queue()
+        for _ in range(connections):
+            self._pool.put_nowait(RedisConnection(
+                parsed.hostname or "localhost", parsed.port or 6379,
+                parsed.password, int(parsed.path.lstrip("/") or 0),
+            ))
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        now = time.time()
+        window = int(now // limit.window)
+        current = f"{self.prefix}{key}:{window}"
+        previous = f"{self.prefix}{key}:{window - 1}"
+        connection = await self._pool.get()
+        try:
+            count, _, before = await connection.pipeline([
+                ("INCR", current),
+                ("PEXPIRE", current, math.ceil(limit.window * 2000)),
+                ("GET", previous),
+            ])
+            if isinstance(count, Exception):
+                raise count
+            elapsed = now / limit.window - window
+            estimated = int(before or 0) * (1 - elapsed) + count
+            if estimated <= limit.requests:
+                return 0.0
+            # Rejected requests do not use up quota, as with the token bucket
+            await connection.pipeline([("DECR", current)])
+        finally:
+            self._pool.put_nowait(connection)
+        if count > limit.requests:
+            return (1 - elapsed) * limit.window
+        # Wait until enough of the previous window has slid out
+        excess = estimated - limit.requests
+        return max(excess / int(before) * limit.window, 0.001)
+
+    async def close(self) -> None:
+        while not self._pool.empty():
+            await self._pool.get_nowait().close()
@@ -3,22 +3,50 @@ from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from config.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import AsyncSessionLocal, get_async_db
+from config.replicas import get_read_db, is_replica
+from config.settings import settings
 from models import User
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from .cache import LRUCache
+from .jwt_keys import ALGORITHM, key_ring
+import time
 
 # Configuration
-SECRET_KEY = os.getenv("SECRET_KEY", "SUPER_SECRET_KEY_CHANGE_THIS")
-ALGORITHM = "HS256"
+# Verifies HS256 tokens issued before ES256 signing, if JWT_ACCEPT_HS256 is set
+SECRET_KEY = settings.secret_key
+JWT_ACCEPT_HS256 = settings.jwt_accept_hs256
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_SIZE = settings.token_cache_size
+USER_CACHE_SIZE = settings.user_cache_size
+USER_CACHE_TTL = settings.user_cache_ttl
+ADMIN_EMAILS = settings.admin_emails
+
+
+def _password_context() -> CryptContext:
+    """
+    New hashes use PASSWORD_SCHEME at the configured cost. Hashes of another
+    scheme or cost still verify and are reported by ``needs_rehash``.
+    """
+    schemes = ["bcrypt"]
+    options = {"bcrypt__rounds": settings.bcrypt_rounds}
+    if settings.password_scheme == "argon2":
+        schemes.insert(0, "argon2")
+        options.update(argon2__time_cost=settings.argon2_time_cost,
+                       argon2__memory_cost=settings.argon2_memory_cost)
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = _password_context()
 security = HTTPBearer()
 
+# Verified token -> (claims, exp); entries never outlive the token itself
+token_cache = LRUCache(TOKEN_CACHE_SIZE)
+# Email -> public user columns, short lived so other workers' edits show up
+user_cache = LRUCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+USER_CACHE_COLUMNS = ("id", "username", "email", "address", "gender", "age")
+
 
 def hash_password(password: str) -> str:
     """Hash a plain text password"""
@@ -30,25 +58,55 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made with another scheme or cost than new ones"""
+    return pwd_context.needs_update(hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
-    """Create a JWT access token"""
+    """Create a JWT signed with the active key, named in its kid header"""
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (
         expires_delta if expires_delta
         else timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    key_ring.ensure_loaded()
+    key = key_ring.active
+    return jwt.encode(to_encode, key.private_key, algorithm=ALGORITHM,
+                      headers={"kid": key.kid})
+
+
+def decode_token(token: str) -> dict:
+    """Claims of a token with a valid signature and expiry, else JWTError"""
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") == "HS256" and JWT_ACCEPT_HS256:
+        return jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    key = key_ring.get(header.get("kid", ""))
+    if key is None:
+        raise JWTError("Token is signed with an unknown key")
+    return jwt.decode(token, key.public_key, algorithms=[ALGORITHM])
+
+
+def decode_access_token(token: str) -> dict:
+    """Decode a JWT, reusing the claims of tokens verified before"""
+    cached = token_cache.get(token)
+    now = time.time()
+    if cached is not None:
+        claims, exp = cached
+        if exp is None or exp > now:
+            return claims
+        token_cache.pop(token)
+    claims = decode_token(token)
+    exp = claims.get("exp")
+    token_cache.set(token, (claims, exp), ttl=exp - now if exp else None)
+    return claims
 
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """Verify JWT token and return user email"""
     try:
-        payload = jwt.decode(
-            credentials.credentials,
-            SECRET_KEY,
-            algorithms=[ALGORITHM]
-        )
+        payload = decode_access_token(credentials.credentials)
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(
@@ -65,15 +123,70 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
         )
 
 
-def get_current_user(
+async def get_current_user(
     current_user_email: str = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> User:
-    """Get current authenticated user"""
-    user = db.query(User).filter(User.email == current_user_email).first()
+    """
+    Get current authenticated user for read-only use, as a detached object
+    from the cache or read from a replica; handlers that modify the user
+    must depend on get_current_user_for_update instead.
+    """
+    snapshot = user_cache.get(current_user_email)
+    if snapshot is not None:
+        return User(**snapshot)
+    try:
+        try:
+            user = await get_current_user_for_update(current_user_email, db)
+        except HTTPException:
+            if not is_replica(db):
+                raise
+            # Signed up moments ago and not replicated yet
+            async with AsyncSessionLocal() as primary:
+                user = await get_current_user_for_update(current_user_email, primary)
+        snapshot = {column: getattr(user, column) for column in USER_CACHE_COLUMNS}
+    finally:
+        # End the read so its connection is not held while the handler runs
+        await db.rollback()
+    user_cache.set(current_user_email, snapshot)
+    return User(**snapshot)
+
+
+async def get_current_admin(user: User = Depends(get_current_user)) -> User:
+    """Get the current user if their email is listed in ADMIN_EMAILS"""
+    if user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return user
+
+
+async def get_current_user_for_update(
+    current_user_email: str = Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Get current authenticated user loaded in the request session"""
+    result = await db.execute(
+        select(User).where(User.email == current_user_email)
+    )
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     return user
+
+
+def invalidate_user_cache(email: str) -> None:
+    """Drop the cached user row after the user was modified"""
+    user_cache.pop(email)
+
+
+def auth_cache_stats() -> dict:
+    """Token and user cache counters; every user cache hit saved a query"""
+    return {
+        "tokens": token_cache.stats(),
+        "users": {**user_cache.stats(), "db_queries_saved": user_cache.hits},
+    }
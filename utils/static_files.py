@@ -0,0 +1,243 @@
+"""
+Static font serving tuned for immutable assets.
+
+At startup (or ahead of time with ``python -m utils.static_files``) the
+font directory is scanned once: every file is checked against the magic
+bytes of its extension, hashed, and the compressible formats (svg, ttf,
+eot) get gzip (and Brotli, when installed) variants written to
+``STATIC_CACHE_DIR`` under their content hash. A manifest maps each file
+name to a content-hashed name for cache-busting URLs.
+
+Requests are answered from that index without touching the filesystem
+for metadata. Hashed names are served as ``immutable``; plain names are
+cached for ``STATIC_MAX_AGE`` seconds and revalidated with the content
+ETag. Bodies go out through the ASGI ``pathsend`` extension (zero-copy
+sendfile) when the server offers it, from memory for small files
+otherwise, and ``FileResponse`` takes care of range requests.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+from config.settings import settings
+from utils.compression import brotli, negotiate
+from utils.http_cache import etag_matches
+
+FONT_TYPES = {
+    ".woff2": "font/woff2",
+    ".woff": "font/woff",
+    ".ttf": "font/ttf",
+    ".otf": "font/otf",
+    ".eot": "application/vnd.ms-fontobject",
+    ".svg": "image/svg+xml",
+}
+# Formats that are not compressed internally (woff and woff2 are)
+PRECOMPRESSED = (".svg", ".ttf", ".otf", ".eot")
+# A variant is only kept when it saves at least this share of the bytes
+MIN_SAVING = 0.1
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _sniff(extension: str, data: bytes) -> bool:
+    """Whether ``data`` starts like a file of the given extension"""
+    if extension == ".woff2":
+        return data[:4] == b"wOF2"
+    if extension == ".woff":
+        return data[:4] == b"wOFF"
+    if extension in (".ttf", ".otf"):
+        return data[:4] in (b"\x00\x01\x00\x00", b"true", b"OTTO")
+    if extension == ".eot":
+        # EOT header: MagicNumber 0x504C at offset 34
+        return data[34:36] == b"LP"
+    if extension == ".svg":
+        head = data[:1024].lstrip(b"\xef\xbb\xbf \t\r\n")
+        return head.startswith((b"<?xml", b"<svg", b"<!DOCTYPE svg")) \
+            and b"<svg" in data[:4096]
+    return False
+
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+@dataclass
+class _Representation:
+    path: str
+    stat: os.stat_result
+    etag: str
+    body: bytes | None = None
+
+
+@dataclass
+class StaticAsset:
+    name: str
+    media_type: str
+    plain: _Representation
+    # Precompressed representations by content coding, in preference order
+    variants: dict[str, _Representation] = field(default_factory=dict)
+
+
+class FontFiles:
+    """ASGI app serving the font directory from a prebuilt asset index"""
+
+    def __init__(self, directory: str = settings.static_fonts_dir,
+                 cache_dir: str = settings.static_cache_dir,
+                 max_age: int = settings.static_max_age,
+                 memory_max_size: int = settings.static_memory_max_size):
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.memory_max_size = memory_max_size
+        # Assets by plain and by hashed name
+        self.assets: dict[str, StaticAsset] = {}
+        self.manifest: dict[str, str] = {}
+        self._manifest_body = b"{}"
+        self._manifest_etag = ""
+        self._build_task: asyncio.Task | None = None
+
+    def _representation(self, path: str, data: bytes, etag: str) -> _Representation:
+        body = data if len(data) <= self.memory_max_size else None
+        return _Representation(path, os.stat(path), etag, body)
+
+    def _variant(self, digest: str, name: str, encoding: str,
+                 data: bytes) -> _Representation | None:
+        suffix = ".gz" if encoding == "gzip" else ".br"
+        path = os.path.join(self.cache_dir, digest + os.path.splitext(name)[1] + suffix)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                compressed = f.read()
+        else:
+            compressed = _compress(encoding, data)
+            # Content-addressed, so a finished file never changes
+            with open(path + ".tmp", "wb") as f:
+                f.write(compressed)
+            os.replace(path + ".tmp", path)
+        if len(compressed) > len(data) * (1 - MIN_SAVING):
+            return None
+        return self._representation(path, compressed, f'"{digest[:32]}-{encoding}"')
+
+    def build(self) -> None:
+        """Index the font directory and write variants and manifest"""
+        assets: dict[str, StaticAsset] = {}
+        manifest: dict[str, str] = {}
+        if not os.path.isdir(self.directory):
+            print(f"⚠️ Static font directory {self.directory} does not exist")
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+        for entry in sorted(os.scandir(self.directory), key=lambda e: e.name):
+            stem, extension = os.path.splitext(entry.name)
+            extension = extension.lower()
+            if extension not in FONT_TYPES or not entry.is_file():
+                continue
+            with open(entry.path, "rb") as f:
+                data = f.read()
+            if not _sniff(extension, data):
+                print(f"⚠️ Not serving {entry.path}: its content is not a "
+                      f"{extension} file")
+                continue
+            digest = hashlib.sha256(data).hexdigest()
+            asset = StaticAsset(
+                entry.name, FONT_TYPES[extension],
+                self._representation(entry.path, data, f'"{digest[:32]}"'),
+            )
+            if extension in PRECOMPRESSED:
+                for encoding in encodings:
+                    variant = self._variant(digest, entry.name, encoding, data)
+                    if variant is not None:
+                        asset.variants[encoding] = variant
+            hashed = f"{stem}.{digest[:12]}{extension}"
+            assets[entry.name] = assets[hashed] = asset
+            manifest[entry.name] = hashed
+
+        body = json.dumps(manifest, indent=2, sort_keys=True).encode()
+        with open(os.path.join(self.cache_dir, "manifest.json"), "wb") as f:
+            f.write(body)
+        self.assets, self.manifest = assets, manifest
+        self._manifest_body = body
+        self._manifest_etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    async def _build(self) -> None:
+        await asyncio.to_thread(self.build)
+        print(f"Static fonts indexed: {len(self.manifest)} files")
+
+    async def start(self) -> None:
+        if self._build_task is None:
+            self._build_task = asyncio.create_task(self._build())
+
+    def url(self, name: str) -> str:
+        """Cache-busting name of a font file (the plain name if unknown)"""
+        return self.manifest.get(name, name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        if self._build_task is None and not self.assets:
+            await self.start()
+        if self._build_task is not None:
+            await asyncio.shield(self._build_task)
+        response = self._respond(scope)
+        await response(scope, receive, send)
+
+    def _respond(self, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405,
+                                     headers={"Allow": "GET, HEAD"})
+        path, root_path = scope["path"], scope.get("root_path", "")
+        if path.startswith(root_path):
+            path = path[len(root_path):]
+        name = path.lstrip("/")
+        request = Headers(scope=scope)
+
+        if name == "manifest.json":
+            headers = {"ETag": self._manifest_etag, "Cache-Control": "no-cache"}
+            if etag_matches(request.get("if-none-match"), self._manifest_etag):
+                return Response(status_code=304, headers=headers)
+            return Response(self._manifest_body, media_type="application/json",
+                            headers=headers)
+
+        asset = self.assets.get(name)
+        if asset is None:
+            return PlainTextResponse("Not Found", status_code=404)
+
+        headers = {
+            "Cache-Control": IMMUTABLE if name != asset.name
+            else f"public, max-age={self.max_age}",
+            "Accept-Ranges": "bytes",
+            "Last-Modified": formatdate(asset.plain.stat.st_mtime, usegmt=True),
+        }
+        representation = asset.plain
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+            # Ranges are served from the plain file
+            if "range" not in request:
+                encoding = negotiate(request.get("accept-encoding"), asset.variants)
+                if encoding is not None:
+                    representation = asset.variants[encoding]
+                    headers["Content-Encoding"] = encoding
+        headers["ETag"] = representation.etag
+        if etag_matches(request.get("if-none-match"), representation.etag):
+            return Response(status_code=304, headers=headers)
+
+        if representation.body is not None and "range" not in request and \
+                "http.response.pathsend" not in scope.get("extensions", {}):
+            return Response(representation.body, media_type=asset.media_type,
+                            headers=headers)
+        return FileResponse(representation.path, stat_result=representation.stat,
+                            media_type=asset.media_type, headers=headers)
+
+
+font_files = FontFiles()
+
+
+if __name__ == "__main__":
+    # Precompress and write the manifest at build time
+    font_files.build()
+    print(json.dumps(font_files.manifest, indent=2, sort_keys=True))